@@ -0,0 +1,78 @@
+"""
+services.monte_carlo_var ölçeklenme testi: korelasyonlu Monte Carlo portföy VaR'ı
+için işçi sayısına göre süre. Aynı seed ile tüm işçi sayılarında aynı sonuç beklenir.
+
+Kullanım (backend/python-api dizininden):
+    python benchmarks/monte_carlo_var_benchmark.py
+    python benchmarks/monte_carlo_var_benchmark.py --assets 500 --paths 1000000 --workers 1 2 4 8
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.monte_carlo_var import MonteCarloVaR  # noqa: E402
+
+
+def synthetic_portfolio(n_assets: int, n_days: int, rng: np.random.Generator):
+    """
+    Tek faktörlü sentetik log getiriler, son fiyatlar ve pozisyon adetleri üretir
+    """
+    market = rng.normal(0.0003, 0.012, n_days)
+    betas = rng.uniform(0.5, 1.5, n_assets)
+    values = market[:, None] * betas + rng.normal(0.0002, 0.018, (n_days, n_assets))
+    symbols = [f"S{i:04d}.IS" for i in range(n_assets)]
+    prices = dict(zip(symbols, rng.uniform(10, 500, n_assets)))
+    holdings = dict(zip(symbols, rng.integers(10, 1000, n_assets).astype(float)))
+    return pd.DataFrame(values, columns=symbols), holdings, prices
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Monte Carlo portföy VaR ölçeklenme testi')
+    parser.add_argument('--assets', type=int, default=500)
+    parser.add_argument('--days', type=int, default=750)
+    parser.add_argument('--paths', type=int, default=1_000_000)
+    parser.add_argument('--horizon', type=int, default=1)
+    parser.add_argument('--workers', type=int, nargs='*', default=[0, 1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument('--seed', type=int, default=11)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    returns, holdings, prices = synthetic_portfolio(args.assets, args.days, rng)
+    engine = MonteCarloVaR(max_paths=max(args.paths, 1))
+
+    # Cholesky çarpanı ilk çağrıda hesaplanıp önbelleğe alınır
+    started = time.perf_counter()
+    engine.simulate(returns, holdings, prices, n_paths=1000, seed=args.seed)
+    print(f"ilk çağrı (kovaryans + Cholesky): {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    print(f"{'işçi':>6}{'süre (s)':>10}{'VaR 99 (%)':>12}{'ES 99 (%)':>11}")
+    context = multiprocessing.get_context('spawn')
+    for workers in sorted(set(args.workers)):
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=context) if workers else None
+        try:
+            if executor is not None:
+                # İşçileri başlatma süresi ölçüme karışmasın
+                list(executor.map(abs, range(workers)))
+            started = time.perf_counter()
+            result = engine.value_at_risk(returns, holdings, prices, levels=(0.99,),
+                                          n_paths=args.paths, horizon=args.horizon,
+                                          seed=args.seed, executor=executor)
+            elapsed = time.perf_counter() - started
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        metrics = result['metrics_pct']
+        print(f"{workers or 'seri':>6}{elapsed:>10.2f}{metrics['var_99'] * 100:>12.3f}"
+              f"{metrics['cvar_99'] * 100:>11.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+services.portfolio_optimizer için SLSQP karşılaştırması: sonlu farklar, analitik
+gradyan ve bir önceki çözümden sıcak başlangıç. Varlık sayısına göre iterasyon,
+fonksiyon değerlendirme sayısı ve süre raporlanır.
+
+Kullanım (backend/python-api dizininden):
+    python benchmarks/portfolio_optimizer_benchmark.py
+    python benchmarks/portfolio_optimizer_benchmark.py --assets 10 50 100 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.portfolio_optimizer import PortfolioOptimizer  # noqa: E402
+
+
+def synthetic_moments(n_assets: int, rng: np.random.Generator, n_days: int = 500):
+    """
+    Tek faktörlü sentetik getirilerden yıllık beklenen getiri ve kovaryans üretir
+    """
+    market = rng.normal(0.0004, 0.012, n_days)
+    betas = rng.uniform(0.5, 1.5, n_assets)
+    idio = rng.normal(0.0002, 0.015, (n_days, n_assets))
+    returns = market[:, None] * betas + idio
+    return returns.mean(axis=0) * 252, np.cov(returns, rowvar=False) * 252
+
+
+def run_case(optimizer: PortfolioOptimizer, mu, cov, risk_weights, bounds, x0=None):
+    started = time.perf_counter()
+    result = optimizer._solve(mu, cov, risk_weights, bounds=bounds, x0=x0)
+    elapsed = time.perf_counter() - started
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Portföy optimizasyonu SLSQP karşılaştırması')
+    parser.add_argument('--assets', type=int, nargs='*', default=[5, 10, 25, 50, 100, 200])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--profile', default='medium')
+    parser.add_argument('--max-weight', type=float, default=0.3)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    finite_diff = PortfolioOptimizer(use_gradients=False, warm_start=False)
+    analytic = PortfolioOptimizer(use_gradients=True)
+    risk_weights = analytic.risk_weights[args.profile]
+
+    print(f"{'varlık':>7} {'yöntem':<16}{'iter':>6}{'f eval':>8}{'jac eval':>9}"
+          f"{'süre (ms)':>11}{'amaç':>12}")
+    for n_assets in args.assets:
+        mu, cov = synthetic_moments(n_assets, rng)
+        max_weight = max(args.max_weight, 1.0 / n_assets)
+        bounds = analytic._prepare_bounds(n_assets, {'max_weight': max_weight})
+
+        # Ertesi günün tahminleri: sıcak başlangıç bir önceki çözümden yapılır
+        mu_next = mu + rng.normal(0, 0.002, n_assets)
+        previous = analytic._solve(mu, cov, risk_weights, bounds=bounds).x
+
+        cases = [
+            ('sonlu fark', finite_diff, None),
+            ('analitik', analytic, None),
+            ('analitik+sıcak', analytic, previous),
+        ]
+        for name, optimizer, x0 in cases:
+            timings = []
+            for _ in range(args.repeat):
+                result, elapsed = run_case(optimizer, mu_next, cov, risk_weights, bounds, x0)
+                timings.append(elapsed)
+            print(f"{n_assets:>7} {name:<16}{result.nit:>6}{result.nfev:>8}{getattr(result, 'njev', 0):>9}"
+                  f"{min(timings) * 1000:>11.2f}{result.fun:>12.6f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+services.qp_optimizer ölçeklenme testi: varlık sayısına göre kurulum + çözüm süresi
+ve OSQP iterasyonları. Kutu, sektör ve (isteğe bağlı) devir kısıtlarıyla çalışır.
+
+Kullanım (backend/python-api dizininden):
+    python benchmarks/qp_scaling_benchmark.py
+    python benchmarks/qp_scaling_benchmark.py --assets 100 500 1000 --days 500 --turnover 0.2
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.qp_optimizer import QPOptimizer, sector_groups  # noqa: E402
+
+
+def synthetic_returns(n_assets: int, n_days: int, n_sectors: int, rng: np.random.Generator):
+    """
+    Piyasa ve sektör faktörlü sentetik günlük getiriler ile sembol -> sektör eşlemesi üretir
+    """
+    sectors = rng.integers(0, n_sectors, n_assets)
+    market = rng.normal(0.0004, 0.012, n_days)
+    sector_moves = rng.normal(0.0, 0.008, (n_days, n_sectors))
+    betas = rng.uniform(0.5, 1.5, n_assets)
+    values = (market[:, None] * betas + sector_moves[:, sectors]
+              + rng.normal(0.0002, 0.018, (n_days, n_assets)))
+    symbols = [f"S{i:04d}.IS" for i in range(n_assets)]
+    return (pd.DataFrame(values, columns=symbols),
+            {symbol: f"sektör-{sector}" for symbol, sector in zip(symbols, sectors)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='QP portföy optimizasyonu ölçeklenme testi')
+    parser.add_argument('--assets', type=int, nargs='*', default=[10, 25, 50, 100, 250, 500, 750, 1000])
+    parser.add_argument('--days', type=int, default=250)
+    parser.add_argument('--sectors', type=int, default=12)
+    parser.add_argument('--max-sector-weight', type=float, default=0.3)
+    parser.add_argument('--turnover', type=float, default=None,
+                        help='Eşit ağırlıklı portföyden izin verilen en fazla devir')
+    parser.add_argument('--profile', default='medium')
+    parser.add_argument('--shrink', action='store_true')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'varlık':>7}{'kovaryans':>11}{'iter':>7}{'osqp (ms)':>11}{'toplam (ms)':>13}"
+          f"{'volatilite':>12}{'aktif':>7}  durum")
+    for n_assets in args.assets:
+        returns, sectors = synthetic_returns(n_assets, args.days, args.sectors, rng)
+        max_weight = max(0.1, 2.0 / n_assets)
+        groups = sector_groups(sectors, max_weight=max(args.max_sector_weight, 1.0 / args.sectors + 0.05))
+        current = {symbol: 1.0 / n_assets for symbol in returns.columns} if args.turnover else None
+
+        # Her boyut için yeni motor: önbellek ve sıcak başlangıç ölçüme karışmaz
+        optimizer = QPOptimizer()
+        started = time.perf_counter()
+        result = optimizer.optimize(returns, args.profile, max_weight=max_weight, groups=groups,
+                                    current_weights=current, max_turnover=args.turnover,
+                                    shrink=args.shrink)
+        elapsed = time.perf_counter() - started
+
+        form = 'yoğun' if n_assets <= args.days else 'faktör'
+        active = sum(1 for w in result['weights'].values() if w > 1e-6)
+        print(f"{n_assets:>7}{form:>11}{result['iterations']:>7}{result['solve_time'] * 1000:>11.1f}"
+              f"{elapsed * 1000:>13.1f}{result['volatility']:>12.4f}{active:>7}  {result['status']}")
+
+
+if __name__ == '__main__':
+    main()
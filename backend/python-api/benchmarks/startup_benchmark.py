@@ -0,0 +1,99 @@
+"""
+Soğuk başlangıç ölçümü: her modül ayrı ve temiz bir Python sürecinde içe aktarılır.
+
+Kullanım (backend/python-api dizininden):
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --repeat 5 main services.stock_analyzer
+    python benchmarks/startup_benchmark.py --check
+
+'import main' HEAVY_MODULES içindeki modüllerden birini yüklerse ya da başarısız
+olursa betik hata koduyla çıkar; --check yalnızca bu kontrolü yapar.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = [
+    'numpy',
+    'pandas',
+    'yfinance',
+    'sklearn.preprocessing',
+    'tensorflow',
+    'ta',
+    'textblob',
+    'bs4',
+    'requests',
+    'services.price_store',
+    'services.market_data',
+    'services.stock_analyzer',
+    'services.portfolio_optimizer',
+    'services.risk_analyzer',
+    'models.stock_prediction',
+    'models.model_registry',
+    'main',
+]
+
+# 'import main' bunların hiçbirini yüklememeli; ilk kullanıldıkları isteğe kadar ertelenirler
+HEAVY_MODULES = ('pandas', 'yfinance', 'tensorflow', 'sklearn', 'scipy', 'sqlalchemy', 'ta', 'textblob', 'bs4')
+
+PROBE = (
+    "import sys, time\n"
+    "started = time.perf_counter()\n"
+    "import {module}\n"
+    "elapsed = time.perf_counter() - started\n"
+    "heavy = sorted(m for m in {heavy!r} if m in sys.modules)\n"
+    "print(elapsed, ','.join(heavy))\n"
+)
+
+
+def measure(module: str, repeat: int):
+    """
+    Modülü repeat kez yeni bir süreçte içe aktarır; süreleri ve yüklenen ağır modülleri döndürür
+    """
+    timings = []
+    loaded = ''
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                                cwd=API_DIR, capture_output=True, text=True)
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1] if result.stderr else 'hata'
+        elapsed, _, loaded = result.stdout.strip().splitlines()[-1].partition(' ')
+        timings.append(float(elapsed))
+    return timings, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Modül başına soğuk içe aktarma süresi')
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--check', action='store_true',
+                        help="yalnızca 'import main' ağır modül yüklüyor mu kontrol et")
+    args = parser.parse_args()
+    if args.check:
+        args.modules = ['main']
+
+    failed = []
+    print(f"{'modül':<32}{'medyan (ms)':>14}{'min (ms)':>12}  yüklenen ağır modüller")
+    for module in args.modules:
+        timings, loaded = measure(module, args.repeat)
+        if timings is None:
+            print(f"{module:<32}{'-':>14}{'-':>12}  {loaded}")
+            if module == 'main':
+                failed.append(loaded)
+            continue
+        print(f"{module:<32}{statistics.median(timings) * 1000:>14.1f}"
+              f"{min(timings) * 1000:>12.1f}  {loaded or '-'}")
+        if module == 'main' and loaded:
+            failed.append(f"ağır modüller yüklendi: {loaded.replace(',', ', ')}")
+
+    if failed:
+        print(f"HATA: 'import main' - {'; '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,23 +1,49 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, WebSocket, WebSocketDisconnect, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict
-import yfinance as yf
-import pandas as pd
+from typing import List, Optional, Dict, Tuple
 from datetime import datetime, timedelta
 import numpy as np
+import asyncio
+import json
 import logging
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+from models.monte_carlo import MonteCarloSimulator, SIMULATION_METHODS
+from services.indicator_engine import get_indicator_engine
+from services.monte_carlo_var import MC_VAR_MAX_PATHS, get_monte_carlo_var
+from services.portfolio_aggregate import PortfolioAggregateStore
+from services.portfolio_repository import PortfolioNotFoundError, get_portfolio_repository
+from services.price_store import get_price_store
+from services.qp_optimizer import RISK_AVERSION, optimize_portfolio_qp, returns_from_prices, sector_groups
+from services.quote_hub import QUOTE_FEED, SimulatedQuoteFeed, Subscription, get_quote_hub
+from services.risk_analyzer import analyze_batch_payload, encode_batch_result
+from services.sentiment import get_sentiment_service
+from services.stock_analyzer import ANALYSIS_LOOKBACK_DAYS, analyze_history
+from services.symbol_search import SYMBOL_SEARCH_LIMIT, SymbolIndex, normalize_query
+from services.trade_import import IMPORT_FORMATS, TradeImportError, import_trades
+from services.var_engine import VAR_CONFIDENCE_LEVELS, VAR_METHODS, parse_confidence_levels, value_at_risk
+from utils.execution import ExecutionRejectedError, ExecutionTimeoutError, get_execution_layer
+from utils.lazy_import import get_import_timings, warm_up
+from utils.response_cache import get_response_cache
+
 # Configuration
 PYTHON_API_PORT = int(os.getenv('PYTHON_API_PORT', '8000'))
 JWT_SECRET = os.getenv('JWT_SECRET', 'your_jwt_secret_here')
 ALPHA_VANTAGE_API_KEY = os.getenv('ALPHA_VANTAGE_API_KEY')
 FINNHUB_API_KEY = os.getenv('FINNHUB_API_KEY')
+WARMUP_ON_STARTUP = os.getenv('WARMUP_ON_STARTUP', 'false').lower() in ('1', 'true', 'yes')
+RISK_BATCH_MAX_BYTES = int(os.getenv('RISK_BATCH_MAX_BYTES', str(256 * 1024 * 1024)))
+SENTIMENT_REFRESH_ON_STARTUP = os.getenv('SENTIMENT_REFRESH_ON_STARTUP', 'true').lower() in ('1', 'true', 'yes')
+PORTFOLIO_IMPORT_MAX_BYTES = int(os.getenv('PORTFOLIO_IMPORT_MAX_BYTES', str(256 * 1024 * 1024)))
+ANALYZE_BATCH_MAX_SYMBOLS = int(os.getenv('ANALYZE_BATCH_MAX_SYMBOLS', '100'))
+PORTFOLIO_DEMO_SEED = os.getenv('PORTFOLIO_DEMO_SEED', 'false').lower() in ('1', 'true', 'yes')
 
 app = FastAPI(title="Finance AI API")
 
@@ -82,6 +108,16 @@ class Portfolio(BaseModel):
     dailyChange: float
     lastUpdated: str
 
+class MonteCarloVaRRequest(BaseModel):
+    holdings: Optional[Dict[str, float]] = None
+    n_paths: int = 100000
+    horizon_days: int = 1
+    confidence_levels: Optional[List[float]] = None
+    seed: Optional[int] = None
+
+class BatchAnalysisRequest(BaseModel):
+    symbols: List[str]
+
 class AddToPortfolioRequest(BaseModel):
     symbol: str
     quantity: int
@@ -91,186 +127,303 @@ class AddToPortfolioRequest(BaseModel):
 TURKISH_STOCKS: Dict[str, Dict[str, any]] = {
     'THYAO.IS': {
         'name': 'Türk Hava Yolları',
+        'sector': 'Ulaştırma',
         'price': 150.20,
         'change': 2.5,
         'volume': 15000000
     },
     'GARAN.IS': {
         'name': 'Garanti Bankası',
+        'sector': 'Bankacılık',
         'price': 85.30,
         'change': -1.2,
         'volume': 12000000
     },
     'AKBNK.IS': {
         'name': 'Akbank',
+        'sector': 'Bankacılık',
         'price': 92.45,
         'change': 1.8,
         'volume': 10000000
     },
     'EREGL.IS': {
         'name': 'Ereğli Demir Çelik',
+        'sector': 'Metal',
         'price': 45.60,
         'change': 0.5,
         'volume': 8000000
     },
     'ASELS.IS': {
         'name': 'Aselsan',
+        'sector': 'Savunma',
         'price': 78.90,
         'change': 3.2,
         'volume': 6000000
     },
     'KCHOL.IS': {
         'name': 'Koç Holding',
+        'sector': 'Holding',
         'price': 120.50,
         'change': 1.5,
         'volume': 9000000
     },
     'SISE.IS': {
         'name': 'Şişe Cam',
+        'sector': 'Sanayi',
         'price': 35.80,
         'change': -0.8,
         'volume': 5000000
     },
     'TUPRS.IS': {
         'name': 'Tüpraş',
+        'sector': 'Enerji',
         'price': 180.30,
         'change': 2.8,
         'volume': 7000000
     },
     'TAVHL.IS': {
         'name': 'TAV Havalimanları',
+        'sector': 'Ulaştırma',
         'price': 65.40,
         'change': -1.5,
         'volume': 4000000
     },
     'PGSUS.IS': {
         'name': 'Pegasus',
+        'sector': 'Ulaştırma',
         'price': 95.70,
         'change': 1.7,
         'volume': 3500000
     }
 }
 
-# Mock portföy verisi
-MOCK_PORTFOLIO = {
-    1: {
-        "id": 1,
-        "userId": 1,
-        "stocks": [
-            {
-                "symbol": "THYAO",
-                "name": "Türk Hava Yolları",
-                "quantity": 100,
-                "averagePrice": 145.30,
-                "currentPrice": 150.20,
-                "totalValue": 15020.00,
-                "profit": 490.00,
-                "profitPercentage": 3.37
-            },
-            {
-                "symbol": "GARAN",
-                "name": "Garanti Bankası",
-                "quantity": 200,
-                "averagePrice": 82.50,
-                "currentPrice": 85.30,
-                "totalValue": 17060.00,
-                "profit": 560.00,
-                "profitPercentage": 3.39
-            }
-        ],
-        "totalValue": 32080.00,
-        "dailyChange": 3.38,
-        "lastUpdated": "2025-02-20T14:30:00Z"
-    }
-}
+# Sembol araması için indeks bir kez kurulur
+symbol_index = SymbolIndex.from_stocks(TURKISH_STOCKS)
+
+def stock_quote(symbol: str) -> Tuple[str, Optional[float]]:
+    """
+    Portföy değerlemesi için sembolün adı ve güncel fiyatı (mock veri)
+    """
+    data = TURKISH_STOCKS.get(f"{symbol.upper()}.IS", {})
+    return data.get("name", symbol), data.get("price")
+
+# Boş veritabanında kullanıcı 1 için oluşturulan örnek portföy: (sembol, adet, ortalama fiyat)
+DEMO_PORTFOLIO_TRADES = [
+    ("THYAO", 100, 145.30),
+    ("GARAN", 200, 82.50),
+]
 
 # Servis örnekleri
+execution = get_execution_layer()
+price_store = get_price_store()
+monte_carlo = MonteCarloSimulator()
+sentiment_service = get_sentiment_service()
+monte_carlo_var = get_monte_carlo_var()
+portfolio_repository = get_portfolio_repository()
+portfolio_aggregates = PortfolioAggregateStore(portfolio_repository, stock_quote)
+response_cache = get_response_cache()
+# Fiyat geçmişi güncellendiğinde piyasa yanıtları yeniden üretilir
+price_store.add_listener(lambda symbol: response_cache.invalidate("market"))
+quote_hub = get_quote_hub()
+indicator_engine = get_indicator_engine()
 market_service = None
 portfolio_optimizer = None
 risk_analyzer = None
 stock_analyzer = None
 
+# Isınma aşaması etkinse, bitene kadar hazır değil
+readiness = {"ready": not WARMUP_ON_STARTUP}
+
+@app.on_event("startup")
+async def start_warm_up():
+    """
+    Ağır bağımlılıkları ve süreç havuzunu arka planda önceden yükler
+    """
+    if WARMUP_ON_STARTUP:
+        asyncio.get_running_loop().create_task(run_warm_up())
+
+async def run_warm_up():
+    try:
+        timings = await asyncio.get_running_loop().run_in_executor(execution.io_pool, warm_up)
+        await execution.warm_up(warm_up)
+        logger.info(f"Isınma tamamlandı: {timings}")
+    except Exception as e:
+        logger.error(f"Isınma sırasında hata: {str(e)}")
+    finally:
+        readiness["ready"] = True
+
+# Arka planda çalışan görevler; kapanışta iptal edilir
+background_tasks: List[asyncio.Task] = []
+
+@app.on_event("startup")
+async def start_sentiment_refresh():
+    """
+    Takip edilen hisselerin haber duygu skorlarını arka planda güncel tutar
+    """
+    if SENTIMENT_REFRESH_ON_STARTUP:
+        task = asyncio.get_running_loop().create_task(sentiment_service.run_forever(TURKISH_STOCKS.keys()))
+        background_tasks.append(task)
+
+@app.on_event("startup")
+async def init_portfolio_store():
+    """
+    Eksik portföy tablolarını oluşturur ve gerekirse örnek portföyü ekler
+    """
+    def init():
+        portfolio_repository.create_schema()
+        if PORTFOLIO_DEMO_SEED:
+            portfolio_repository.create_portfolio(1, "Ana Portföy", DEMO_PORTFOLIO_TRADES)
+
+    try:
+        await asyncio.get_running_loop().run_in_executor(execution.io_pool, init)
+    except Exception as e:
+        logger.error(f"Portföy veritabanı hazırlanamadı: {str(e)}")
+
+def apply_quote_updates(updates: Dict[str, Dict]):
+    """
+    Canlı fiyatları piyasa verisine ve önbellekteki portföylere yansıtır
+    """
+    for symbol, quote in updates.items():
+        data = TURKISH_STOCKS.get(f"{symbol}.IS")
+        if data is not None:
+            data.update(price=quote["price"], change=quote["change"], volume=quote["volume"])
+        portfolio_aggregates.update_price(symbol, quote["price"])
+    response_cache.invalidate("market")
+
+quote_hub.add_listener(apply_quote_updates)
+
+@app.on_event("startup")
+async def start_quote_hub():
+    """
+    Fiyat dağıtım merkezini mevcut fiyatlarla başlatır; QUOTE_FEED=simulated ise
+    yerel fiyat akışını da çalıştırır
+    """
+    for symbol, data in TURKISH_STOCKS.items():
+        quote_hub.publish(symbol.replace('.IS', ''), data['price'], data['change'], data['volume'])
+    quote_hub.flush()
+    loop = asyncio.get_running_loop()
+    background_tasks.append(loop.create_task(quote_hub.run()))
+    if QUOTE_FEED == 'simulated':
+        feed = SimulatedQuoteFeed(quote_hub, {symbol.replace('.IS', ''): data
+                                              for symbol, data in TURKISH_STOCKS.items()})
+        background_tasks.append(loop.create_task(feed.run()))
+
+@app.get("/api/health/ready")
+async def get_readiness():
+    """
+    Servisin trafiğe hazır olup olmadığını ve modül yükleme sürelerini döndürür
+    """
+    if not readiness["ready"]:
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+    return {"status": "ready", "import_timings": get_import_timings()}
+
+@app.on_event("shutdown")
+async def shutdown_execution():
+    """
+    Arka plan görevlerini durdurur, gösterge durumlarını kaydeder ve yürütme havuzlarını kapatır
+    """
+    for task in background_tasks:
+        task.cancel()
+    background_tasks.clear()
+    try:
+        indicator_engine.save()
+    except OSError as e:
+        logger.error(f"Gösterge durumları kaydedilemedi: {str(e)}")
+    execution.shutdown()
+
+@app.exception_handler(ExecutionTimeoutError)
+async def execution_timeout_handler(request, exc: ExecutionTimeoutError):
+    logger.error(f"İstek zaman aşımına uğradı: {request.url.path} - {str(exc)}")
+    return JSONResponse(status_code=504, content={"detail": "İstek zaman aşımına uğradı"})
+
+@app.exception_handler(ExecutionRejectedError)
+async def execution_rejected_handler(request, exc: ExecutionRejectedError):
+    logger.warning(f"İstek reddedildi: {request.url.path} - {str(exc)}")
+    return JSONResponse(status_code=503, content={"detail": "Sunucu meşgul, lütfen tekrar deneyin"})
+
+def market_summary_item(symbol: str, data: Dict) -> Dict:
+    return {
+        "symbol": symbol.replace('.IS', ''),  # .IS uzantısını kaldır
+        "name": data['name'],
+        "price": data['price'],
+        "change": data['change'],
+        "volume": data['volume'],
+    }
+
+def build_market_summary() -> List[Dict]:
+    return [market_summary_item(symbol, data) for symbol, data in TURKISH_STOCKS.items()]
+
+def build_recommendations() -> List[Dict]:
+    recommendations = []
+    for symbol, data in TURKISH_STOCKS.items():
+        # Basit öneri algoritması
+        if data['change'] > 2:
+            rec = "sat"
+            reason = "Aşırı alım bölgesinde"
+            confidence = 0.8
+        elif data['change'] < -2:
+            rec = "al"
+            reason = "Aşırı satım bölgesinde"
+            confidence = 0.8
+        else:
+            rec = "tut"
+            reason = "Nötr bölgede"
+            confidence = 0.6
+
+        recommendations.append({
+            "symbol": symbol.replace('.IS', ''),  # .IS uzantısını kaldır
+            "name": data['name'],
+            "price": data['price'],
+            "change": data['change'],
+            "recommendation": rec,
+            "confidence": confidence,
+            "reason": reason,
+        })
+    return recommendations
+
+def build_search_results(query: str, limit: int) -> List[Dict]:
+    return [market_summary_item(entry.key, TURKISH_STOCKS[entry.key])
+            for entry in symbol_index.search(query, limit)]
+
 @app.get("/api/market/summary", response_model=List[MarketSummary])
-async def get_market_summary():
+async def get_market_summary(request: Request):
     """
     Piyasa özetini döndürür. Mock veri kullanır.
     """
     try:
-        summaries = []
-        for symbol, data in TURKISH_STOCKS.items():
-            summaries.append(MarketSummary(
-                symbol=symbol.replace('.IS', ''),  # .IS uzantısını kaldır
-                name=data['name'],
-                price=data['price'],
-                change=data['change'],
-                volume=data['volume']
-            ))
-        return summaries
+        entry = await response_cache.get_or_build(("market_summary",), build_market_summary,
+                                                  tags=("market",))
+        return response_cache.respond(request, entry)
     except Exception as e:
         logger.error(f"Piyasa özeti alınırken hata: {str(e)}")
         raise HTTPException(status_code=500, detail="Piyasa verileri alınamadı")
 
 @app.get("/api/market/recommendations", response_model=List[Recommendation])
-async def get_recommendations():
+async def get_recommendations(request: Request):
     """
     Hisse senedi önerilerini döndürür. Mock veri kullanır.
     """
     try:
-        recommendations = []
-        for symbol, data in TURKISH_STOCKS.items():
-            # Basit öneri algoritması
-            if data['change'] > 2:
-                rec = "sat"
-                reason = "Aşırı alım bölgesinde"
-                confidence = 0.8
-            elif data['change'] < -2:
-                rec = "al"
-                reason = "Aşırı satım bölgesinde"
-                confidence = 0.8
-            else:
-                rec = "tut"
-                reason = "Nötr bölgede"
-                confidence = 0.6
-
-            recommendations.append(Recommendation(
-                symbol=symbol.replace('.IS', ''),  # .IS uzantısını kaldır
-                name=data['name'],
-                price=data['price'],
-                change=data['change'],
-                recommendation=rec,
-                confidence=confidence,
-                reason=reason
-            ))
-        return recommendations
+        entry = await response_cache.get_or_build(("market_recommendations",), build_recommendations,
+                                                  tags=("market",))
+        return response_cache.respond(request, entry)
     except Exception as e:
         logger.error(f"Öneriler alınırken hata: {str(e)}")
         raise HTTPException(status_code=500, detail="Öneriler alınamadı")
 
-@app.get("/api/market/search")
-async def search_stocks(query: str):
+@app.get("/api/market/search", response_model=List[MarketSummary])
+async def search_stocks(request: Request, query: str,
+                        limit: int = Query(SYMBOL_SEARCH_LIMIT, ge=1, le=100)):
     """
-    Hisse senedi araması yapar. Mock veri kullanır.
+    Hisse senedi araması yapar. Sembol, isim ve sektörde Türkçe duyarlı önek ve
+    kelime içi eşleşmeler alaka sırasıyla döner. Mock veri kullanır.
     """
     try:
-        results = []
-        query = query.lower()
-        
-        # Symbol ve name için ayrı ayrı kontrol et
-        for symbol, data in TURKISH_STOCKS.items():
-            clean_symbol = symbol.replace('.IS', '')  # .IS uzantısını kaldır
-            if (query in clean_symbol.lower() or 
-                query in data['name'].lower()):
-                results.append(MarketSummary(
-                    symbol=clean_symbol,
-                    name=data['name'],
-                    price=data['price'],
-                    change=data['change'],
-                    volume=data['volume']
-                ))
-        
-        # Sonuçları alfabetik sırala
-        results.sort(key=lambda x: x.symbol)
-        return results
+        query = normalize_query(query)
+        entry = await response_cache.get_or_build(("market_search", query, limit),
+                                                  lambda: build_search_results(query, limit),
+                                                  tags=("market",))
+        return response_cache.respond(request, entry)
     except Exception as e:
         logger.error(f"Hisse senedi araması yapılırken hata: {str(e)}")
         raise HTTPException(status_code=500, detail="Arama yapılamadı")
@@ -296,6 +449,78 @@ async def get_stock_data(symbol: str):
         logger.error(f"Hisse senedi verisi alınırken hata: {symbol} - {str(e)}")
         raise HTTPException(status_code=500, detail="Hisse senedi verisi alınamadı")
 
+def parse_quote_symbols(symbols) -> List[str]:
+    """
+    'thyao', 'THYAO.IS' gibi sembolleri 'THYAO' biçimine getirir; bilinmeyen sembol varsa ValueError
+    """
+    if isinstance(symbols, str):
+        symbols = symbols.split(',')
+    if not isinstance(symbols, list) or not all(isinstance(symbol, str) for symbol in symbols):
+        raise ValueError("symbols bir sembol listesi olmalı")
+    parsed = [to_bist_symbol(symbol) for symbol in symbols if symbol.strip()]
+    unknown = [symbol.replace('.IS', '') for symbol in parsed if symbol not in TURKISH_STOCKS]
+    if unknown:
+        raise ValueError(f"Bilinmeyen semboller: {', '.join(unknown)}")
+    return [symbol.replace('.IS', '') for symbol in parsed]
+
+@app.websocket("/ws/quotes")
+async def stream_quotes(websocket: WebSocket, symbols: Optional[str] = None):
+    """
+    Canlı fiyat akışı. İstemci {"action": "subscribe" | "unsubscribe", "symbols": [...]}
+    mesajlarıyla (ya da ?symbols=THYAO,GARAN ile) sembol seçer; abone olunan sembollerin
+    son fiyatları hemen, sonraki değişiklikleri her aralıkta birleştirilmiş tek
+    {"type": "quotes", "data": [...]} mesajıyla gelir. Mesajlarını zamanında alamayan
+    istemciye ara fiyatlar atlanarak yalnızca en son fiyatlar gönderilir.
+    """
+    await websocket.accept()
+    subscription = Subscription(quote_hub, websocket.send_text)
+
+    async def send_quotes():
+        try:
+            await subscription.run()
+        except asyncio.TimeoutError:
+            logger.warning(f"Yavaş istemci bağlantısı kapatıldı: {subscription.dropped} fiyat atlandı")
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        except Exception as e:
+            logger.warning(f"Fiyat akışı gönderilemedi: {str(e)}")
+
+    async def handle(message: Dict):
+        action = message.get("action")
+        if action not in ("subscribe", "unsubscribe"):
+            raise ValueError("action subscribe ya da unsubscribe olmalı")
+        requested = parse_quote_symbols(message.get("symbols", []))
+        if action == "subscribe":
+            quote_hub.subscribe(subscription, requested)
+        else:
+            quote_hub.unsubscribe(subscription, requested)
+        await subscription.send(json.dumps({"type": "subscribed", "symbols": sorted(subscription.symbols)}))
+
+    sender = asyncio.get_running_loop().create_task(send_quotes())
+    try:
+        if symbols:
+            try:
+                await handle({"action": "subscribe", "symbols": symbols})
+            except ValueError as e:
+                await subscription.send(json.dumps({"type": "error", "detail": str(e)}, ensure_ascii=False))
+        while True:
+            text = await websocket.receive_text()
+            try:
+                try:
+                    message = json.loads(text)
+                except json.JSONDecodeError:
+                    raise ValueError("Mesaj geçerli bir JSON değil")
+                if not isinstance(message, dict):
+                    raise ValueError("Mesaj bir JSON nesnesi olmalı")
+                await handle(message)
+            except ValueError as e:
+                await subscription.send(json.dumps({"type": "error", "detail": str(e)}, ensure_ascii=False))
+    except (WebSocketDisconnect, RuntimeError):
+        # Bağlantı istemci tarafından ya da yavaş istemci nedeniyle kapandı
+        pass
+    finally:
+        quote_hub.unsubscribe(subscription)
+        sender.cancel()
+
 @app.get("/api/market/analyze/{symbol}")
 async def analyze_stock_turkish(symbol: str):
     """
@@ -306,8 +531,7 @@ async def analyze_stock_turkish(symbol: str):
         if symbol_with_is in TURKISH_STOCKS:
             data = TURKISH_STOCKS[symbol_with_is]
             # Basit teknik analiz
-            stock = yf.Ticker(symbol_with_is)
-            hist = stock.history(period="1mo")
+            hist = await execution.run_io('analysis', price_store.get_history, symbol_with_is, period="1mo")
             
             sma_20 = hist['Close'].rolling(window=20).mean().iloc[-1]
             sma_50 = hist['Close'].rolling(window=50).mean().iloc[-1]
@@ -323,91 +547,396 @@ async def analyze_stock_turkish(symbol: str):
             
             return analysis
         raise HTTPException(status_code=404, detail="Hisse senedi bulunamadı")
+    except (HTTPException, ExecutionTimeoutError, ExecutionRejectedError):
+        raise
     except Exception as e:
         logger.error(f"Hisse senedi analizi yapılırken hata: {symbol} - {str(e)}")
         raise HTTPException(status_code=500, detail="Hisse senedi analizi yapılamadı")
 
+async def analyze_batch_results(symbols: List[str], history: Dict):
+    """
+    Her sembolün analizini süreç havuzuna gönderir ve sonuçları bitiş sırasıyla NDJSON satırı olarak üretir
+    """
+    async def analyze(symbol: str) -> Dict:
+        try:
+            data = history[f"{symbol}.IS"]
+            # Göstergeler yalnızca yeni barlarla, kapanışta kaydedilen ana süreç motorunda güncellenir
+            indicators = await execution.run_io('analysis', indicator_engine.update, symbol, data)
+            analysis = await execution.run_cpu('batch_analysis', analyze_history, symbol, data,
+                                               sentiment_service.score(symbol), indicators)
+            return {"symbol": symbol, "status": "ok", "analysis": analysis}
+        except ExecutionTimeoutError:
+            return {"symbol": symbol, "status": "error", "detail": "Analiz zaman aşımına uğradı"}
+        except ExecutionRejectedError:
+            return {"symbol": symbol, "status": "error", "detail": "Sunucu meşgul, lütfen tekrar deneyin"}
+        except ValueError as e:
+            return {"symbol": symbol, "status": "error", "detail": str(e)}
+        except Exception as e:
+            logger.error(f"Toplu analizde hata: {symbol} - {str(e)}")
+            return {"symbol": symbol, "status": "error", "detail": "Hisse senedi analizi yapılamadı"}
+
+    loop = asyncio.get_running_loop()
+    tasks = [loop.create_task(analyze(symbol)) for symbol in symbols]
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            result = await next_result
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+    finally:
+        # İstemci bağlantıyı kapatırsa kuyrukta bekleyen analizler başlatılmaz
+        for task in tasks:
+            task.cancel()
+
+@app.post("/api/market/analyze/batch")
+async def analyze_stocks_batch(request: BatchAnalysisRequest):
+    """
+    Birden çok hissenin analizini tek istekte yapar. Fiyat geçmişleri tek toplu
+    okumayla alınır; gösterge, trend ve tahmin hesapları süreç havuzunda sembol
+    başına paralel yürür ve her sonuç biter bitmez bir NDJSON satırı olarak
+    gönderilir: {"symbol", "status": "ok", "analysis"} ya da {"symbol", "status": "error", "detail"}.
+    """
+    try:
+        symbols = list(dict.fromkeys(parse_quote_symbols(request.symbols)))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not symbols:
+        raise HTTPException(status_code=400, detail="En az bir sembol gerekli")
+    if len(symbols) > ANALYZE_BATCH_MAX_SYMBOLS:
+        raise HTTPException(status_code=400,
+                            detail=f"Tek istekte en fazla {ANALYZE_BATCH_MAX_SYMBOLS} sembol analiz edilebilir")
+
+    try:
+        end = datetime.now()
+        history = await execution.run_io('analysis', price_store.get_history_bulk,
+                                         [f"{symbol}.IS" for symbol in symbols],
+                                         start=end - timedelta(days=ANALYSIS_LOOKBACK_DAYS), end=end)
+    except (ExecutionTimeoutError, ExecutionRejectedError):
+        raise
+    except Exception as e:
+        logger.error(f"Toplu analiz için fiyat geçmişi alınamadı: {str(e)}")
+        raise HTTPException(status_code=500, detail="Fiyat geçmişi alınamadı")
+
+    return StreamingResponse(analyze_batch_results(symbols, history), media_type="application/x-ndjson")
+
+@app.get("/api/market/sentiment/{symbol}")
+async def get_stock_sentiment(symbol: str):
+    """
+    Hisse senedinin önbellekteki haber duygu skorunu döndürür
+    """
+    symbol_with_is = f"{symbol.upper()}.IS"
+    if symbol_with_is not in TURKISH_STOCKS:
+        raise HTTPException(status_code=404, detail="Hisse senedi bulunamadı")
+
+    sentiment = sentiment_service.get(symbol_with_is)
+    if sentiment is None:
+        return {"symbol": symbol.upper(), "score": None, "headline_count": 0, "updated_at": None}
+    return {
+        "symbol": symbol.upper(),
+        "score": sentiment["score"],
+        "headline_count": sentiment["headline_count"],
+        "updated_at": datetime.fromtimestamp(sentiment["updated_at"]).isoformat(),
+    }
+
 @app.get("/api/market/predict/{symbol}")
-async def predict_stock_turkish(symbol: str):
+async def predict_stock_turkish(symbol: str,
+                                n_simulations: int = Query(1000, ge=1, le=1_000_000),
+                                n_days: int = Query(30, ge=1, le=365),
+                                method: str = Query("returns"),
+                                seed: Optional[int] = None):
     """
-    Belirli bir hisse senedinin fiyatını öngörür. Mock veri kullanır.
+    Belirli bir hisse senedinin fiyatını Monte Carlo simülasyonu ile öngörür
     """
+    if method not in SIMULATION_METHODS:
+        raise HTTPException(status_code=400, detail="Geçersiz simülasyon yöntemi")
+
     try:
         symbol_with_is = f"{symbol.upper()}.IS"
         if symbol_with_is in TURKISH_STOCKS:
-            data = TURKISH_STOCKS[symbol_with_is]
-            # Basit bir tahmin modeli
-            stock = yf.Ticker(symbol_with_is)
-            hist = stock.history(period="1mo")
+            hist = await execution.run_io('prediction', price_store.get_history, symbol_with_is, period="1mo")
             
             last_price = hist['Close'].iloc[-1]
             avg_return = hist['Close'].pct_change().mean()
             std_return = hist['Close'].pct_change().std()
             
-            # Monte Carlo simulasyonu
-            n_simulations = 1000
-            n_days = 30
-            
-            simulation_df = pd.DataFrame()
-            for x in range(n_simulations):
-                count = 0
-                price_series = []
-                price = last_price
-                
-                for y in range(n_days):
-                    price = price * (1 + np.random.normal(avg_return, std_return))
-                    price_series.append(price)
-                    count += 1
-                    
-                simulation_df[x] = price_series
+            # Monte Carlo simulasyonu (süreç havuzunda)
+            simulation = await execution.run_cpu(
+                'prediction',
+                monte_carlo.run,
+                last_price, avg_return, std_return,
+                n_paths=n_simulations,
+                n_days=n_days,
+                method=method,
+                seed=seed,
+                quantiles=(0.05, 0.95)
+            )
             
             prediction = {
                 "current_price": last_price,
-                "predicted_mean": simulation_df.iloc[-1].mean(),
-                "predicted_high": simulation_df.iloc[-1].quantile(0.95),
-                "predicted_low": simulation_df.iloc[-1].quantile(0.05),
+                "predicted_mean": simulation["mean"],
+                "predicted_high": simulation["quantiles"][0.95],
+                "predicted_low": simulation["quantiles"][0.05],
                 "confidence": 0.7,
+                "n_simulations": n_simulations,
+                "n_days": n_days,
             }
             
             return prediction
         raise HTTPException(status_code=404, detail="Hisse senedi bulunamadı")
+    except (HTTPException, ExecutionTimeoutError, ExecutionRejectedError):
+        raise
     except Exception as e:
         logger.error(f"Hisse senedi öngörüsü yapılırken hata: {symbol} - {str(e)}")
         raise HTTPException(status_code=500, detail="Hisse senedi öngörüsü yapılamadı")
 
+def to_bist_symbol(symbol: str) -> str:
+    symbol = symbol.strip().upper()
+    return symbol if symbol.endswith('.IS') else f"{symbol}.IS"
+
+def load_optimization_inputs(symbols: List[str], with_sectors: bool):
+    """
+    Son bir yılın kapanışlarından getiri tablosunu ve istenirse sembol -> sektör eşlemesini hazırlar
+    """
+    closes = price_store.get_price_panel(symbols, period="1y")
+    returns, excluded = returns_from_prices(closes)
+    sectors = {}
+    if with_sectors:
+        unknown = [s for s in returns.columns if 'sector' not in TURKISH_STOCKS.get(s, {})]
+        infos = price_store.get_info_bulk(unknown) if unknown else {}
+        for symbol in returns.columns:
+            sector = TURKISH_STOCKS.get(symbol, {}).get('sector') or infos.get(symbol, {}).get('sector')
+            if sector:
+                sectors[symbol] = sector
+    return returns, excluded, sectors
+
 @app.post("/api/portfolio/optimize")
 async def optimize_portfolio(request: PortfolioOptimizationRequest):
     """
-    Portföy optimizasyonu yapar.
+    Portföy optimizasyonu yapar. Son bir yılın günlük getirilerinden ortalama-varyans
+    problemini karesel program olarak çözer.
+
+    Desteklenen kısıtlar: min_weight, max_weight, max_sector_weight,
+    groups ({ad: {"symbols": [...], "min": x, "max": y}}), current_weights ile
+    max_turnover ve Ledoit-Wolf daraltması için shrink.
     """
+    if request.risk_profile not in RISK_AVERSION:
+        raise HTTPException(status_code=400, detail="Geçersiz risk profili")
+
+    symbols = list(dict.fromkeys(to_bist_symbol(s) for s in request.symbols))
+    if not symbols:
+        raise HTTPException(status_code=400, detail="En az bir hisse senedi gerekli")
+    constraints = request.constraints or {}
+
     try:
-        # Hisse senetleri verilerini al
-        stock_data = {}
-        for symbol in request.symbols:
-            symbol_with_is = f"{symbol.upper()}.IS"
-            if symbol_with_is in TURKISH_STOCKS:
-                data = TURKISH_STOCKS[symbol_with_is]
-                stock_data[symbol] = pd.DataFrame({
-                    'price': [data['price']],
-                    'change': [data['change']],
-                    'volume': [data['volume']]
-                })
-        
-        # Portföy optimizasyonu yap
+        max_sector_weight = constraints.get('max_sector_weight')
+        returns, excluded, sectors = await execution.run_io(
+            'optimization', load_optimization_inputs, symbols, max_sector_weight is not None
+        )
+        if returns.empty or len(returns.columns) == 0:
+            raise HTTPException(status_code=404, detail="Optimizasyon için yeterli fiyat verisi bulunamadı")
+
+        groups = {
+            name: {**group, 'symbols': [to_bist_symbol(s) for s in group.get('symbols', [])]}
+            for name, group in (constraints.get('groups') or {}).items()
+        }
+        if max_sector_weight is not None:
+            groups.update(sector_groups(sectors, max_weight=float(max_sector_weight)))
+
+        current_weights = constraints.get('current_weights')
+        if current_weights is not None:
+            current_weights = {to_bist_symbol(s): float(w) for s, w in current_weights.items()}
+
+        # Çözüm süreç havuzunda çalışır
+        result = await execution.run_cpu(
+            'optimization',
+            optimize_portfolio_qp,
+            returns,
+            risk_profile=request.risk_profile,
+            min_weight=float(constraints.get('min_weight', 0.0)),
+            max_weight=float(constraints.get('max_weight', 1.0)),
+            groups=groups or None,
+            current_weights=current_weights,
+            max_turnover=constraints.get('max_turnover'),
+            shrink=bool(constraints.get('shrink', False))
+        )
+
         optimization_result = {
-            "optimized_portfolio": stock_data,
+            "optimized_portfolio": {
+                symbol.replace('.IS', ''): weight for symbol, weight in result['weights'].items()
+            },
+            "expected_return": result['expected_return'],
+            "volatility": result['volatility'],
+            "sharpe_ratio": result['sharpe_ratio'],
+            "turnover": result['turnover'],
+            "solver_status": result['status'],
+            "excluded_symbols": [symbol.replace('.IS', '') for symbol in excluded],
             "risk_profile": request.risk_profile,
             "constraints": request.constraints
         }
-        
+
         return {
             "success": True,
             "data": optimization_result
         }
+    except (HTTPException, ExecutionTimeoutError, ExecutionRejectedError):
+        raise
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Portföy optimizasyonu yapılırken hata: {str(e)}")
         raise HTTPException(status_code=500, detail="Portföy optimizasyonu yapılamadı")
 
+@app.get("/api/risk/var/{symbol}")
+async def get_value_at_risk(symbol: str,
+                            levels: str = Query(",".join(str(level) for level in VAR_CONFIDENCE_LEVELS)),
+                            method: str = Query("historical"),
+                            period: str = Query("1y")):
+    """
+    Hisse senedinin günlük getirileri için birden çok güven düzeyinde VaR ve CVaR hesaplar
+    """
+    if method not in VAR_METHODS:
+        raise HTTPException(status_code=400, detail="Geçersiz VaR yöntemi")
+    try:
+        confidence_levels = parse_confidence_levels(levels)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    symbol_with_is = to_bist_symbol(symbol)
+    if symbol_with_is not in TURKISH_STOCKS:
+        raise HTTPException(status_code=404, detail="Hisse senedi bulunamadı")
+
+    try:
+        hist = await execution.run_io('risk', price_store.get_history, symbol_with_is, period=period)
+        returns = hist['Close'].pct_change().dropna().to_numpy()
+        metrics = await execution.run_cpu('risk', value_at_risk, returns, confidence_levels, method)
+        return {
+            "symbol": symbol_with_is.replace('.IS', ''),
+            "method": method,
+            "n_observations": len(returns),
+            "confidence_levels": list(confidence_levels),
+            "metrics": metrics,
+        }
+    except (HTTPException, ExecutionTimeoutError, ExecutionRejectedError):
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"VaR hesaplanırken hata: {symbol} - {str(e)}")
+        raise HTTPException(status_code=500, detail="VaR hesaplanamadı")
+
+def load_var_inputs(symbols: List[str]):
+    """
+    Son bir yılın kapanışlarından log getiri tablosunu ve son fiyatları hazırlar
+    """
+    closes = price_store.get_price_panel(symbols, period="1y")
+    if closes.empty:
+        raise ValueError("Fiyat verisi bulunamadı")
+    returns, excluded = returns_from_prices(closes)
+    prices = closes.ffill().iloc[-1].dropna().to_dict()
+    return returns, excluded, prices
+
+@app.post("/api/risk/var/monte-carlo")
+async def calculate_monte_carlo_var(request: MonteCarloVaRRequest):
+    """
+    Portföy pozisyonları için korelasyonlu Monte Carlo simülasyonuyla VaR ve ES hesaplar.
+    Pozisyon verilmezse kullanıcının portföyündeki adetler kullanılır.
+    """
+    if not 0 < request.n_paths <= MC_VAR_MAX_PATHS:
+        raise HTTPException(status_code=400, detail=f"Yol sayısı 1 ile {MC_VAR_MAX_PATHS} arasında olmalı")
+    if not 1 <= request.horizon_days <= 252:
+        raise HTTPException(status_code=400, detail="Ufuk 1 ile 252 gün arasında olmalı")
+    try:
+        levels = parse_confidence_levels(request.confidence_levels or VAR_CONFIDENCE_LEVELS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if request.holdings is not None:
+        holdings = {to_bist_symbol(symbol): quantity for symbol, quantity in request.holdings.items()}
+    else:
+        # TODO: Gerçek kullanıcı ID'sini auth'dan al
+        user_id = 1
+        portfolio = await execution.run_io('portfolio', portfolio_aggregates.get, user_id)
+        if portfolio is None:
+            raise HTTPException(status_code=404, detail="Portföy bulunamadı")
+        with portfolio.lock:
+            holdings = {to_bist_symbol(symbol): position.quantity
+                        for symbol, position in portfolio.positions.items()}
+    if not any(holdings.values()):
+        raise HTTPException(status_code=400, detail="Portföyde pozisyon yok")
+
+    try:
+        returns, excluded, prices = await execution.run_io('risk', load_var_inputs, list(holdings))
+        if excluded:
+            raise HTTPException(status_code=400,
+                                detail=f"Yeterli fiyat geçmişi olmayan semboller: {', '.join(excluded)}")
+        # Parçalar 'monte_carlo' sınıfının limitiyle süreç havuzunda çalışır; thread
+        # yalnızca onları dağıtıp bekler
+        result = await execution.run_io('risk', monte_carlo_var.value_at_risk,
+                                        returns, holdings, prices, levels,
+                                        n_paths=request.n_paths,
+                                        horizon=request.horizon_days,
+                                        seed=request.seed,
+                                        executor=execution.cpu_executor('monte_carlo'))
+        return {"success": True, "data": result}
+    except (HTTPException, ExecutionTimeoutError, ExecutionRejectedError):
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Monte Carlo VaR hesaplanırken hata: {str(e)}")
+        raise HTTPException(status_code=500, detail="Monte Carlo VaR hesaplanamadı")
+
+@app.post("/api/risk/analyze/batch")
+async def analyze_risk_batch(request: Request,
+                             format: str = Query("json"),
+                             confidence_level: float = Query(0.95, gt=0, lt=1),
+                             risk_free_rate: float = Query(0.02)):
+    """
+    Çok sayıda portföyün risk metriklerini tek çağrıda hesaplar.
+
+    Gövde np.savez ile üretilmiş bir npz dosyasıdır: 'prices' (N portföy x T gün)
+    zorunlu; 'market_returns' (T - 1) ya da 'market_prices' (T) ve 'ids' (N)
+    isteğe bağlıdır. format=npz ise sonuç da npz olarak döner.
+    """
+    if format not in ("json", "npz"):
+        raise HTTPException(status_code=400, detail="Geçersiz çıktı biçimi")
+    if int(request.headers.get("content-length") or 0) > RISK_BATCH_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="İstek gövdesi çok büyük")
+
+    payload = await request.body()
+    if not payload:
+        raise HTTPException(status_code=400, detail="İstek gövdesi boş")
+    if len(payload) > RISK_BATCH_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="İstek gövdesi çok büyük")
+
+    try:
+        # Çözme ve hesaplama süreç havuzunda yapılır
+        result = await execution.run_cpu('risk', analyze_batch_payload, payload,
+                                          confidence_level, risk_free_rate)
+    except (ExecutionTimeoutError, ExecutionRejectedError):
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Toplu risk analizi yapılırken hata: {str(e)}")
+        raise HTTPException(status_code=500, detail="Toplu risk analizi yapılamadı")
+
+    if format == "npz":
+        return Response(content=encode_batch_result(result), media_type="application/x-npz")
+
+    ids = result.pop('ids', None)
+    return {
+        "n_portfolios": len(result['volatility']),
+        "confidence_level": confidence_level,
+        "ids": ids.tolist() if ids is not None else None,
+        # NaN/inf JSON'da geçersiz olduğundan null döner
+        "metrics": {
+            name: [float(v) if np.isfinite(v) else None for v in values]
+            for name, values in result.items()
+        }
+    }
+
+def current_price(symbol: str) -> float:
+    return stock_quote(symbol)[1] or 0.0
+
 @app.get("/api/portfolio", response_model=Portfolio)
 async def get_portfolio():
     """
@@ -416,9 +945,12 @@ async def get_portfolio():
     try:
         # TODO: Gerçek kullanıcı ID'sini auth'dan al
         user_id = 1
-        if user_id in MOCK_PORTFOLIO:
-            return MOCK_PORTFOLIO[user_id]
-        raise HTTPException(status_code=404, detail="Portföy bulunamadı")
+        portfolio = await execution.run_io('portfolio', portfolio_aggregates.get, user_id)
+        if portfolio is None:
+            raise HTTPException(status_code=404, detail="Portföy bulunamadı")
+        return portfolio.to_dict()
+    except (HTTPException, ExecutionTimeoutError, ExecutionRejectedError):
+        raise
     except Exception as e:
         logger.error(f"Portföy bilgisi alınırken hata: {str(e)}")
         raise HTTPException(status_code=500, detail="Portföy bilgisi alınamadı")
@@ -426,65 +958,27 @@ async def get_portfolio():
 @app.post("/api/portfolio/add")
 async def add_to_portfolio(request: AddToPortfolioRequest):
     """
-    Portföye yeni hisse senedi ekler
+    Portföye yeni hisse senedi ekler; hisse zaten varsa adet artar ve ortalama
+    fiyat ağırlıklı olarak güncellenir
     """
     try:
         # TODO: Gerçek kullanıcı ID'sini auth'dan al
         user_id = 1
-        
-        if user_id not in MOCK_PORTFOLIO:
-            raise HTTPException(status_code=404, detail="Portföy bulunamadı")
-            
-        portfolio = MOCK_PORTFOLIO[user_id]
-        
-        # Hisse senedini bul
+
         symbol_with_is = f"{request.symbol.upper()}.IS"
         if symbol_with_is not in TURKISH_STOCKS:
             raise HTTPException(status_code=404, detail="Hisse senedi bulunamadı")
-            
-        stock_data = TURKISH_STOCKS[symbol_with_is]
-        
-        # Portföyde var mı kontrol et
-        existing_stock = next(
-            (s for s in portfolio["stocks"] if s["symbol"] == request.symbol),
-            None
-        )
-        
-        if existing_stock:
-            # Mevcut hisseyi güncelle
-            total_quantity = existing_stock["quantity"] + request.quantity
-            total_value = total_quantity * request.price
-            existing_stock.update({
-                "quantity": total_quantity,
-                "averagePrice": (existing_stock["averagePrice"] * existing_stock["quantity"] + 
-                               request.price * request.quantity) / total_quantity,
-                "currentPrice": stock_data["price"],
-                "totalValue": total_value,
-                "profit": total_value - (total_quantity * existing_stock["averagePrice"]),
-                "profitPercentage": ((stock_data["price"] / existing_stock["averagePrice"]) - 1) * 100
-            })
-        else:
-            # Yeni hisse ekle
-            total_value = request.quantity * request.price
-            portfolio["stocks"].append({
-                "symbol": request.symbol,
-                "name": stock_data["name"],
-                "quantity": request.quantity,
-                "averagePrice": request.price,
-                "currentPrice": stock_data["price"],
-                "totalValue": total_value,
-                "profit": total_value - (request.quantity * request.price),
-                "profitPercentage": ((stock_data["price"] / request.price) - 1) * 100
-            })
-            
-        # Portföy değerlerini güncelle
-        portfolio["totalValue"] = sum(s["totalValue"] for s in portfolio["stocks"])
-        portfolio["dailyChange"] = sum(s["profitPercentage"] for s in portfolio["stocks"]) / len(portfolio["stocks"])
-        portfolio["lastUpdated"] = datetime.now().isoformat()
-        
-        return {"success": True, "portfolio": portfolio}
-    except HTTPException:
+
+        portfolio = await execution.run_io('portfolio', portfolio_aggregates.update,
+                                           portfolio_repository.add_holdings, user_id,
+                                           [(request.symbol, request.quantity, request.price)])
+        return {"success": True, "portfolio": portfolio.to_dict()}
+    except (HTTPException, ExecutionTimeoutError, ExecutionRejectedError):
         raise
+    except PortfolioNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Portföye ekleme yapılırken hata: {str(e)}")
         raise HTTPException(status_code=500, detail="Portföye ekleme yapılamadı")
@@ -497,26 +991,14 @@ async def remove_from_portfolio(symbol: str):
     try:
         # TODO: Gerçek kullanıcı ID'sini auth'dan al
         user_id = 1
-        
-        if user_id not in MOCK_PORTFOLIO:
-            raise HTTPException(status_code=404, detail="Portföy bulunamadı")
-            
-        portfolio = MOCK_PORTFOLIO[user_id]
-        
-        # Hisseyi bul ve çıkar
-        portfolio["stocks"] = [s for s in portfolio["stocks"] if s["symbol"] != symbol]
-        
-        # Portföy değerlerini güncelle
-        if portfolio["stocks"]:
-            portfolio["totalValue"] = sum(s["totalValue"] for s in portfolio["stocks"])
-            portfolio["dailyChange"] = sum(s["profitPercentage"] for s in portfolio["stocks"]) / len(portfolio["stocks"])
-        else:
-            portfolio["totalValue"] = 0
-            portfolio["dailyChange"] = 0
-            
-        portfolio["lastUpdated"] = datetime.now().isoformat()
-        
-        return {"success": True, "portfolio": portfolio}
+        portfolio = await execution.run_io('portfolio', portfolio_aggregates.update,
+                                           portfolio_repository.remove_holding, user_id,
+                                           symbol, current_price(symbol))
+        return {"success": True, "portfolio": portfolio.to_dict()}
+    except (HTTPException, ExecutionTimeoutError, ExecutionRejectedError):
+        raise
+    except PortfolioNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"Portföyden hisse çıkarılırken hata: {str(e)}")
         raise HTTPException(status_code=500, detail="Portföyden hisse çıkarılamadı")
@@ -529,35 +1011,95 @@ async def update_quantity(symbol: str, quantity: int):
     try:
         # TODO: Gerçek kullanıcı ID'sini auth'dan al
         user_id = 1
-        
-        if user_id not in MOCK_PORTFOLIO:
-            raise HTTPException(status_code=404, detail="Portföy bulunamadı")
-            
-        portfolio = MOCK_PORTFOLIO[user_id]
-        
-        # Hisseyi bul
-        stock = next((s for s in portfolio["stocks"] if s["symbol"] == symbol), None)
-        if not stock:
-            raise HTTPException(status_code=404, detail="Hisse senedi bulunamadı")
-            
-        # Miktarı güncelle
-        stock["quantity"] = quantity
-        stock["totalValue"] = quantity * stock["currentPrice"]
-        stock["profit"] = stock["totalValue"] - (quantity * stock["averagePrice"])
-        stock["profitPercentage"] = ((stock["currentPrice"] / stock["averagePrice"]) - 1) * 100
-        
-        # Portföy değerlerini güncelle
-        portfolio["totalValue"] = sum(s["totalValue"] for s in portfolio["stocks"])
-        portfolio["dailyChange"] = sum(s["profitPercentage"] for s in portfolio["stocks"]) / len(portfolio["stocks"])
-        portfolio["lastUpdated"] = datetime.now().isoformat()
-        
-        return {"success": True, "portfolio": portfolio}
-    except HTTPException:
+        portfolio = await execution.run_io('portfolio', portfolio_aggregates.update,
+                                           portfolio_repository.set_quantity, user_id,
+                                           symbol, quantity, current_price(symbol))
+        return {"success": True, "portfolio": portfolio.to_dict()}
+    except (HTTPException, ExecutionTimeoutError, ExecutionRejectedError):
         raise
+    except PortfolioNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Hisse miktarı güncellenirken hata: {str(e)}")
         raise HTTPException(status_code=500, detail="Hisse miktarı güncellenemedi")
 
+def import_portfolio_file(user_id: int, spool, file_format: str, include_lots: bool):
+    """
+    Geçici dosyanın sahibi bu iştir ve iş bitince dosyayı kapatır: istek zaman aşımına
+    uğrasa da iş arka planda sürer ve dosyayı okumaya devam eder
+    """
+    with spool:
+        change, summary = import_trades(portfolio_repository, user_id, spool, file_format,
+                                        include_lots=include_lots)
+    portfolio = portfolio_aggregates.apply(change)
+    return summary, portfolio
+
+@app.post("/api/portfolio/import")
+async def import_portfolio_trades(request: Request,
+                                  format: Optional[str] = Query(None),
+                                  include_lots: bool = True):
+    """
+    CSV ya da NDJSON işlem dökümünü (symbol, side, quantity, price, date) portföye
+    aktarır. Gövde akış halinde geçici dosyaya alınır, satırlar gruplar halinde
+    doğrulanır; pozisyonlar, ortalama fiyatlar ve FIFO lotları tek geçişte yeniden
+    kurulur ve işlemler toplu olarak yazılır. Geçersiz satır varsa hiçbir şey yazılmaz.
+    Zaman aşımında iş durdurulamaz; 504 yanıtı işlemlerin yine de kaydedilmiş
+    olabileceğini belirtir.
+    """
+    content_type = request.headers.get("content-type", "")
+    file_format = format or ("ndjson" if "ndjson" in content_type or "jsonl" in content_type else "csv")
+    if file_format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Geçersiz dosya biçimi")
+    if int(request.headers.get("content-length") or 0) > PORTFOLIO_IMPORT_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="İstek gövdesi çok büyük")
+
+    # TODO: Gerçek kullanıcı ID'sini auth'dan al
+    user_id = 1
+    spool = tempfile.TemporaryFile()
+    try:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > PORTFOLIO_IMPORT_MAX_BYTES:
+                raise HTTPException(status_code=413, detail="İstek gövdesi çok büyük")
+            spool.write(chunk)
+        if not size:
+            raise HTTPException(status_code=400, detail="İstek gövdesi boş")
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+
+    # Dosya bundan sonra import_portfolio_file tarafından kapatılır
+    try:
+        summary, portfolio = await execution.run_io('import', import_portfolio_file, user_id,
+                                                    spool, file_format, include_lots)
+    except ExecutionRejectedError:
+        # İş hiç başlamadı
+        spool.close()
+        raise
+    except ExecutionTimeoutError as e:
+        logger.error(f"İşlem içe aktarma zaman aşımına uğradı, iş arka planda sürüyor: {str(e)}")
+        raise HTTPException(status_code=504, detail={
+            "message": "İçe aktarma zaman aşımına uğradı; işlemler yine de kaydedilmiş olabilir",
+            "may_have_committed": True,
+        })
+    except HTTPException:
+        raise
+    except PortfolioNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except TradeImportError as e:
+        raise HTTPException(status_code=400, detail={"message": "Geçersiz satırlar var", "errors": e.errors})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"İşlemler içe aktarılırken hata: {str(e)}")
+        raise HTTPException(status_code=500, detail="İşlemler içe aktarılamadı")
+
+    return {"success": True, "data": summary, "portfolio": portfolio.to_dict() if portfolio else None}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=PYTHON_API_PORT)
\ No newline at end of file
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from utils.lazy_import import lazy_import
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking
+    fcntl = None
+
+if TYPE_CHECKING:
+    from tensorflow.keras.models import Sequential
+
+# Heavy dependencies are loaded on first use
+pd = lazy_import('pandas')
+joblib = lazy_import('joblib')
+sklearn_preprocessing = lazy_import('sklearn.preprocessing')
+keras_models = lazy_import('tensorflow.keras.models')
+
+MODEL_REGISTRY_DIR = os.getenv(
+    'MODEL_REGISTRY_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'models')
+)
+MODEL_REGISTRY_SIZE = int(os.getenv('MODEL_REGISTRY_SIZE', '8'))
+
+
+class ModelRegistry:
+    def __init__(self,
+                 build_fn: Callable[[], Sequential],
+                 prepare_fn: Callable[[np.ndarray], Tuple[np.ndarray, np.ndarray]],
+                 root_dir: str = MODEL_REGISTRY_DIR,
+                 max_models: int = MODEL_REGISTRY_SIZE,
+                 sequence_length: int = 60,
+                 epochs: int = 50,
+                 fine_tune_epochs: int = 5,
+                 batch_size: int = 32,
+                 max_scale_drift: float = 0.25):
+        """
+        Per-symbol store of trained LSTM models and their fitted scalers
+
+        Models live on disk under root_dir/<symbol>/ and are loaded on demand
+        into a size-bounded LRU. Every save goes to a new version directory and
+        is published by atomically replacing meta.json, so a reader never sees a
+        half-written model or a scaler from another training run. Process-pool
+        workers share the directory; a per-symbol file lock serializes their
+        training, and an in-memory model is reused only while its version is
+        still the one on disk. When new bars arrive the model is fine-tuned on
+        the new windows only; it is retrained from scratch if prices drift too
+        far outside the range the scaler was fitted on.
+
+        Args:
+            build_fn: Returns a freshly compiled, untrained model
+            prepare_fn: Turns a scaled 1-D price array into (X, y) training windows
+            root_dir: Directory holding one subdirectory per symbol
+            max_models: Maximum number of models kept in memory
+            sequence_length: Input window length of the model
+            epochs: Epochs for a full training run
+            fine_tune_epochs: Epochs for an incremental update
+            batch_size: Training batch size
+            max_scale_drift: Allowed distance of scaled prices outside [0, 1]
+                before a full retrain is triggered
+        """
+        self.build_fn = build_fn
+        self.prepare_fn = prepare_fn
+        self.root_dir = root_dir
+        self.max_models = max_models
+        self.sequence_length = sequence_length
+        self.epochs = epochs
+        self.fine_tune_epochs = fine_tune_epochs
+        self.batch_size = batch_size
+        self.max_scale_drift = max_scale_drift
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._entries_lock = threading.Lock()
+        self._symbol_locks: Dict[str, threading.Lock] = {}
+
+    def forecast_next(self, symbol: str, closes: pd.Series) -> float:
+        """
+        Forecast the next close with one forward pass, training or updating first if needed
+
+        Args:
+            symbol: Stock symbol
+            closes: Daily closing prices indexed by date
+
+        Returns:
+            Forecast of the next closing price
+        """
+        with self._symbol_lock(symbol), self._file_lock(symbol):
+            entry = self._get_or_update(symbol, closes)
+            window = entry['scaler'].transform(
+                closes.values[-self.sequence_length:].reshape(-1, 1)
+            ).reshape(1, self.sequence_length, 1)
+            prediction = entry['model'](window, training=False).numpy()
+            return float(entry['scaler'].inverse_transform(prediction)[0][0])
+
+    def _get_or_update(self, symbol: str, closes: pd.Series) -> Dict:
+        """Return the symbol's entry, trained on all bars in closes"""
+        entry = self._lookup(symbol)
+        last_date = closes.index[-1].isoformat()
+
+        if entry is None:
+            entry = self._train(symbol, closes)
+        elif last_date > entry['last_date']:
+            new_bars = closes[closes.index > pd.Timestamp(entry['last_date'])]
+            scaled = entry['scaler'].transform(new_bars.values.reshape(-1, 1))
+            if scaled.min() < -self.max_scale_drift or scaled.max() > 1 + self.max_scale_drift:
+                entry = self._train(symbol, closes)
+            else:
+                entry = self._fine_tune(symbol, entry, closes, len(new_bars))
+
+        return entry
+
+    def _train(self, symbol: str, closes: pd.Series) -> Dict:
+        """Fit a new scaler and train a new model on the full history"""
+        scaler = sklearn_preprocessing.MinMaxScaler()
+        scaled = scaler.fit_transform(closes.values.reshape(-1, 1))[:, 0]
+        model = self.build_fn()
+
+        X, y = self.prepare_fn(scaled)
+        if len(X) > 0:
+            model.fit(X.reshape(-1, self.sequence_length, 1), y,
+                      epochs=self.epochs, batch_size=self.batch_size, verbose=0)
+
+        entry = {'model': model, 'scaler': scaler, 'last_date': closes.index[-1].isoformat()}
+        self._save(symbol, entry)
+        return entry
+
+    def _fine_tune(self, symbol: str, entry: Dict, closes: pd.Series, n_new: int) -> Dict:
+        """Continue training on the windows whose targets are the new bars"""
+        tail = closes.values[-(n_new + self.sequence_length):]
+        scaled = entry['scaler'].transform(tail.reshape(-1, 1))[:, 0]
+
+        X, y = self.prepare_fn(scaled)
+        if len(X) > 0:
+            entry['model'].fit(X.reshape(-1, self.sequence_length, 1), y,
+                               epochs=self.fine_tune_epochs, batch_size=self.batch_size, verbose=0)
+
+        entry['last_date'] = closes.index[-1].isoformat()
+        self._save(symbol, entry)
+        return entry
+
+    def _lookup(self, symbol: str) -> Optional[Dict]:
+        """Return the current entry from memory or disk and mark it most recently used"""
+        directory = self._symbol_dir(symbol)
+        try:
+            with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = None
+
+        with self._entries_lock:
+            entry = self._entries.get(symbol)
+            # Another process may have saved a newer version since this one was loaded
+            if entry is not None and (meta is None or entry['version'] == meta.get('version')):
+                self._entries.move_to_end(symbol)
+                return entry
+        if meta is None:
+            return None
+
+        try:
+            version_dir = os.path.join(directory, meta['version'])
+            entry = {
+                'model': keras_models.load_model(os.path.join(version_dir, 'model.keras')),
+                'scaler': joblib.load(os.path.join(version_dir, 'scaler.joblib')),
+                'last_date': meta['last_date'],
+                'version': meta['version'],
+            }
+        except (OSError, ValueError, KeyError):
+            return None
+
+        self._remember(symbol, entry)
+        return entry
+
+    def _save(self, symbol: str, entry: Dict):
+        """Persist the entry as a new version and keep it in the in-memory LRU"""
+        directory = self._symbol_dir(symbol)
+        version = f"{time.time_ns()}-{os.getpid()}"
+        version_dir = os.path.join(directory, version)
+        os.makedirs(version_dir)
+        entry['model'].save(os.path.join(version_dir, 'model.keras'))
+        joblib.dump(entry['scaler'], os.path.join(version_dir, 'scaler.joblib'))
+
+        # The new version becomes visible only once meta.json points to it
+        tmp_path = os.path.join(directory, f"meta.json.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'last_date': entry['last_date'], 'version': version}, f)
+        os.replace(tmp_path, os.path.join(directory, 'meta.json'))
+        entry['version'] = version
+        self._remember(symbol, entry)
+        self._remove_old_versions(directory, version)
+
+    @staticmethod
+    def _remove_old_versions(directory: str, current: str):
+        """Delete version directories other than the current one (and legacy unversioned files)"""
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name == current or name in ('meta.json', '.lock') or name.endswith('.tmp'):
+                continue
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif name in ('model.keras', 'scaler.joblib'):
+                os.remove(path)
+
+    def _remember(self, symbol: str, entry: Dict):
+        with self._entries_lock:
+            self._entries[symbol] = entry
+            self._entries.move_to_end(symbol)
+            while len(self._entries) > self.max_models:
+                self._entries.popitem(last=False)
+
+    def _symbol_dir(self, symbol: str) -> str:
+        return os.path.join(self.root_dir, symbol.upper().replace('/', '_'))
+
+    @contextmanager
+    def _file_lock(self, symbol: str) -> Iterator[None]:
+        """Hold an exclusive lock on the symbol's directory across processes"""
+        directory = self._symbol_dir(symbol)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, '.lock'), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _symbol_lock(self, symbol: str) -> threading.Lock:
+        with self._entries_lock:
+            lock = self._symbol_locks.get(symbol)
+            if lock is None:
+                lock = self._symbol_locks[symbol] = threading.Lock()
+            return lock
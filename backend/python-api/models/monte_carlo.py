@@ -0,0 +1,111 @@
+import numpy as np
+from typing import Dict, Optional, Sequence
+
+SIMULATION_METHODS = ("returns", "gbm")
+
+
+class MonteCarloSimulator:
+    def __init__(self, chunk_size: int = 10000):
+        """
+        Args:
+            chunk_size: Number of paths generated per NumPy pass; bounds peak memory
+                to chunk_size x n_days floats regardless of the total path count
+        """
+        self.chunk_size = chunk_size
+
+    def simulate_terminal_prices(self,
+                                 last_price: float,
+                                 mean_return: float,
+                                 std_return: float,
+                                 n_paths: int = 1000,
+                                 n_days: int = 30,
+                                 method: str = "returns",
+                                 seed: Optional[int] = None) -> np.ndarray:
+        """
+        Simulate price paths and return the price of every path at the horizon
+
+        Args:
+            last_price: Starting price
+            mean_return: Mean daily return
+            std_return: Standard deviation of daily returns
+            n_paths: Number of simulated paths
+            n_days: Simulation horizon in trading days
+            method: "returns" compounds normally distributed simple returns,
+                "gbm" uses geometric Brownian motion with the same drift and volatility
+            seed: Optional seed for reproducible simulations
+
+        Returns:
+            Array of n_paths terminal prices
+        """
+        if method not in SIMULATION_METHODS:
+            raise ValueError(f"Unknown simulation method: {method}")
+
+        rng = np.random.default_rng(seed)
+        terminal = np.empty(n_paths, dtype=np.float64)
+
+        for start in range(0, n_paths, self.chunk_size):
+            stop = min(start + self.chunk_size, n_paths)
+            shocks = rng.normal(mean_return, std_return, size=(stop - start, n_days))
+
+            if method == "returns":
+                # Compounded product of (1 + r) over the horizon
+                shocks += 1.0
+                terminal[start:stop] = last_price * shocks.prod(axis=1)
+            else:
+                # Log returns with Ito drift correction
+                drift = -0.5 * std_return ** 2 * n_days
+                terminal[start:stop] = last_price * np.exp(shocks.sum(axis=1) + drift)
+
+        return terminal
+
+    def summarize(self,
+                  terminal_prices: np.ndarray,
+                  quantiles: Sequence[float] = (0.05, 0.95)) -> Dict:
+        """
+        Compute mean and quantiles of simulated terminal prices
+
+        Quantiles use a single partial partition instead of a full sort and
+        match pandas' linear interpolation.
+
+        Args:
+            terminal_prices: Simulated prices at the horizon
+            quantiles: Quantile levels between 0 and 1
+
+        Returns:
+            Dictionary with "mean" and "quantiles" mapping each level to its value
+        """
+        values = np.asarray(terminal_prices, dtype=np.float64)
+        n = len(values)
+
+        positions = np.asarray(quantiles, dtype=np.float64) * (n - 1)
+        lower = np.floor(positions).astype(np.int64)
+        upper = np.minimum(lower + 1, n - 1)
+        kth = np.unique(np.concatenate([lower, upper]))
+
+        partitioned = np.partition(values, kth)
+        fraction = positions - lower
+        levels = partitioned[lower] + (partitioned[upper] - partitioned[lower]) * fraction
+
+        return {
+            "mean": float(values.mean()),
+            "quantiles": {q: float(level) for q, level in zip(quantiles, levels)}
+        }
+
+    def run(self,
+            last_price: float,
+            mean_return: float,
+            std_return: float,
+            n_paths: int = 1000,
+            n_days: int = 30,
+            method: str = "returns",
+            seed: Optional[int] = None,
+            quantiles: Sequence[float] = (0.05, 0.95)) -> Dict:
+        """
+        Simulate and summarize in one call
+
+        Returns:
+            Dictionary with "mean" and "quantiles" mapping each level to its value
+        """
+        terminal = self.simulate_terminal_prices(last_price, mean_return, std_return,
+                                                 n_paths, n_days, method, seed)
+        return self.summarize(terminal, quantiles)
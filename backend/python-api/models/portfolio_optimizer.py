@@ -3,6 +3,8 @@ import pandas as pd
 from sklearn.preprocessing import StandardScaler
 from typing import List, Dict, Tuple
 
+from services.covariance_service import get_covariance_service
+
 class PortfolioOptimizer:
     def __init__(self):
         self.scaler = StandardScaler()
@@ -19,8 +21,10 @@ class PortfolioOptimizer:
             
             # Risk ve getiri hesaplamaları
             returns = self._calculate_returns(symbols)
-            portfolio_return = np.sum(returns.mean() * weights) * 252
-            portfolio_risk = np.sqrt(np.dot(weights.T, np.dot(returns.cov() * 252, weights)))
+            mean, cov = get_covariance_service().moments(returns, annualize=252,
+                                                         namespace='portfolio_metrics')
+            portfolio_return = np.sum(mean * weights)
+            portfolio_risk = np.sqrt(np.dot(weights.T, np.dot(cov, weights)))
             
             # Çeşitlendirme skoru
             diversification_score = self._calculate_diversification_score(holdings)
@@ -1,10 +1,21 @@
 import numpy as np
 from sklearn.preprocessing import StandardScaler
-from typing import List, Dict, Union
+from typing import List, Dict, Optional, Union
+
+from services.covariance_service import get_covariance_service
+from services.efficient_frontier import FrontierCache, get_frontier_cache
+
+# Annual volatility targets per risk level
+RISK_TARGETS = {
+    "low": 0.12,
+    "medium": 0.20,
+    "high": 0.30
+}
 
 class RiskAnalysisModel:
-    def __init__(self):
+    def __init__(self, frontier_cache: Optional[FrontierCache] = None):
         self.scaler = StandardScaler()
+        self.frontier_cache = frontier_cache or get_frontier_cache()
         
     def calculate_portfolio_risk(self, 
                                returns: List[float], 
@@ -19,12 +30,12 @@ class RiskAnalysisModel:
         Returns:
             Dictionary containing risk metrics
         """
-        returns_array = np.array(returns)
         weights_array = np.array(weights)
         
         # Calculate portfolio metrics
-        portfolio_return = np.sum(returns_array.mean() * weights_array) * 252
-        portfolio_std = np.sqrt(np.dot(weights_array.T, np.dot(np.cov(returns_array.T) * 252, weights_array)))
+        mean_returns, cov_matrix = self._annual_moments(returns)
+        portfolio_return = float(mean_returns @ weights_array)
+        portfolio_std = np.sqrt(np.dot(weights_array.T, np.dot(cov_matrix, weights_array)))
         sharpe_ratio = portfolio_return / portfolio_std
         
         # Determine risk level
@@ -56,36 +67,53 @@ class RiskAnalysisModel:
     
     def optimize_portfolio(self, 
                          returns: List[float], 
-                         target_risk: str) -> Dict[str, List[float]]:
+                         target_risk: str,
+                         max_weight: float = 1.0) -> Dict[str, Union[List[float], float, bool]]:
         """
-        Optimize portfolio weights based on target risk level
+        Find the maximum-return long-only portfolio whose volatility matches the
+        target risk level
+        
+        The efficient frontier is computed once per mean/covariance pair and cached,
+        so requests for other risk levels on the same universe only solve a
+        quadratic on the cached frontier segment.
         
         Args:
-            returns: Historical returns
+            returns: Historical daily returns (days x assets)
             target_risk: Desired risk level (low/medium/high)
+            max_weight: Upper bound for each asset weight
             
         Returns:
-            Dictionary containing optimized weights
+            Dictionary containing optimized weights, expected return, volatility
+            and whether the target volatility is reachable
         """
-        risk_targets = {
-            "low": 0.12,
-            "medium": 0.20,
-            "high": 0.30
-        }
-        
-        target_volatility = risk_targets[target_risk]
-        num_assets = len(returns)
-        
-        # Simple optimization using equal weights as starting point
-        initial_weights = np.array([1/num_assets] * num_assets)
+        if target_risk not in RISK_TARGETS:
+            raise ValueError(f"Unknown risk level: {target_risk}")
         
-        # Adjust weights based on target volatility
-        current_risk = self.calculate_portfolio_risk(returns, initial_weights)["annual_volatility"]
-        adjustment_factor = target_volatility / current_risk
-        
-        optimized_weights = initial_weights * adjustment_factor
-        optimized_weights = optimized_weights / np.sum(optimized_weights)  # Normalize weights
+        # The frontier needs an invertible covariance; shrink it when days are scarce
+        mean_returns, cov_matrix = self._annual_moments(returns, shrink=None)
+        frontier = self.frontier_cache.get(mean_returns, cov_matrix, upper=max_weight)
+        result = frontier.target_volatility(RISK_TARGETS[target_risk])
         
         return {
-            "weights": optimized_weights.tolist()
+            "weights": result["weights"].tolist(),
+            "expected_return": result["expected_return"],
+            "volatility": result["volatility"],
+            "target_volatility": result["target_volatility"],
+            "target_reached": result["target_reached"]
         }
+    
+    def _annual_moments(self, returns: List[float], shrink: Optional[bool] = False):
+        """
+        Annualized mean returns and covariance of a days x assets return table
+        
+        The table has no symbol labels, so its moments are computed directly rather
+        than from a cached rolling state. shrink=None applies Ledoit-Wolf shrinkage only when there are fewer
+        than two days per asset.
+        """
+        returns_array = np.array(returns, dtype=np.float64)
+        returns_array = returns_array.reshape(len(returns_array), -1)
+        n_days, n_assets = returns_array.shape
+        return get_covariance_service().moments(returns_array,
+                                                annualize=252,
+                                                shrink=n_days < 2 * n_assets if shrink is None else shrink,
+                                                namespace='risk_analysis')
@@ -1,14 +1,34 @@
+from __future__ import annotations
+
 import numpy as np
-import pandas as pd
-from sklearn.preprocessing import MinMaxScaler
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
-from typing import List, Dict, Union
+from typing import TYPE_CHECKING, List, Dict, Union
+
+from utils.lazy_import import lazy_import
+from utils.windowing import sliding_windows
+
+if TYPE_CHECKING:
+    from tensorflow.keras.models import Sequential
+
+# Heavy dependencies are loaded on first use
+tf = lazy_import('tensorflow')
+keras_models = lazy_import('tensorflow.keras.models')
+keras_layers = lazy_import('tensorflow.keras.layers')
+sklearn_preprocessing = lazy_import('sklearn.preprocessing')
+
+SEQUENCE_LENGTH = 60
 
 class StockPredictionModel:
-    def __init__(self):
-        self.scaler = MinMaxScaler()
+    def __init__(self, horizon: int = 1):
+        """
+        Args:
+            horizon: Number of days predicted by one forward pass. 1 rolls the
+                forecast forward step by step; larger values add a direct
+                multi-horizon output head
+        """
+        self.horizon = horizon
+        self.scaler = sklearn_preprocessing.MinMaxScaler()
         self.model = self._build_model()
+        self._rollout = None
         
     def _build_model(self) -> Sequential:
         """
@@ -17,20 +37,20 @@ class StockPredictionModel:
         Returns:
             Keras Sequential model
         """
-        model = Sequential([
-            LSTM(units=50, return_sequences=True, input_shape=(60, 1)),
-            Dropout(0.2),
-            LSTM(units=50, return_sequences=True),
-            Dropout(0.2),
-            LSTM(units=50),
-            Dropout(0.2),
-            Dense(units=1)
+        model = keras_models.Sequential([
+            keras_layers.LSTM(units=50, return_sequences=True, input_shape=(60, 1)),
+            keras_layers.Dropout(0.2),
+            keras_layers.LSTM(units=50, return_sequences=True),
+            keras_layers.Dropout(0.2),
+            keras_layers.LSTM(units=50),
+            keras_layers.Dropout(0.2),
+            keras_layers.Dense(units=self.horizon)
         ])
         
         model.compile(optimizer='adam', loss='mean_squared_error')
         return model
     
-    def prepare_data(self, prices: List[float], sequence_length: int = 60) -> tuple:
+    def prepare_data(self, prices: List[float], sequence_length: int = SEQUENCE_LENGTH) -> tuple:
         """
         Prepare data for LSTM model
         
@@ -42,17 +62,9 @@ class StockPredictionModel:
             Tuple of prepared X and y data
         """
         scaled_data = self.scaler.fit_transform(np.array(prices).reshape(-1, 1))
-        X, y = [], []
         
-        for i in range(sequence_length, len(scaled_data)):
-            X.append(scaled_data[i-sequence_length:i, 0])
-            y.append(scaled_data[i, 0])
-            
-        X = np.array(X)
-        y = np.array(y)
-        
-        X = np.reshape(X, (X.shape[0], X.shape[1], 1))
-        return X, y
+        # Strided views over one float32 buffer instead of per-window copies
+        return sliding_windows(scaled_data[:, 0], sequence_length, self.horizon)
     
     def train(self, prices: List[float], epochs: int = 50, batch_size: int = 32):
         """
@@ -77,30 +89,69 @@ class StockPredictionModel:
         Returns:
             Dictionary containing predicted prices
         """
-        last_sequence = np.array(prices[-60:])
-        scaled_sequence = self.scaler.transform(last_sequence.reshape(-1, 1))
+        predictions = self.predict_batch([prices], days_ahead)["predictions"][0]
         
-        predictions = []
-        current_sequence = scaled_sequence.copy()
+        return {
+            "predictions": predictions
+        }
+    
+    def predict_batch(self, price_series: List[List[float]], days_ahead: int = 30) -> Dict[str, List[List[float]]]:
+        """
+        Forecast many series with a single inference dispatch
         
-        for _ in range(days_ahead):
-            # Prepare current sequence for prediction
-            X = current_sequence[-60:].reshape(1, 60, 1)
-            
-            # Make prediction
-            predicted_value = self.model.predict(X, verbose=0)[0, 0]
-            predictions.append(predicted_value)
-            
-            # Update sequence for next prediction
-            current_sequence = np.append(current_sequence, predicted_value)
+        With a one-step head the recurrence is rolled inside one compiled
+        tf.function; with a multi-horizon head a single forward pass is used.
+        All series are scaled with the model's fitted scaler.
+        
+        Args:
+            price_series: Historical prices of each series, at least 60 per series
+            days_ahead: Number of days to predict ahead
             
+        Returns:
+            Dictionary containing one list of predicted prices per series
+        """
+        if 1 < self.horizon < days_ahead:
+            raise ValueError(f"days_ahead ({days_ahead}) exceeds the model horizon ({self.horizon})")
+        
+        last_sequences = np.array([series[-SEQUENCE_LENGTH:] for series in price_series], dtype=np.float64)
+        scaled = self.scaler.transform(last_sequences.reshape(-1, 1))
+        X = tf.constant(scaled.reshape(len(price_series), SEQUENCE_LENGTH, 1), dtype=tf.float32)
+        
+        if self.horizon >= days_ahead:
+            predictions = self.model(X, training=False).numpy()[:, :days_ahead]
+        else:
+            if self._rollout is None:
+                self._rollout = self._build_rollout()
+            predictions = self._rollout(X, tf.constant(days_ahead)).numpy()
+        
         # Inverse transform predictions
-        predictions = self.scaler.inverse_transform(np.array(predictions).reshape(-1, 1))
+        predictions = self.scaler.inverse_transform(predictions.reshape(-1, 1)).reshape(len(price_series), days_ahead)
         
         return {
-            "predictions": predictions.flatten().tolist()
+            "predictions": predictions.tolist()
         }
     
+    def _build_rollout(self):
+        """
+        Compile the autoregressive forecast loop into one graph
+        
+        Returns:
+            tf.function mapping (windows, steps) to a (batch, steps) tensor
+        """
+        model = self.model
+        
+        @tf.function(reduce_retracing=True)
+        def rollout(window, steps):
+            outputs = tf.TensorArray(tf.float32, size=steps)
+            for i in tf.range(steps):
+                step = model(window, training=False)
+                outputs = outputs.write(i, step[:, 0])
+                # Slide the window: drop the oldest value, append the prediction
+                window = tf.concat([window[:, 1:, :], step[:, tf.newaxis, :1]], axis=1)
+            return tf.transpose(outputs.stack())
+        
+        return rollout
+    
     def evaluate_prediction(self, actual: List[float], predicted: List[float]) -> Dict[str, float]:
         """
         Evaluate prediction accuracy
@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Hashable, Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+COVARIANCE_CACHE_SIZE = 32
+
+
+class RollingCovariance:
+    """
+    Sabit bir sembol evreni için kayan pencere kovaryansı.
+
+    Pencere içindeki getirilerin toplamları ve çapraz çarpımları tutulur; yeni bir
+    gün eklendiğinde (ve en eski gün çıkarıldığında) güncelleme O(n²) sürer.
+    Ledoit-Wolf daralma katsayısı için gereken dördüncü momentler de aynı şekilde
+    güncellenir, böylece herhangi bir alt küme için daralma da O(n²) hesaplanır.
+    Birikimli yuvarlama hatasına karşı her pencere uzunluğu kadar güncellemede
+    toplamlar tampondan yeniden kurulur.
+
+    Tek tek çağrılar kilitlidir; eşitleme ve birden çok okumanın aynı pencereden
+    yapılması gerekiyorsa (ör. ortalama ve kovaryans) lock bütün blok boyunca tutulur.
+    """
+
+    def __init__(self, symbols: Sequence[Hashable], returns: np.ndarray):
+        self.symbols = tuple(symbols)
+        self._positions = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.lock = threading.RLock()
+        self._rebuild(np.asarray(returns, dtype=np.float64))
+
+    @property
+    def window(self) -> int:
+        return len(self._data)
+
+    def push(self, row: Sequence[float], keep_window: bool = True):
+        """
+        Yeni bir günün getirilerini ekler; keep_window ise en eski gün çıkarılır
+        """
+        row = np.asarray(row, dtype=np.float64).reshape(1, -1)
+        with self.lock:
+            n_removed = 1 if keep_window and len(self._data) > 1 else 0
+            self._apply(row, self._data[:n_removed])
+            self._data = np.concatenate([self._data[n_removed:], row])
+            self._after_update()
+
+    def sync(self, returns: np.ndarray) -> int:
+        """
+        Durumu verilen getiri tablosuna eşitler.
+
+        Tablo, tamponun devamıysa yalnızca yeni satırlar işlenir ve eklenen satır
+        sayısı döner; aksi halde toplamlar baştan kurulur ve -1 döner.
+        """
+        returns = np.asarray(returns, dtype=np.float64)
+        with self.lock:
+            n_new = self._new_rows(returns)
+            if n_new is None:
+                self._rebuild(returns)
+                return -1
+            if n_new or len(returns) != len(self._data):
+                n_removed = len(self._data) + n_new - len(returns)
+                self._apply(returns[len(returns) - n_new:], self._data[:n_removed])
+                self._data = returns.copy()
+                self._after_update()
+            return n_new
+
+    def mean(self, symbols: Optional[Sequence[Hashable]] = None, annualize: float = 1.0) -> np.ndarray:
+        """
+        Pencere ortalamasını döndürür
+        """
+        with self.lock:
+            index = self._index(symbols)
+            return self._sum[index] / self._count * annualize
+
+    def covariance(self,
+                   symbols: Optional[Sequence[Hashable]] = None,
+                   annualize: float = 1.0,
+                   shrink: bool = False) -> np.ndarray:
+        """
+        Alt küme için kovaryans matrisini döndürür.
+
+        shrink False ise pandas/numpy ile aynı örneklem kovaryansı (ddof=1),
+        True ise sklearn.covariance.ledoit_wolf ile aynı daraltılmış tahmin döner.
+        """
+        key = ('covariance', self._key(symbols), annualize, shrink)
+        with self.lock:
+            cached = self._cache.get(key)
+            if cached is None:
+                index = self._index(symbols)
+                if shrink:
+                    cached = self._shrunk(index) * annualize
+                else:
+                    cached = self._centered(index) / max(self._count - 1, 1) * annualize
+                cached.setflags(write=False)
+                self._cache[key] = cached
+            return cached
+
+    def moments(self,
+                returns: Optional[np.ndarray] = None,
+                symbols: Optional[Sequence[Hashable]] = None,
+                annualize: float = 1.0,
+                shrink: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ortalama vektörünü ve kovaryans matrisini aynı pencereden döndürür; returns
+        verilirse önce durum bu tabloya eşitlenir
+        """
+        with self.lock:
+            if returns is not None:
+                self.sync(returns)
+            return self.mean(symbols, annualize), self.covariance(symbols, annualize, shrink)
+
+    def shrinkage(self, symbols: Optional[Sequence[Hashable]] = None) -> float:
+        """
+        Alt küme için Ledoit-Wolf daralma katsayısını döndürür
+        """
+        with self.lock:
+            return self._shrinkage(self._index(symbols))[0]
+
+    def cholesky(self,
+                 symbols: Optional[Sequence[Hashable]] = None,
+                 annualize: float = 1.0,
+                 shrink: bool = False) -> np.ndarray:
+        """
+        Kovaryans matrisinin alt üçgen Cholesky çarpanını döndürür; yeni gün
+        gelene kadar önbellekte tutulur
+        """
+        key = ('cholesky', self._key(symbols), annualize, shrink)
+        with self.lock:
+            cached = self._cache.get(key)
+            if cached is None:
+                cached = _safe_cholesky(self.covariance(symbols, annualize, shrink))
+                cached.setflags(write=False)
+                self._cache[key] = cached
+            return cached
+
+    def _new_rows(self, returns: np.ndarray) -> Optional[int]:
+        """Tablo tamponun devamıysa yeni satır sayısını, değilse None döndürür"""
+        if returns.ndim != 2 or returns.shape[1] != len(self.symbols) or not len(self._data):
+            return None
+
+        # Tamponun son satırı tabloda sondan geriye doğru aranır; genellikle ilk adımda bulunur
+        last = self._data[-1]
+        for position in range(len(returns) - 1, -1, -1):
+            if np.array_equal(returns[position], last):
+                break
+        else:
+            return None
+
+        n_new = len(returns) - 1 - position
+        # Pencere, tamponda olmayan eski satırlarla başlayamaz
+        if len(returns) > len(self._data) + n_new:
+            return None
+        overlap = position + 1
+        if not np.array_equal(self._data[len(self._data) - overlap:], returns[:overlap]):
+            return None
+        if n_new and np.isnan(returns[overlap:]).any():
+            raise ValueError("Getiri tablosunda eksik değer olmamalı")
+        return n_new
+
+    def _rebuild(self, returns: np.ndarray):
+        if returns.ndim != 2 or returns.shape[1] != len(self.symbols):
+            raise ValueError("Getiri tablosu sembol sayısıyla uyumlu değil")
+        if np.isnan(returns).any():
+            raise ValueError("Getiri tablosunda eksik değer olmamalı")
+
+        squared = returns * returns
+        self._data = np.array(returns, dtype=np.float64)
+        self._count = len(returns)
+        self._sum = returns.sum(axis=0)
+        self._cross = returns.T @ returns
+        self._cross_squared = squared.T @ returns    # Σ x_i² x_j
+        self._fourth = squared.T @ squared           # Σ x_i² x_j²
+        self._updates = 0
+        self._cache: Dict = {}
+
+    def _apply(self, added: np.ndarray, removed: np.ndarray):
+        """Eklenen ve çıkarılan satırların katkısını tek matris çarpımıyla uygular"""
+        rows = np.concatenate([added, removed])
+        signs = np.concatenate([np.ones(len(added)), -np.ones(len(removed))])[:, None]
+        squared = rows * rows
+        self._count += len(added) - len(removed)
+        self._sum += (signs * rows).sum(axis=0)
+        self._cross += (signs * rows).T @ rows
+        self._cross_squared += (signs * squared).T @ rows
+        self._fourth += (signs * squared).T @ squared
+
+    def _after_update(self):
+        self._cache = {}
+        self._updates += 1
+        if self._updates >= max(len(self._data), 1):
+            self._rebuild(self._data)
+
+    def _centered(self, index) -> np.ndarray:
+        """Σ (x - m)(x - m)ᵀ"""
+        mean = self._sum[index] / self._count
+        return self._cross[np.ix_(index, index)] - self._count * np.outer(mean, mean)
+
+    def _shrinkage(self, index) -> Tuple[float, float, np.ndarray]:
+        """Daralma katsayısı, hedef varyans ve yanlı kovaryans (sklearn ledoit_wolf ile aynı)"""
+        t = self._count
+        n = len(index)
+        mean = self._sum[index] / t
+        mean_sq = mean * mean
+        sums = self._sum[index]
+        sum_sq = np.diag(self._cross)[index]
+        ixgrid = np.ix_(index, index)
+        cross = self._cross[ixgrid]
+        cross_squared = self._cross_squared[ixgrid]
+
+        # Σ_t (x_i - m_i)² (x_j - m_j)², ham momentlerden açılarak
+        centered_fourth = (self._fourth[ixgrid]
+                           - 2 * cross_squared * mean[None, :]
+                           - 2 * cross_squared.T * mean[:, None]
+                           + 4 * np.outer(mean, mean) * cross
+                           + np.outer(sum_sq, mean_sq) + np.outer(mean_sq, sum_sq)
+                           - 2 * np.outer(mean * sums, mean_sq) - 2 * np.outer(mean_sq, mean * sums)
+                           + t * np.outer(mean_sq, mean_sq))
+
+        emp_cov = self._centered(index) / t
+        target = np.trace(emp_cov) / n
+        delta_ = np.sum(emp_cov ** 2)
+        beta = (centered_fourth.sum() / t - delta_) / (n * t)
+        delta = (delta_ - 2 * target * np.trace(emp_cov) + n * target ** 2) / n
+        beta = min(beta, delta)
+        intensity = 0.0 if beta == 0 else float(beta / delta)
+        return intensity, target, emp_cov
+
+    def _shrunk(self, index) -> np.ndarray:
+        intensity, target, emp_cov = self._shrinkage(index)
+        shrunk = (1 - intensity) * emp_cov
+        shrunk[np.diag_indices_from(shrunk)] += intensity * target
+        return shrunk
+
+    def _index(self, symbols: Optional[Sequence[Hashable]]):
+        if symbols is None:
+            return np.arange(len(self.symbols))
+        try:
+            return np.array([self._positions[symbol] for symbol in symbols], dtype=np.int64)
+        except KeyError as e:
+            raise ValueError(f"Sembol evrende yok: {e.args[0]}")
+
+    @staticmethod
+    def _key(symbols: Optional[Sequence[Hashable]]):
+        return None if symbols is None else tuple(symbols)
+
+
+def _safe_cholesky(matrix: np.ndarray) -> np.ndarray:
+    """
+    Yarı tanımlı matrislerde köşegene artan küçük bir pay ekleyerek ayrıştırır
+    """
+    jitter = 0.0
+    scale = float(np.mean(np.diag(matrix))) if len(matrix) else 1.0
+    for _ in range(8):
+        try:
+            return np.linalg.cholesky(matrix + jitter * np.eye(len(matrix)))
+        except np.linalg.LinAlgError:
+            jitter = max(jitter * 10, scale * 1e-10)
+    raise ValueError("Kovaryans matrisi pozitif tanımlı değil")
+
+
+class CovarianceService:
+    """
+    Sembol evreni başına kayan kovaryans durumlarını tutar.
+
+    Aynı izleme listesi için tekrar eden çağrılar O(T·n²) yeniden hesaplama yerine
+    yalnızca yeni günleri O(n²) ile işler; değişmemiş veride önbellekten döner.
+    """
+
+    def __init__(self, max_universes: int = COVARIANCE_CACHE_SIZE):
+        self.max_universes = max_universes
+        self._universes: "OrderedDict[Tuple, RollingCovariance]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def universe(self, returns: Union[pd.DataFrame, np.ndarray], namespace: str = 'default') -> RollingCovariance:
+        """
+        Getiri tablosunun (satırlar gün, kolonlar sembol) güncel kovaryans durumunu döndürür.
+
+        Durum başka bir thread tarafından farklı bir pencereye eşitlenebilir; birden
+        çok değer okunacaksa synced() kullanılmalıdır.
+        """
+        with self.synced(returns, namespace) as universe:
+            return universe
+
+    @contextmanager
+    def synced(self, returns: Union[pd.DataFrame, np.ndarray],
+               namespace: str = 'default') -> Iterator[RollingCovariance]:
+        """
+        Getiri tablosuna eşitlenmiş durumu kilidi tutarak verir; blok içindeki tüm
+        okumalar bu tablonun penceresinden yapılır
+        """
+        symbols, values = _split(returns)
+        universe = self._universe(symbols, values, namespace)
+        with universe.lock:
+            universe.sync(values)
+            yield universe
+
+    def moments(self,
+                returns: Union[pd.DataFrame, np.ndarray],
+                annualize: float = 1.0,
+                shrink: bool = False,
+                namespace: str = 'default') -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Kolon sırasıyla ortalama getiri vektörünü ve kovaryans matrisini döndürür
+        """
+        symbols, values = _split(returns)
+        return self._universe(symbols, values, namespace).moments(values, annualize=annualize, shrink=shrink)
+
+    def _universe(self, symbols: Optional[Tuple], values: np.ndarray, namespace: str) -> RollingCovariance:
+        # Kolon adı olmayan tablolar birbirinden ayırt edilemez; önbelleğe alınmaz
+        if symbols is None:
+            return RollingCovariance(range(values.shape[1]), values)
+
+        key = (namespace, symbols)
+        with self._lock:
+            universe = self._universes.get(key)
+            if universe is not None:
+                self._universes.move_to_end(key)
+                return universe
+
+        universe = RollingCovariance(symbols, values)
+        with self._lock:
+            universe = self._universes.setdefault(key, universe)
+            self._universes.move_to_end(key)
+            while len(self._universes) > self.max_universes:
+                self._universes.popitem(last=False)
+        return universe
+
+    def clear(self):
+        with self._lock:
+            self._universes.clear()
+
+
+def _split(returns) -> Tuple[Optional[Tuple], np.ndarray]:
+    columns = getattr(returns, 'columns', None)
+    values = np.asarray(returns, dtype=np.float64)
+    if values.ndim != 2:
+        raise ValueError("Getiri tablosu iki boyutlu olmalı")
+    return (tuple(columns) if columns is not None else None), values
+
+
+_default_service: Optional[CovarianceService] = None
+_default_service_lock = threading.Lock()
+
+
+def get_covariance_service() -> CovarianceService:
+    """
+    Süreç genelinde tek kovaryans servisini döndürür
+    """
+    global _default_service
+    with _default_service_lock:
+        if _default_service is None:
+            _default_service = CovarianceService()
+        return _default_service
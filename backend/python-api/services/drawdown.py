@@ -0,0 +1,160 @@
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+
+ArrayLike = Union[Sequence[float], np.ndarray]
+
+
+def drawdown_curve(prices: ArrayLike) -> np.ndarray:
+    """
+    Her gün için o ana kadarki zirveden düşüş oranını (peak - price) / peak döndürür.
+    2-D girdide her satır ayrı bir seridir (varlık × gün).
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    peaks = np.maximum.accumulate(prices, axis=-1)
+    return (peaks - prices) / peaks
+
+
+def underwater_curve(prices: ArrayLike) -> np.ndarray:
+    """
+    Sualtı eğrisi: price / peak - 1 (zirvede 0, düşüşte negatif)
+    """
+    return -drawdown_curve(prices)
+
+
+def max_drawdown(prices: ArrayLike) -> Union[float, np.ndarray]:
+    """
+    En büyük düşüş oranı; 1-D girdide sayı, 2-D girdide satır başına dizi döner
+    """
+    result = drawdown_curve(prices).max(axis=-1)
+    return float(result) if np.ndim(result) == 0 else result
+
+
+def drawdown_details(prices: ArrayLike, dates: Optional[Sequence] = None) -> Dict:
+    """
+    En büyük düşüşün büyüklüğü, zirve/dip/toparlanma konumları ve süreleri.
+
+    Dönen sözlükte max_drawdown, peak, trough, recovery (toparlanmadıysa -1),
+    duration (zirveden dibe gün), recovery_duration (zirveden toparlanmaya gün,
+    toparlanmadıysa -1) ve max_underwater_duration (zirvenin altında geçen en uzun
+    süre) bulunur. dates verilirse konumlar yerine tarihler (toparlanmadıysa None)
+    döner. 2-D girdide her değer satır başına bir dizidir.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    one_dimensional = prices.ndim == 1
+    prices = np.atleast_2d(prices)
+    n_series, n_days = prices.shape
+    rows = np.arange(n_series)
+    days = np.arange(n_days)
+
+    peaks = np.maximum.accumulate(prices, axis=1)
+    drawdowns = (peaks - prices) / peaks
+
+    # Her gün için son zirvenin konumu
+    last_high = np.maximum.accumulate(np.where(prices >= peaks, days, 0), axis=1)
+
+    trough = drawdowns.argmax(axis=1)
+    max_dd = drawdowns[rows, trough]
+    peak = last_high[rows, trough]
+
+    # Dipten sonra fiyatın zirve seviyesine ilk döndüğü gün
+    recovered = (days > trough[:, None]) & (prices >= peaks[rows, trough][:, None])
+    has_recovered = recovered.any(axis=1)
+    recovery = np.where(has_recovered, recovered.argmax(axis=1), -1)
+    # Düşüş yoksa zirve, dip ve toparlanma aynı gündür
+    recovery = np.where(max_dd > 0, recovery, trough)
+
+    result = {
+        'max_drawdown': max_dd,
+        'peak': peak,
+        'trough': trough,
+        'recovery': recovery,
+        'duration': trough - peak,
+        'recovery_duration': np.where(recovery >= 0, recovery - peak, -1),
+        'max_underwater_duration': (days - last_high).max(axis=1),
+    }
+
+    if dates is not None:
+        dates = np.asarray(dates, dtype=object)
+        for key in ('peak', 'trough', 'recovery'):
+            positions = result[key]
+            result[key] = np.array([dates[p] if p >= 0 else None for p in positions], dtype=object)
+
+    if one_dimensional:
+        return {key: (value[0].item() if hasattr(value[0], 'item') else value[0])
+                for key, value in result.items()}
+    return result
+
+
+class StreamingDrawdown:
+    """
+    Fiyat geldikçe düşüş istatistiklerini O(1) bellek ve O(1) sürede günceller.
+
+    drawdown_details ile aynı tanımları kullanır; zaman damgası verilmezse gün
+    sırası (0, 1, 2, ...) kullanılır.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.peak: Optional[float] = None
+        self.peak_time = None
+        self.current_drawdown = 0.0
+        self.max_underwater_duration = 0
+        self._last_high_index = 0
+        self.max_drawdown = 0.0
+        self.max_drawdown_peak = None
+        self.max_drawdown_trough = None
+        self.max_drawdown_recovery = None
+        self._max_peak_price: Optional[float] = None
+
+    def update(self, price: float, timestamp=None) -> Dict:
+        """
+        Yeni fiyatı işler ve güncel istatistikleri döndürür
+        """
+        index = self.count
+        timestamp = index if timestamp is None else timestamp
+        self.count += 1
+
+        if self.peak is None or price >= self.peak:
+            self.peak = price
+            self.peak_time = timestamp
+            self._last_high_index = index
+
+        self.current_drawdown = (self.peak - price) / self.peak
+        self.max_underwater_duration = max(self.max_underwater_duration, index - self._last_high_index)
+
+        if self.current_drawdown > self.max_drawdown:
+            self.max_drawdown = self.current_drawdown
+            self.max_drawdown_peak = self.peak_time
+            self.max_drawdown_trough = timestamp
+            self.max_drawdown_recovery = None
+            self._max_peak_price = self.peak
+        elif (self.max_drawdown_recovery is None and self._max_peak_price is not None
+              and price >= self._max_peak_price):
+            self.max_drawdown_recovery = timestamp
+
+        return self.stats()
+
+    def stats(self) -> Dict:
+        """
+        Güncel düşüş istatistiklerini döndürür
+        """
+        return {
+            'current_drawdown': self.current_drawdown,
+            'peak': self.peak,
+            'peak_time': self.peak_time,
+            'max_drawdown': self.max_drawdown,
+            'max_drawdown_peak': self.max_drawdown_peak,
+            'max_drawdown_trough': self.max_drawdown_trough,
+            'max_drawdown_recovery': self.max_drawdown_recovery,
+            'max_underwater_duration': self.max_underwater_duration,
+        }
+
+    def to_dict(self) -> Dict:
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'StreamingDrawdown':
+        instance = cls()
+        instance.__dict__.update(state)
+        return instance
@@ -0,0 +1,270 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+FRONTIER_CACHE_SIZE = 64
+
+
+class EfficientFrontier:
+    """
+    Uzun pozisyonlu (lower ≤ w ≤ upper, Σw = 1) etkin sınır; kritik çizgi algoritması.
+
+    Sınır, serbest varlık kümesinin değiştiği köşe portföylerle (turning point) tam
+    olarak temsil edilir; iki komşu köşe arasındaki portföyler bunların doğrusal
+    birleşimidir. Bu yüzden köşeler bir kez hesaplandıktan sonra herhangi bir hedef
+    oynaklık için en yüksek getirili portföy, ilgili aralıkta ikinci derece bir
+    denklemin çözümüyle bulunur.
+    """
+
+    def __init__(self, mean: np.ndarray, cov: np.ndarray,
+                 lower: float = 0.0, upper: float = 1.0, tolerance: float = 1e-9):
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.cov = np.asarray(cov, dtype=np.float64)
+        n_assets = len(self.mean)
+        if self.cov.shape != (n_assets, n_assets):
+            raise ValueError("Ortalama vektörü ile kovaryans matrisi boyutları uyuşmuyor")
+        if not n_assets or lower * n_assets > 1 + tolerance or upper * n_assets < 1 - tolerance:
+            raise ValueError("Ağırlık sınırlarıyla geçerli bir portföy kurulamıyor")
+        self.lower = np.full(n_assets, float(lower))
+        self.upper = np.full(n_assets, float(upper))
+        self.tolerance = tolerance
+
+        self.weights = self._solve()
+        self.returns = self.weights @ self.mean
+        self.volatilities = np.sqrt(np.maximum(np.einsum('ij,jk,ik->i', self.weights, self.cov, self.weights), 0))
+
+    @property
+    def min_volatility(self) -> float:
+        return float(self.volatilities[-1])
+
+    @property
+    def max_volatility(self) -> float:
+        return float(self.volatilities[0])
+
+    def target_volatility(self, volatility: float) -> Dict:
+        """
+        Oynaklığı hedefi aşmayan en yüksek getirili portföyü döndürür.
+
+        Hedef, en yüksek getirili köşenin oynaklığından büyükse o köşe; minimum
+        varyans portföyünün oynaklığından küçükse minimum varyans portföyü döner
+        (target_reached False).
+        """
+        if volatility >= self.max_volatility:
+            return self._result(self.weights[0], volatility, volatility - self.max_volatility <= self.tolerance)
+        if volatility <= self.min_volatility:
+            return self._result(self.weights[-1], volatility, self.min_volatility - volatility <= self.tolerance)
+
+        # Köşeler azalan oynaklık sırasında; hedefin düştüğü aralık bulunur
+        k = int(np.searchsorted(-self.volatilities, -volatility, side='right')) - 1
+        high, low = self.weights[k], self.weights[k + 1]
+
+        # w(a) = low + a (high - low) için wᵀΣw = σ² denkleminin [0, 1] içindeki kökü
+        delta = high - low
+        qa = delta @ self.cov @ delta
+        qb = 2 * (low @ self.cov @ delta)
+        qc = low @ self.cov @ low - volatility ** 2
+        if qa <= 0:
+            a = -qc / qb if qb else 0.0
+        else:
+            a = (-qb + np.sqrt(max(qb * qb - 4 * qa * qc, 0.0))) / (2 * qa)
+        a = min(max(a, 0.0), 1.0)
+        return self._result(low + a * delta, volatility, True)
+
+    def _result(self, weights: np.ndarray, target: float, reached: bool) -> Dict:
+        weights = np.clip(weights, self.lower, self.upper)
+        weights = weights / weights.sum()
+        return {
+            'weights': weights,
+            'expected_return': float(weights @ self.mean),
+            'volatility': float(np.sqrt(max(weights @ self.cov @ weights, 0.0))),
+            'target_volatility': float(target),
+            'target_reached': bool(reached),
+        }
+
+    def _solve(self) -> np.ndarray:
+        """
+        Köşe portföyleri, λ (getiri/risk dengesi) azalacak şekilde üretir; son köşe
+        minimum varyans portföyüdür
+        """
+        free, weights = self._initial_portfolio()
+        corners = [weights.copy()]
+        last_lambda: Optional[float] = None
+
+        while True:
+            inverse, cov_fb, mean_f, weights_b = self._matrices(free, weights)
+            bounded = self._bounded(free)
+            c4 = inverse.sum(axis=1)
+            c2 = inverse @ mean_f
+            c1 = c4.sum()
+            c3 = c4 @ mean_f
+            fb_weighted = cov_fb @ weights_b
+            l3 = inverse @ fb_weighted
+
+            # a) Serbest bir ağırlığın sınıra çarpacağı λ (tüm serbest varlıklar için birlikte)
+            lambda_in = None
+            if len(free) > 1:
+                c = -c1 * c2 + c3 * c4
+                bounds = np.where(c > 0, self.upper[free], self.lower[free])
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    values = ((1 - weights_b.sum() + l3.sum()) * c4 - c1 * (bounds + l3)) / c
+                values[c == 0] = np.nan
+                if np.isfinite(values).any():
+                    position = int(np.nanargmax(values))
+                    lambda_in, asset_in, bound_in = float(values[position]), free[position], bounds[position]
+
+            # b) Sınırdaki bir ağırlığın serbest kalacağı λ. Serbest kümeye eklenen varlık
+            # için ters matris, mevcut tersin kenarlanmasıyla (Schur tümleyeni) bulunur
+            lambda_out = None
+            if bounded:
+                projected = inverse @ cov_fb
+                schur = self.cov[bounded, bounded] - (cov_fb * projected).sum(axis=0)
+                ones_gap = projected.sum(axis=0) - 1
+                mean_gap = projected.T @ mean_f - self.mean[bounded]
+                c1_new = c1 + ones_gap ** 2 / schur
+                c3_new = c3 + ones_gap * mean_gap / schur
+                c = c1_new * mean_gap / schur - c3_new * ones_gap / schur
+
+                remaining_f = fb_weighted[:, None] - cov_fb * weights_b
+                remaining_last = (self.cov[np.ix_(bounded, bounded)] @ weights_b
+                                  - self.cov[bounded, bounded] * weights_b)
+                l3_last = (remaining_last - (projected * remaining_f).sum(axis=0)) / schur
+                l2_new = c4 @ remaining_f - ones_gap * l3_last
+                l1_new = weights_b.sum() - weights_b
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    values = ((1 - l1_new + l2_new) * (-ones_gap / schur)
+                              - c1_new * (weights_b + l3_last)) / c
+                values[(c == 0) | ~np.isfinite(values)] = np.nan
+                if last_lambda is not None:
+                    # Yeni sınıra çarpan varlığın yuvarlama hatasıyla aynı λ'da geri dönmesi engellenir
+                    values[values >= last_lambda - self.tolerance * max(1.0, abs(last_lambda))] = np.nan
+                if np.isfinite(values).any():
+                    position = int(np.nanargmax(values))
+                    lambda_out, asset_out = float(values[position]), bounded[position]
+
+            if (lambda_in is None or lambda_in < 0) and (lambda_out is None or lambda_out < 0):
+                # Minimum varyans portföyü
+                last_lambda = 0.0
+            elif lambda_out is None or (lambda_in is not None and lambda_in > lambda_out):
+                last_lambda = lambda_in
+                free.remove(asset_in)
+                weights[asset_in] = bound_in
+            else:
+                last_lambda = lambda_out
+                free.append(asset_out)
+
+            inverse, cov_fb, mean_f, weights_b = self._matrices(free, weights)
+            weights[free] = self._free_weights(inverse, cov_fb, mean_f, weights_b, last_lambda)
+            corners.append(weights.copy())
+            if last_lambda == 0:
+                break
+
+        return self._purge(np.array(corners))
+
+    def _initial_portfolio(self) -> Tuple[List[int], np.ndarray]:
+        """
+        En yüksek getirili portföy: varlıklar getiriye göre üst sınırdan doldurulur,
+        sınırda kalmayan son varlık serbesttir
+        """
+        order = np.argsort(self.mean, kind='stable')[::-1]
+        weights = self.lower.copy()
+        position = -1
+        while weights.sum() < 1:
+            position += 1
+            asset = order[position]
+            weights[asset] = self.upper[asset]
+        asset = int(order[max(position, 0)])
+        weights[asset] += 1 - weights.sum()
+        return [asset], weights
+
+    def _bounded(self, free: List[int]) -> List[int]:
+        free_set = set(free)
+        return [asset for asset in range(len(self.mean)) if asset not in free_set]
+
+    def _matrices(self, free: List[int], weights: np.ndarray):
+        bounded = self._bounded(free)
+        inverse = np.linalg.inv(self.cov[np.ix_(free, free)])
+        return inverse, self.cov[np.ix_(free, bounded)], self.mean[free], weights[bounded]
+
+    @staticmethod
+    def _free_weights(inverse, cov_fb, mean_f, weights_b, lambda_) -> np.ndarray:
+        ones_inv = inverse.sum(axis=1)
+        mean_inv = inverse @ mean_f
+        fixed = inverse @ (cov_fb @ weights_b)
+        gamma = (-lambda_ * ones_inv @ mean_f + 1 - weights_b.sum() + fixed.sum()) / ones_inv.sum()
+        return -fixed + gamma * ones_inv + lambda_ * mean_inv
+
+    def _purge(self, corners: np.ndarray) -> np.ndarray:
+        """
+        Sayısal hatayla sınırları ihlal eden ve etkin olmayan (getirisi artmayan) köşeleri atar
+        """
+        tolerance = 1e-7
+        valid = ((np.abs(corners.sum(axis=1) - 1) <= tolerance)
+                 & (corners >= self.lower - tolerance).all(axis=1)
+                 & (corners <= self.upper + tolerance).all(axis=1))
+        corners = corners[valid]
+
+        # Minimum varyans portföyünden geriye doğru getirisi artan köşeler tutulur
+        returns = corners @ self.mean
+        keep = []
+        best = -np.inf
+        for index in range(len(corners) - 1, -1, -1):
+            if returns[index] > best + 1e-15 or not keep:
+                keep.append(index)
+                best = max(best, returns[index])
+        return corners[keep[::-1]]
+
+
+class FrontierCache:
+    """
+    Aynı ortalama ve kovaryans için etkin sınırı yeniden hesaplamaz
+    """
+
+    def __init__(self, max_size: int = FRONTIER_CACHE_SIZE):
+        self.max_size = max_size
+        self._frontiers: 'OrderedDict[str, EfficientFrontier]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, mean: np.ndarray, cov: np.ndarray,
+            lower: float = 0.0, upper: float = 1.0) -> EfficientFrontier:
+        mean = np.ascontiguousarray(mean, dtype=np.float64)
+        cov = np.ascontiguousarray(cov, dtype=np.float64)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(mean.tobytes())
+        digest.update(cov.tobytes())
+        digest.update(np.array([lower, upper]).tobytes())
+        key = digest.hexdigest()
+
+        with self._lock:
+            frontier = self._frontiers.get(key)
+            if frontier is not None:
+                self._frontiers.move_to_end(key)
+                return frontier
+
+        frontier = EfficientFrontier(mean, cov, lower, upper)
+        with self._lock:
+            self._frontiers[key] = frontier
+            while len(self._frontiers) > self.max_size:
+                self._frontiers.popitem(last=False)
+        return frontier
+
+    def clear(self):
+        with self._lock:
+            self._frontiers.clear()
+
+
+_default_cache: Optional[FrontierCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_frontier_cache() -> FrontierCache:
+    """
+    Süreç genelinde tek etkin sınır önbelleğini döndürür
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = FrontierCache()
+        return _default_cache
@@ -0,0 +1,449 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Dict, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+INDICATOR_STATE_PATH = os.getenv(
+    'INDICATOR_STATE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'indicators.json')
+)
+
+NAN = float('nan')
+
+
+class _Ema:
+    """
+    pandas ewm(adjust=False, min_periods=...) ile aynı özyinelemeli ortalama
+    """
+
+    def __init__(self, alpha: float, min_periods: int):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value: Optional[float] = None
+        self.count = 0
+
+    def push(self, x: float) -> float:
+        self.value = x if self.value is None else self.alpha * x + (1 - self.alpha) * self.value
+        self.count += 1
+        return self.current
+
+    @property
+    def current(self) -> float:
+        return self.value if self.count >= self.min_periods else NAN
+
+    def to_dict(self) -> Dict:
+        return {'value': self.value, 'count': self.count}
+
+    def restore(self, state: Dict):
+        self.value = state['value']
+        self.count = state['count']
+
+
+class _RollingMoments:
+    """
+    Sabit pencerede ortalama ve ddof=0 standart sapma; güncelleme O(1)
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values: deque = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, x: float):
+        if len(self.values) < self.window:
+            self.values.append(x)
+            delta = x - self.mean
+            self.mean += delta / len(self.values)
+            self.m2 += delta * (x - self.mean)
+        else:
+            # Welford güncellemesinin kayan pencere hali: en eski değer yenisiyle değişir
+            old = self.values.popleft()
+            self.values.append(x)
+            previous_mean = self.mean
+            self.mean += (x - old) / self.window
+            self.m2 += (x - old) * (x - self.mean + old - previous_mean)
+
+    @property
+    def ready(self) -> bool:
+        return len(self.values) >= self.window
+
+    @property
+    def current_mean(self) -> float:
+        return self.mean if self.ready else NAN
+
+    @property
+    def current_std(self) -> float:
+        return math.sqrt(max(self.m2, 0.0) / self.window) if self.ready else NAN
+
+    def to_dict(self) -> Dict:
+        return {'values': list(self.values), 'mean': self.mean, 'm2': self.m2}
+
+    def restore(self, state: Dict):
+        self.values = deque(state['values'])
+        self.mean = state['mean']
+        self.m2 = state['m2']
+
+
+class _RollingExtreme:
+    """
+    Monoton kuyrukla kayan pencere minimumu ya da maksimumu; amortize O(1)
+    """
+
+    def __init__(self, window: int, maximum: bool):
+        self.window = window
+        self.maximum = maximum
+        self.entries: deque = deque()  # (sıra, değer)
+        self.count = 0
+
+    def push(self, x: float) -> float:
+        if self.maximum:
+            while self.entries and self.entries[-1][1] <= x:
+                self.entries.pop()
+        else:
+            while self.entries and self.entries[-1][1] >= x:
+                self.entries.pop()
+        self.entries.append((self.count, x))
+        while self.entries[0][0] <= self.count - self.window:
+            self.entries.popleft()
+        self.count += 1
+        return self.entries[0][1] if self.count >= self.window else NAN
+
+    def to_dict(self) -> Dict:
+        return {'entries': [list(entry) for entry in self.entries], 'count': self.count}
+
+    def restore(self, state: Dict):
+        self.entries = deque((int(i), v) for i, v in state['entries'])
+        self.count = state['count']
+
+
+def _divide(numerator: float, denominator: float) -> float:
+    """
+    Sıfıra bölmede pandas gibi inf/NaN üretir
+    """
+    if denominator == 0:
+        if numerator == 0 or math.isnan(numerator):
+            return NAN
+        return math.copysign(math.inf, numerator)
+    return numerator / denominator
+
+
+class IndicatorState:
+    """
+    Tek bir sembolün gösterge durumu.
+
+    Her yeni bar tüm göstergeleri sabit sürede günceller; değerler ta
+    kütüphanesinin varsayılan parametreli toplu hesaplamalarıyla aynıdır.
+    Son bar (ör. gün içi güncellenen günlük bar) aynı zaman damgasıyla tekrar
+    gelirse önceki durumdan yeniden hesaplanır.
+    """
+
+    def __init__(self,
+                 sma_window: int = 20,
+                 ema_window: int = 20,
+                 macd_fast: int = 12,
+                 macd_slow: int = 26,
+                 macd_signal: int = 9,
+                 rsi_window: int = 14,
+                 stoch_window: int = 14,
+                 bb_window: int = 20,
+                 bb_dev: float = 2.0,
+                 atr_window: int = 14):
+        self.params = {
+            'sma_window': sma_window, 'ema_window': ema_window,
+            'macd_fast': macd_fast, 'macd_slow': macd_slow, 'macd_signal': macd_signal,
+            'rsi_window': rsi_window, 'stoch_window': stoch_window,
+            'bb_window': bb_window, 'bb_dev': bb_dev, 'atr_window': atr_window,
+        }
+        self.sma = _RollingMoments(sma_window)
+        self.ema = _Ema(2 / (ema_window + 1), ema_window)
+        self.macd_fast = _Ema(2 / (macd_fast + 1), macd_fast)
+        self.macd_slow = _Ema(2 / (macd_slow + 1), macd_slow)
+        self.macd_signal = _Ema(2 / (macd_signal + 1), macd_signal)
+        self.rsi_up = _Ema(1 / rsi_window, rsi_window)
+        self.rsi_down = _Ema(1 / rsi_window, rsi_window)
+        self.stoch_low = _RollingExtreme(stoch_window, maximum=False)
+        self.stoch_high = _RollingExtreme(stoch_window, maximum=True)
+        self.bollinger = _RollingMoments(bb_window)
+        self.atr_window = atr_window
+        self.bb_dev = bb_dev
+
+        self.count = 0
+        self.last_timestamp: Optional[int] = None
+        self.prev_close: Optional[float] = None
+        self.tr_sum = 0.0
+        self.atr = 0.0
+        self.obv = 0.0
+        self.values: Dict[str, float] = {}
+        self._previous: Optional[Dict] = None
+
+    def update(self, timestamp: int, high: float, low: float, close: float, volume: float) -> Dict[str, float]:
+        """
+        Yeni barı işler ve güncel gösterge değerlerini döndürür.
+        Zaman damgası son bardan eskiyse ValueError fırlatılır.
+        """
+        if self.last_timestamp is not None:
+            if timestamp < self.last_timestamp:
+                raise ValueError("Bar son işlenen bardan daha eski")
+            if timestamp == self.last_timestamp:
+                self.restore(self._previous)
+        self._previous = self.to_dict(include_previous=False)
+
+        prev_close = self.prev_close
+        self.count += 1
+
+        # Trend
+        self.sma.push(close)
+        ema = self.ema.push(close)
+        self.macd_fast.push(close)
+        self.macd_slow.push(close)
+        if self.macd_slow.count >= self.macd_slow.min_periods and self.macd_fast.count >= self.macd_fast.min_periods:
+            macd = self.macd_fast.value - self.macd_slow.value
+            macd_diff = macd - self.macd_signal.push(macd)
+        else:
+            macd_diff = NAN
+
+        # Momentum; ilk barın farkı 0 kabul edilir
+        diff = close - prev_close if prev_close is not None else 0.0
+        up = self.rsi_up.push(diff if diff > 0 else 0.0)
+        down = self.rsi_down.push(-diff if diff < 0 else 0.0)
+        if math.isnan(down):
+            rsi = NAN
+        elif down == 0:
+            rsi = 100.0
+        else:
+            rsi = 100 - 100 / (1 + up / down)
+
+        lowest = self.stoch_low.push(low)
+        highest = self.stoch_high.push(high)
+        stoch = 100 * _divide(close - lowest, highest - lowest)
+
+        # Volatilite
+        self.bollinger.push(close)
+        middle = self.bollinger.current_mean
+        std = self.bollinger.current_std
+
+        true_range = high - low
+        if prev_close is not None:
+            true_range = max(true_range, abs(high - prev_close), abs(low - prev_close))
+        if self.count < self.atr_window:
+            self.tr_sum += true_range
+            atr = 0.0
+        elif self.count == self.atr_window:
+            self.atr = (self.tr_sum + true_range) / self.atr_window
+            atr = self.atr
+        else:
+            self.atr = (self.atr * (self.atr_window - 1) + true_range) / self.atr_window
+            atr = self.atr
+
+        # Hacim; yalnızca düşen kapanışta hacim çıkarılır
+        self.obv += -volume if prev_close is not None and close < prev_close else volume
+
+        self.prev_close = close
+        self.last_timestamp = timestamp
+        self.values = {
+            'SMA_20': self.sma.current_mean,
+            'EMA_20': ema,
+            'MACD': macd_diff,
+            'RSI': rsi,
+            'Stoch': stoch,
+            'BB_upper': middle + self.bb_dev * std,
+            'BB_middle': middle,
+            'BB_lower': middle - self.bb_dev * std,
+            'ATR': atr,
+            'OBV': self.obv,
+        }
+        return dict(self.values)
+
+    def continues(self, close_before_last: Optional[float]) -> bool:
+        """
+        Son işlenen bardan önceki kapanış hâlâ aynı mı; değilse (ör. temettü/bölünme
+        düzeltmesiyle geçmiş yeniden yazıldıysa) durum geçersizdir
+        """
+        if self._previous is None:
+            return True
+        return self._previous['prev_close'] == close_before_last
+
+    def to_dict(self, include_previous: bool = True) -> Dict:
+        state = {
+            'params': self.params,
+            'sma': self.sma.to_dict(),
+            'ema': self.ema.to_dict(),
+            'macd_fast': self.macd_fast.to_dict(),
+            'macd_slow': self.macd_slow.to_dict(),
+            'macd_signal': self.macd_signal.to_dict(),
+            'rsi_up': self.rsi_up.to_dict(),
+            'rsi_down': self.rsi_down.to_dict(),
+            'stoch_low': self.stoch_low.to_dict(),
+            'stoch_high': self.stoch_high.to_dict(),
+            'bollinger': self.bollinger.to_dict(),
+            'count': self.count,
+            'last_timestamp': self.last_timestamp,
+            'prev_close': self.prev_close,
+            'tr_sum': self.tr_sum,
+            'atr': self.atr,
+            'obv': self.obv,
+            'values': dict(self.values),
+        }
+        if include_previous:
+            state['previous'] = self._previous
+        return state
+
+    def restore(self, state: Dict):
+        for name in ('sma', 'ema', 'macd_fast', 'macd_slow', 'macd_signal', 'rsi_up', 'rsi_down',
+                     'stoch_low', 'stoch_high', 'bollinger'):
+            getattr(self, name).restore(state[name])
+        for name in ('count', 'last_timestamp', 'prev_close', 'tr_sum', 'atr', 'obv'):
+            setattr(self, name, state[name])
+        self.values = dict(state['values'])
+        self._previous = state.get('previous')
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> IndicatorState:
+        indicator_state = cls(**state['params'])
+        indicator_state.restore(state)
+        return indicator_state
+
+
+class IndicatorEngine:
+    """
+    Sembol başına gösterge durumlarını tutar.
+
+    update() yalnızca durumun son barından sonraki barları işler; tarihçede
+    boşluk varsa ya da geçmiş değişmişse durum sıfırdan yeniden kurulur.
+    Durumlar JSON olarak kaydedilip yeniden başlatmadan sonra geri yüklenebilir.
+    """
+
+    def __init__(self, path: str = INDICATOR_STATE_PATH, **params):
+        self.path = path
+        self.params = params
+        self._states: Dict[str, IndicatorState] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def update_bar(self, symbol: str, timestamp: int, high: float, low: float,
+                   close: float, volume: float) -> Dict[str, float]:
+        """
+        Tek bir yeni barı işler; timestamp artan bir tamsayıdır (ör. epoch nanosaniye)
+        """
+        with self._symbol_lock(symbol):
+            state = self._states.get(symbol)
+            if state is None:
+                state = self._states[symbol] = IndicatorState(**self.params)
+            return state.update(timestamp, high, low, close, volume)
+
+    def update(self, symbol: str, bars: pd.DataFrame) -> Dict[str, float]:
+        """
+        Günlük bar tablosundaki yeni barları işler ve son gösterge değerlerini döndürür
+        """
+        if bars.empty:
+            raise ValueError(f"Veri bulunamadı: {symbol}")
+
+        timestamps = bars.index.as_unit('ns').asi8
+        highs = bars['High'].to_numpy(dtype=float)
+        lows = bars['Low'].to_numpy(dtype=float)
+        closes = bars['Close'].to_numpy(dtype=float)
+        volumes = bars['Volume'].to_numpy(dtype=float)
+        with self._symbol_lock(symbol):
+            state = self._states.get(symbol)
+            start = 0
+            if state is not None and state.last_timestamp is not None:
+                # Son işlenen bar da dahil edilir; gün içinde değişmiş olabilir
+                start = int(timestamps.searchsorted(state.last_timestamp))
+                if (start >= len(timestamps) or timestamps[start] != state.last_timestamp
+                        or not state.continues(float(closes[start - 1]) if start else None)):
+                    state = None
+                    start = 0
+            if state is None:
+                state = self._states[symbol] = IndicatorState(**self.params)
+
+            for i in range(start, len(timestamps)):
+                state.update(int(timestamps[i]), highs[i], lows[i], closes[i], volumes[i])
+            return dict(state.values)
+
+    def latest(self, symbol: str) -> Optional[Dict[str, float]]:
+        """
+        Sembolün son hesaplanan gösterge değerlerini döndürür
+        """
+        with self._symbol_lock(symbol):
+            state = self._states.get(symbol)
+            return dict(state.values) if state is not None else None
+
+    def reset(self, symbol: str):
+        with self._symbol_lock(symbol):
+            self._states.pop(symbol, None)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        Tüm sembollerin durumunu JSON'a yazılabilir sözlük olarak döndürür
+        """
+        with self._lock:
+            symbols = list(self._states)
+        snapshot = {}
+        for symbol in symbols:
+            with self._symbol_lock(symbol):
+                state = self._states.get(symbol)
+                if state is not None:
+                    snapshot[symbol] = state.to_dict()
+        return snapshot
+
+    def restore(self, snapshot: Dict[str, Dict]):
+        """
+        snapshot() çıktısından durumları geri yükler
+        """
+        states = {symbol: IndicatorState.from_dict(state) for symbol, state in snapshot.items()}
+        with self._lock:
+            self._states.update(states)
+
+    def save(self, path: Optional[str] = None):
+        """
+        Durumları diske yazar; yarım yazılmış dosya hiç okunmaz
+        """
+        path = path or self.path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: Optional[str] = None) -> bool:
+        """
+        Kaydedilmiş durumları okur; dosya yoksa ya da bozuksa False döner
+        """
+        try:
+            with open(path or self.path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            self.restore(snapshot)
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        return True
+
+    def _symbol_lock(self, symbol: str) -> threading.Lock:
+        with self._lock:
+            lock = self._locks.get(symbol)
+            if lock is None:
+                lock = self._locks[symbol] = threading.Lock()
+            return lock
+
+
+_default_engine: Optional[IndicatorEngine] = None
+_default_engine_lock = threading.Lock()
+
+
+def get_indicator_engine() -> IndicatorEngine:
+    """
+    Süreç genelinde tek gösterge motorunu döndürür; kayıtlı durum varsa yüklenir
+    """
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = IndicatorEngine()
+            _default_engine.load()
+        return _default_engine
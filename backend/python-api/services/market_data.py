@@ -1,8 +1,13 @@
-import yfinance as yf
-import pandas as pd
-from typing import Dict, List, Optional
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Union
 from datetime import datetime, timedelta
 
+from services.price_store import get_price_store
+from utils.lazy_import import lazy_import
+
+pd = lazy_import('pandas')
+
 class MarketDataService:
     @staticmethod
     def get_stock_data(symbol: str, period: str = "1mo") -> Dict:
@@ -10,8 +15,9 @@ class MarketDataService:
         Hisse senedi verilerini Yahoo Finance'den alır
         """
         try:
-            stock = yf.Ticker(symbol)
-            hist = stock.history(period=period)
+            store = get_price_store()
+            hist = store.get_history(symbol, period=period)
+            info = store.get_info(symbol)
             
             if hist.empty:
                 raise ValueError(f"Veri bulunamadı: {symbol}")
@@ -29,12 +35,12 @@ class MarketDataService:
                 "history": hist['Close'].to_dict(),
                 "volume": hist['Volume'][-1],
                 "info": {
-                    "name": stock.info.get('longName', symbol),
-                    "sector": stock.info.get('sector', 'Unknown'),
-                    "industry": stock.info.get('industry', 'Unknown'),
-                    "market_cap": stock.info.get('marketCap', None),
-                    "pe_ratio": stock.info.get('trailingPE', None),
-                    "dividend_yield": stock.info.get('dividendYield', None)
+                    "name": info.get('longName', symbol),
+                    "sector": info.get('sector', 'Unknown'),
+                    "industry": info.get('industry', 'Unknown'),
+                    "market_cap": info.get('marketCap', None),
+                    "pe_ratio": info.get('trailingPE', None),
+                    "dividend_yield": info.get('dividendYield', None)
                 }
             }
         except Exception as e:
@@ -49,15 +55,19 @@ class MarketDataService:
             # Örnek endeksler
             indices = ['^BIST100', '^XU030', '^XUSIN']
             summary = {}
+            store = get_price_store()
+            
+            # Barlar tek toplu istekle, künyeler eşzamanlı olarak alınır
+            histories = store.get_history_bulk(indices, period="1d")
+            infos = store.get_info_bulk(indices)
             
             for index in indices:
-                data = yf.Ticker(index)
-                hist = data.history(period="1d")
+                hist = histories[index]
                 
                 if not hist.empty:
                     latest = hist.iloc[-1]
                     summary[index] = {
-                        "name": data.info.get('longName', index),
+                        "name": infos[index].get('longName', index),
                         "last_price": latest['Close'],
                         "change": latest['Close'] - latest['Open'],
                         "change_percent": ((latest['Close'] - latest['Open']) / latest['Open']) * 100
@@ -75,31 +85,38 @@ class MarketDataService:
         recommendations = []
         
         try:
+            store = get_price_store()
+            
+            # Tüm semboller için tek toplu istek ve tarih x sembol hizalı kapanış tablosu
+            panel = store.get_price_panel(symbols, period="6mo", field='Close')
+            infos = store.get_info_bulk(symbols)
+            
+            # Göstergeler tüm sembollerde aynı anda hesaplanır; farklı işlem günleri
+            # yüzünden oluşan boşluklar son kapanışla doldurulur
+            closes = panel.ffill()
+            current_prices = closes.iloc[-1]
+            ma50 = closes.rolling(window=50).mean().iloc[-1]
+            ma200 = closes.rolling(window=200).mean().iloc[-1]
+            rsi = MarketDataService._calculate_rsi(closes)
+            
             for symbol in symbols:
-                stock = yf.Ticker(symbol)
-                hist = stock.history(period="6mo")
-                
-                if not hist.empty:
-                    # Basit teknik analiz
-                    current_price = hist['Close'][-1]
-                    ma50 = hist['Close'].rolling(window=50).mean()[-1]
-                    ma200 = hist['Close'].rolling(window=200).mean()[-1]
-                    
-                    rsi = MarketDataService._calculate_rsi(hist['Close'])
+                if panel[symbol].notna().any():
+                    current_price = current_prices[symbol]
+                    info = infos[symbol]
                     
                     recommendation = {
                         "symbol": symbol,
-                        "name": stock.info.get('longName', symbol),
+                        "name": info.get('longName', symbol),
                         "current_price": current_price,
                         "signals": {
-                            "ma50_signal": "buy" if current_price > ma50 else "sell",
-                            "ma200_signal": "buy" if current_price > ma200 else "sell",
-                            "rsi_signal": "oversold" if rsi < 30 else "overbought" if rsi > 70 else "neutral"
+                            "ma50_signal": "buy" if current_price > ma50[symbol] else "sell",
+                            "ma200_signal": "buy" if current_price > ma200[symbol] else "sell",
+                            "rsi_signal": "oversold" if rsi[symbol] < 30 else "overbought" if rsi[symbol] > 70 else "neutral"
                         },
                         "metrics": {
-                            "pe_ratio": stock.info.get('trailingPE', None),
-                            "price_to_book": stock.info.get('priceToBook', None),
-                            "dividend_yield": stock.info.get('dividendYield', None)
+                            "pe_ratio": info.get('trailingPE', None),
+                            "price_to_book": info.get('priceToBook', None),
+                            "dividend_yield": info.get('dividendYield', None)
                         }
                     }
                     
@@ -110,9 +127,9 @@ class MarketDataService:
             raise Exception(f"Öneriler oluşturulurken hata oluştu: {str(e)}")
     
     @staticmethod
-    def _calculate_rsi(prices: pd.Series, periods: int = 14) -> float:
+    def _calculate_rsi(prices: Union[pd.Series, pd.DataFrame], periods: int = 14) -> Union[float, pd.Series]:
         """
-        Göreceli Güç Endeksi (RSI) hesaplar
+        Göreceli Güç Endeksi (RSI) hesaplar; tablo verilirse her kolon için son değeri döndürür
         """
         delta = prices.diff()
         
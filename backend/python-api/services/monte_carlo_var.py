@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import Executor
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING, Dict, Mapping, Optional, Sequence
+
+import numpy as np
+
+from services.covariance_service import CovarianceService, get_covariance_service
+from services.var_engine import VAR_CONFIDENCE_LEVELS, as_metrics, historical_var_cvar
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+MC_VAR_CHUNK_PATHS = int(os.getenv('MC_VAR_CHUNK_PATHS', '10000'))
+MC_VAR_MAX_PATHS = int(os.getenv('MC_VAR_MAX_PATHS', '5000000'))
+
+
+def _attach(name: str, shape, dtype=np.float64):
+    """
+    Paylaşımlı bellek bloğunu açar ve üzerine bir dizi görünümü döndürür
+    """
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def simulate_pnl_chunk(pnl_name: str, n_paths: int, factor_name: str, n_assets: int,
+                       drift: np.ndarray, values: np.ndarray, horizon: int,
+                       start: int, stop: int, seed: np.random.SeedSequence,
+                       antithetic: bool = True) -> int:
+    """
+    [start, stop) aralığındaki yolların kâr/zararını üretip paylaşımlı sonuç
+    tamponuna yazar. Süreç havuzunda çalışır; Cholesky çarpanı da paylaşımlı
+    bellekten okunur, böylece işçilere yalnızca küçük argümanlar gönderilir.
+
+    Şoklar ve çarpım float32 ile yapılır (VaR için yeterli, bellek bant genişliği
+    yarıya iner); antithetic ise her şok z için -z de kullanılır, böylece normal
+    üretimi ve matris çarpımı yarıya iner.
+    """
+    pnl_block, pnl = _attach(pnl_name, (n_paths,))
+    factor_block, factor = _attach(factor_name, (n_assets, n_assets))
+    try:
+        n_chunk = stop - start
+        n_draws = (n_chunk + 1) // 2 if antithetic else n_chunk
+        rng = np.random.default_rng(seed)
+        shocks = rng.standard_normal((n_draws, n_assets), dtype=np.float32)
+
+        # Ufuk boyunca toplam log getiri: N(h·μ, h·Σ), Σ = L·Lᵀ
+        scaled_factor = (factor.T * np.sqrt(horizon)).astype(np.float32)
+        moves = shocks @ scaled_factor
+        mean = (drift * horizon).astype(np.float32)
+        weights = values.astype(np.float32)
+
+        # Pozisyonlar simüle fiyatlardan yeniden değerlenir
+        log_returns = np.add(moves, mean, out=shocks)
+        pnl[start:start + n_draws] = np.expm1(log_returns, out=log_returns) @ weights
+        if antithetic:
+            log_returns = np.subtract(mean, moves[:n_chunk - n_draws], out=shocks[:n_chunk - n_draws])
+            pnl[start + n_draws:stop] = np.expm1(log_returns, out=log_returns) @ weights
+    finally:
+        del pnl, factor
+        pnl_block.close()
+        factor_block.close()
+    return stop - start
+
+
+class MonteCarloVaR:
+    """
+    Korelasyonlu şoklarla simülasyon tabanlı portföy VaR / ES.
+
+    Günlük log getirilerin kovaryansının Cholesky çarpanı covariance_service
+    üzerinden önbelleğe alınır; aynı evren için yeni gün gelene kadar yeniden
+    hesaplanmaz. Varsayılan olarak antithetic şoklar kullanılır. Yollar sabit
+    boyutlu parçalara bölünür ve her parçanın tohumu
+    SeedSequence.spawn ile üretilir; sonuç, işçi sayısından bağımsız olarak aynı
+    seed ile tekrarlanabilir. Parçalar verilen süreç havuzunda çalışır ve sonuçları
+    paylaşımlı bellekteki tek bir tampona yazar.
+    """
+
+    def __init__(self, covariance: Optional[CovarianceService] = None,
+                 chunk_paths: int = MC_VAR_CHUNK_PATHS,
+                 max_paths: int = MC_VAR_MAX_PATHS):
+        self.covariance = covariance or get_covariance_service()
+        self.chunk_paths = chunk_paths
+        self.max_paths = max_paths
+
+    def simulate(self,
+                 returns: 'pd.DataFrame',
+                 holdings: Mapping[str, float],
+                 prices: Mapping[str, float],
+                 n_paths: int = 100000,
+                 horizon: int = 1,
+                 seed: Optional[int] = None,
+                 shrink: Optional[bool] = None,
+                 executor: Optional[Executor] = None,
+                 antithetic: bool = True) -> np.ndarray:
+        """
+        Portföyün ufuk sonundaki kâr/zarar dağılımını (n_paths) döndürür.
+
+        returns: günlük log getiri tablosu (tarih × sembol); holdings: sembol -> adet;
+        prices: sembol -> son fiyat. shrink verilmezse sembol sayısı gün sayısına
+        yaklaştığında Ledoit-Wolf daralması kullanılır. executor verilmezse parçalar
+        bu süreçte sırayla çalışır.
+        """
+        if not 0 < n_paths <= self.max_paths:
+            raise ValueError(f"Yol sayısı 1 ile {self.max_paths} arasında olmalı")
+        if horizon < 1:
+            raise ValueError("Ufuk en az bir gün olmalı")
+
+        symbols = [symbol for symbol in holdings if holdings[symbol]]
+        missing = [symbol for symbol in symbols if symbol not in returns.columns or symbol not in prices]
+        if missing:
+            raise ValueError(f"Getiri ya da fiyat verisi olmayan semboller: {', '.join(missing)}")
+        if not symbols:
+            raise ValueError("Portföyde pozisyon yok")
+
+        with self.covariance.synced(returns[symbols], namespace='monte_carlo_var') as universe:
+            if shrink is None:
+                shrink = len(symbols) >= universe.window // 2
+            factor = universe.cholesky(symbols, shrink=shrink)
+            drift = universe.mean(symbols)
+        values = np.array([holdings[symbol] * prices[symbol] for symbol in symbols], dtype=np.float64)
+
+        n_assets = len(symbols)
+        bounds = [(start, min(start + self.chunk_paths, n_paths))
+                  for start in range(0, n_paths, self.chunk_paths)]
+        seeds = np.random.SeedSequence(seed).spawn(len(bounds))
+
+        pnl_block = shared_memory.SharedMemory(create=True, size=n_paths * 8)
+        factor_block = shared_memory.SharedMemory(create=True, size=max(factor.nbytes, 1))
+        try:
+            np.ndarray(factor.shape, dtype=np.float64, buffer=factor_block.buf)[:] = factor
+            tasks = [(pnl_block.name, n_paths, factor_block.name, n_assets, drift, values, horizon,
+                      start, stop, chunk_seed, antithetic)
+                     for (start, stop), chunk_seed in zip(bounds, seeds)]
+            if executor is None:
+                for task in tasks:
+                    simulate_pnl_chunk(*task)
+            else:
+                futures = [executor.submit(simulate_pnl_chunk, *task) for task in tasks]
+                for future in futures:
+                    future.result()
+            return np.ndarray((n_paths,), dtype=np.float64, buffer=pnl_block.buf).copy()
+        finally:
+            pnl_block.close()
+            pnl_block.unlink()
+            factor_block.close()
+            factor_block.unlink()
+
+    def value_at_risk(self,
+                      returns: 'pd.DataFrame',
+                      holdings: Mapping[str, float],
+                      prices: Mapping[str, float],
+                      levels: Sequence[float] = VAR_CONFIDENCE_LEVELS,
+                      n_paths: int = 100000,
+                      horizon: int = 1,
+                      seed: Optional[int] = None,
+                      shrink: Optional[bool] = None,
+                      executor: Optional[Executor] = None,
+                      antithetic: bool = True) -> Dict:
+        """
+        Simüle kâr/zarar dağılımından VaR ve ES (CVaR); tutarlar TL, oranlar portföy
+        değerine göredir. Kayıplar negatif değerlerdir.
+        """
+        pnl = self.simulate(returns, holdings, prices, n_paths, horizon, seed, shrink, executor, antithetic)
+        portfolio_value = float(sum(holdings[symbol] * prices[symbol] for symbol in holdings
+                                    if holdings[symbol]))
+        var, cvar = historical_var_cvar(pnl, levels)
+        return {
+            'portfolio_value': portfolio_value,
+            'n_paths': n_paths,
+            'horizon_days': horizon,
+            'mean_pnl': float(pnl.mean()),
+            'std_pnl': float(pnl.std()),
+            'metrics': as_metrics(levels, var, cvar),
+            'metrics_pct': as_metrics(levels, var / portfolio_value, cvar / portfolio_value),
+        }
+
+
+_default_engine: Optional[MonteCarloVaR] = None
+_default_engine_lock = threading.Lock()
+
+
+def get_monte_carlo_var() -> MonteCarloVaR:
+    """
+    Süreç genelinde tek Monte Carlo VaR motorunu döndürür
+    """
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = MonteCarloVaR()
+        return _default_engine
@@ -0,0 +1,332 @@
+import math
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from services.portfolio_repository import PortfolioRepository
+
+PORTFOLIO_AGGREGATE_CACHE_SIZE = int(os.getenv('PORTFOLIO_AGGREGATE_CACHE_SIZE', '1024'))
+# Artımlı toplamlar bu kadar güncellemede bir pozisyonlardan baştan hesaplanır
+PORTFOLIO_AGGREGATE_RECOMPUTE_EVERY = int(os.getenv('PORTFOLIO_AGGREGATE_RECOMPUTE_EVERY', '1000'))
+
+# Sembol -> (isim, güncel fiyat); fiyat bilinmiyorsa None
+QuoteLookup = Callable[[str], Tuple[str, Optional[float]]]
+
+
+class Position:
+    """
+    Tek bir sembolün pozisyonu; fiyat bilinmiyorsa ortalama maliyetten değerlenir
+    """
+
+    __slots__ = ('symbol', 'name', 'quantity', 'average_price', 'price')
+
+    def __init__(self, symbol: str, name: str, quantity: float, average_price: float,
+                 price: Optional[float] = None):
+        self.symbol = symbol
+        self.name = name
+        self.quantity = quantity
+        self.average_price = average_price
+        self.price = average_price if price is None else price
+
+    @property
+    def cost(self) -> float:
+        return self.quantity * self.average_price
+
+    @property
+    def value(self) -> float:
+        return self.quantity * self.price
+
+    @property
+    def profit(self) -> float:
+        return self.value - self.cost
+
+    @property
+    def profit_percentage(self) -> float:
+        return ((self.price / self.average_price) - 1) * 100 if self.average_price else 0.0
+
+    def to_dict(self) -> Dict:
+        quantity = self.quantity
+        return {
+            "symbol": self.symbol,
+            "name": self.name,
+            "quantity": int(quantity) if float(quantity).is_integer() else quantity,
+            "averagePrice": self.average_price,
+            "currentPrice": self.price,
+            "totalValue": self.value,
+            "profit": self.profit,
+            "profitPercentage": self.profit_percentage,
+        }
+
+
+class PortfolioAggregate:
+    """
+    Sembolle indekslenmiş pozisyonlar ve artımlı portföy toplamları.
+
+    Toplam değer, toplam maliyet ve kâr yüzdelerinin toplamı her pozisyon ve
+    fiyat değişiminde yalnızca değişen pozisyonun eski katkısı çıkarılıp yenisi
+    eklenerek güncellenir; binlerce pozisyonlu bir portföyde de güncelleme başına
+    maliyet sabittir. Fiyatlar sürekli aktığından yuvarlama hatası birikmesin diye
+    toplamlar her recompute_every güncellemede pozisyonlardan baştan hesaplanır.
+    Eşzamanlı güncellemeler portföy başına kilitle sıraya girer.
+    version, portföyün depodaki sürümüdür (updated_at).
+    """
+
+    def __init__(self, portfolio_id: int, user_id: int, version: Optional[datetime] = None,
+                 recompute_every: int = PORTFOLIO_AGGREGATE_RECOMPUTE_EVERY):
+        self.id = portfolio_id
+        self.user_id = user_id
+        self.version = version
+        self.recompute_every = recompute_every
+        self.positions: Dict[str, Position] = {}
+        self.total_value = 0.0
+        self.total_cost = 0.0
+        self._profit_percentage_sum = 0.0
+        self._updates = 0
+        self.lock = threading.RLock()
+
+    @classmethod
+    def from_record(cls, record: Dict, quote: QuoteLookup) -> 'PortfolioAggregate':
+        """
+        PortfolioRepository.get_portfolio kaydından kurar
+        """
+        aggregate = cls(record['id'], record['user_id'], record['updated_at'])
+        for holding in record['holdings']:
+            name, price = quote(holding['symbol'])
+            aggregate.positions[holding['symbol']] = Position(
+                holding['symbol'], name, holding['quantity'], holding['average_price'], price)
+        aggregate.recompute()
+        return aggregate
+
+    @property
+    def profit(self) -> float:
+        return self.total_value - self.total_cost
+
+    @property
+    def daily_change(self) -> float:
+        # Mevcut API'deki tanım: pozisyon kâr yüzdelerinin ortalaması
+        return self._profit_percentage_sum / len(self.positions) if self.positions else 0.0
+
+    def set_position(self, symbol: str, quantity: float, average_price: float,
+                     name: Optional[str] = None, price: Optional[float] = None) -> Optional[Position]:
+        """
+        Pozisyonu verilen adet ve ortalama maliyete ayarlar; adet sıfırsa pozisyon kapanır
+        """
+        with self.lock:
+            position = self.positions.get(symbol)
+            if position is not None:
+                self._account(position, -1)
+            if quantity <= 0:
+                self.positions.pop(symbol, None)
+                self._updated()
+                return None
+            if position is None:
+                position = Position(symbol, name or symbol, quantity, average_price, price)
+                self.positions[symbol] = position
+            else:
+                position.quantity = quantity
+                position.average_price = average_price
+                if name is not None:
+                    position.name = name
+                if price is not None:
+                    position.price = price
+            self._account(position, 1)
+            self._updated()
+            return position
+
+    def remove(self, symbol: str) -> bool:
+        with self.lock:
+            position = self.positions.pop(symbol, None)
+            if position is None:
+                return False
+            self._account(position, -1)
+            self._updated()
+            return True
+
+    def update_price(self, symbol: str, price: float) -> bool:
+        """
+        Sembolün güncel fiyatını değiştirir; portföyde yoksa False
+        """
+        with self.lock:
+            position = self.positions.get(symbol)
+            if position is None:
+                return False
+            self._account(position, -1)
+            position.price = price
+            self._account(position, 1)
+            self._updated()
+            return True
+
+    def recompute(self):
+        """
+        Toplamları pozisyonlardan baştan hesaplar (artımlı toplamlardaki yuvarlama birikimini sıfırlar)
+        """
+        with self.lock:
+            positions = list(self.positions.values())
+            self.total_value = math.fsum(position.value for position in positions)
+            self.total_cost = math.fsum(position.cost for position in positions)
+            self._profit_percentage_sum = math.fsum(position.profit_percentage for position in positions)
+            self._updates = 0
+
+    def summary(self) -> Dict:
+        """
+        Pozisyon listesi olmadan portföy toplamları (sabit süre)
+        """
+        with self.lock:
+            return {
+                "id": self.id,
+                "userId": self.user_id,
+                "positions": len(self.positions),
+                "totalValue": self.total_value,
+                "totalCost": self.total_cost,
+                "profit": self.profit,
+                "dailyChange": self.daily_change,
+                "lastUpdated": (self.version or datetime.now()).isoformat(),
+            }
+
+    def to_dict(self) -> Dict:
+        """
+        API'nin Portfolio biçimi
+        """
+        with self.lock:
+            return {
+                "id": self.id,
+                "userId": self.user_id,
+                "stocks": [position.to_dict() for position in self.positions.values()],
+                "totalValue": self.total_value,
+                "dailyChange": self.daily_change,
+                "lastUpdated": (self.version or datetime.now()).isoformat(),
+            }
+
+    def _account(self, position: Position, sign: int):
+        self.total_value += sign * position.value
+        self.total_cost += sign * position.cost
+        self._profit_percentage_sum += sign * position.profit_percentage
+
+    def _updated(self):
+        self._updates += 1
+        if self._updates >= self.recompute_every:
+            self.recompute()
+
+
+class PortfolioAggregateStore:
+    """
+    Kullanıcı başına portföy toplamlarının süreç içi önbelleği.
+
+    Okumada yalnızca portföyün sürümü depodan sorulur; önbellekteki toplam aynı
+    sürümdeyse pozisyonlar yeniden okunmaz ve fiyatlanmaz. Yazmalar depodan dönen
+    değişiklik, önbellekteki sürümün hemen ardından geliyorsa yalnızca değişen
+    pozisyonlara uygulanır; aksi halde (ör. başka bir işçinin yazması araya
+    girdiyse) portföy depodan yeniden yüklenir. Sembol -> portföy indeksi sayesinde
+    bir fiyat değişimi yalnızca o sembolü tutan portföyleri dolaşır.
+    """
+
+    def __init__(self, repository: PortfolioRepository, quote: QuoteLookup,
+                 max_size: int = PORTFOLIO_AGGREGATE_CACHE_SIZE):
+        self.repository = repository
+        self.quote = quote
+        self.max_size = max_size
+        self._aggregates: 'OrderedDict[int, PortfolioAggregate]' = OrderedDict()
+        # Sembol -> o sembolde pozisyonu olan önbellekteki portföyler; kullanıcı -> indekslenmiş semboller
+        self._holders: Dict[str, Set[PortfolioAggregate]] = {}
+        self._indexed: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[PortfolioAggregate]:
+        version = self.repository.get_version(user_id)
+        aggregate = self._cached(user_id)
+        if aggregate is not None and version is not None and aggregate.version == version:
+            return aggregate
+        return self.reload(user_id)
+
+    def reload(self, user_id: int) -> Optional[PortfolioAggregate]:
+        record = self.repository.get_portfolio(user_id)
+        with self._lock:
+            if record is None:
+                self._evict(user_id)
+                return None
+            aggregate = PortfolioAggregate.from_record(record, self.quote)
+            self._evict(user_id)
+            self._aggregates[user_id] = aggregate
+            self._index(aggregate, aggregate.positions)
+            while len(self._aggregates) > self.max_size:
+                self._evict(next(iter(self._aggregates)))
+            return aggregate
+
+    def apply(self, change: Dict) -> Optional[PortfolioAggregate]:
+        """
+        PortfolioRepository yazmasının döndürdüğü değişikliği uygular
+        """
+        aggregate = self._cached(change['user_id'])
+        if aggregate is not None:
+            with aggregate.lock:
+                if aggregate.version == change['previous_version']:
+                    for symbol, holding in change['holdings'].items():
+                        if holding is None:
+                            aggregate.remove(symbol)
+                        else:
+                            name, price = self.quote(symbol)
+                            aggregate.set_position(symbol, holding['quantity'], holding['average_price'],
+                                                   name, price)
+                    aggregate.version = change['version']
+                    with self._lock:
+                        # Bu arada önbellekten çıkarıldıysa indekse geri eklenmez
+                        if self._aggregates.get(aggregate.user_id) is aggregate:
+                            opened = [symbol for symbol in change['holdings'] if symbol in aggregate.positions]
+                            self._unindex(aggregate, set(change['holdings']) - set(opened))
+                            self._index(aggregate, opened)
+                    return aggregate
+                if aggregate.version == change['version']:
+                    return aggregate
+        return self.reload(change['user_id'])
+
+    def update(self, write: Callable[..., Dict], *args) -> Optional[PortfolioAggregate]:
+        """
+        Depoya yazar (ör. repository.add_holdings) ve sonucu önbelleğe uygular
+        """
+        return self.apply(write(*args))
+
+    def update_price(self, symbol: str, price: float) -> int:
+        """
+        Sembolün fiyatını onu tutan önbellekteki portföylerde günceller; etkilenen portföy sayısını döndürür
+        """
+        with self._lock:
+            aggregates = list(self._holders.get(symbol, ()))
+        return sum(aggregate.update_price(symbol, price) for aggregate in aggregates)
+
+    def clear(self):
+        with self._lock:
+            self._aggregates.clear()
+            self._holders.clear()
+            self._indexed.clear()
+
+    def _index(self, aggregate: PortfolioAggregate, symbols: Iterable[str]):
+        indexed = self._indexed.setdefault(aggregate.user_id, set())
+        for symbol in symbols:
+            self._holders.setdefault(symbol, set()).add(aggregate)
+            indexed.add(symbol)
+
+    def _unindex(self, aggregate: PortfolioAggregate, symbols: Iterable[str]):
+        indexed = self._indexed.get(aggregate.user_id, set())
+        for symbol in symbols:
+            holders = self._holders.get(symbol)
+            if holders is not None:
+                holders.discard(aggregate)
+                if not holders:
+                    del self._holders[symbol]
+            indexed.discard(symbol)
+
+    def _evict(self, user_id: int):
+        """Portföyü önbellekten ve sembol indeksinden çıkarır; kilit altında çağrılmalıdır"""
+        aggregate = self._aggregates.pop(user_id, None)
+        if aggregate is not None:
+            self._unindex(aggregate, list(self._indexed.get(user_id, ())))
+        self._indexed.pop(user_id, None)
+
+    def _cached(self, user_id: int) -> Optional[PortfolioAggregate]:
+        with self._lock:
+            aggregate = self._aggregates.get(user_id)
+            if aggregate is not None:
+                self._aggregates.move_to_end(user_id)
+            return aggregate
@@ -1,12 +1,28 @@
+import threading
+from collections import OrderedDict
 from typing import Dict, List
 import numpy as np
 import pandas as pd
-from scipy.optimize import minimize
+from scipy.optimize import Bounds, OptimizeResult, minimize
 from sklearn.preprocessing import StandardScaler
 from pydantic import BaseModel
 
+from services.covariance_service import CovarianceService, get_covariance_service
+
 class PortfolioOptimizer:
-    def __init__(self):
+    def __init__(self, use_gradients: bool = True, warm_start: bool = True, max_solutions: int = 256,
+                 shrink_covariance: bool = False, covariance: CovarianceService = None):
+        # Analitik gradyan kapalıysa SLSQP sonlu farklara döner (karşılaştırma için)
+        self.use_gradients = use_gradients
+        # Aynı hisse kümesi ve profil için son çözüm bir sonraki çağrının başlangıç noktasıdır
+        self.warm_start = warm_start
+        self.max_solutions = max_solutions
+        self._solutions: OrderedDict = OrderedDict()
+        self._solutions_lock = threading.Lock()
+        # Aynı hisse kümesi için kovaryans yalnızca yeni günlerle güncellenir
+        self.covariance = covariance or get_covariance_service()
+        # Ledoit-Wolf daraltması; az gözlemli geniş listelerde kovaryansı kararlı tutar
+        self.shrink_covariance = shrink_covariance
         self.risk_weights = {
             'low': {'return': 0.2, 'risk': 0.8},
             'medium': {'return': 0.5, 'risk': 0.5},
@@ -18,24 +34,55 @@ class PortfolioOptimizer:
         """
         Modern Portföy Teorisi'ne göre portföy optimizasyonu yapar
         """
-        # Getirileri hesapla
-        returns = self._calculate_returns(stock_data)
-        
-        # Kovaryans matrisini hesapla
-        cov_matrix = returns.cov() * 252
-        exp_returns = returns.mean() * 252
+        symbols = list(stock_data.keys())
+        exp_returns, cov_matrix = self._estimate_moments(stock_data)
+        bounds = self._prepare_bounds(len(symbols), constraints)
 
-        # Optimizasyon kısıtlarını ayarla
-        constraints = self._prepare_constraints(constraints)
-        
         # Risk profiline göre hedef ağırlıkları belirle
-        weights = self._optimize_weights(exp_returns, cov_matrix, self.risk_weights[risk_profile])
+        weights = self._optimize_weights(exp_returns, cov_matrix, self.risk_weights[risk_profile],
+                                         bounds=bounds,
+                                         x0=self._warm_start(symbols, risk_profile, constraints))
+        self._remember_solution(symbols, risk_profile, constraints, weights)
 
-        # Portföy metriklerini hesapla
-        portfolio_metrics = self._calculate_portfolio_metrics(weights, exp_returns, cov_matrix)
+        return self._build_result(symbols, weights, exp_returns, cov_matrix)
 
+    def optimize_all_profiles(self, stock_data: Dict[str, pd.DataFrame],
+                              constraints: Dict = None) -> Dict[str, Dict]:
+        """
+        Tüm risk profilleri için tek çağrıda optimizasyon yapar; getiri ve kovaryans
+        bir kez hesaplanır, her profil bir öncekinin çözümünden başlar
+        """
+        symbols = list(stock_data.keys())
+        exp_returns, cov_matrix = self._estimate_moments(stock_data)
+        bounds = self._prepare_bounds(len(symbols), constraints)
+
+        results = {}
+        previous = None
+        for risk_profile, risk_weights in self.risk_weights.items():
+            x0 = self._warm_start(symbols, risk_profile, constraints)
+            if x0 is None:
+                x0 = previous
+            weights = self._optimize_weights(exp_returns, cov_matrix, risk_weights,
+                                             bounds=bounds, x0=x0)
+            self._remember_solution(symbols, risk_profile, constraints, weights)
+            results[risk_profile] = self._build_result(symbols, weights, exp_returns, cov_matrix)
+            previous = weights
+
+        return results
+
+    def _estimate_moments(self, stock_data: Dict[str, pd.DataFrame]):
+        """Yıllık beklenen getiri ve kovaryans matrisini hesaplar"""
+        returns = self._calculate_returns(stock_data)
+        mean, cov = self.covariance.moments(returns, annualize=252, shrink=self.shrink_covariance,
+                                            namespace='portfolio_optimizer')
+        return (pd.Series(mean, index=returns.columns),
+                pd.DataFrame(cov, index=returns.columns, columns=returns.columns))
+
+    def _build_result(self, symbols: List[str], weights: np.ndarray, exp_returns: pd.Series,
+                      cov_matrix: pd.DataFrame) -> Dict:
+        portfolio_metrics = self._calculate_portfolio_metrics(weights, exp_returns, cov_matrix)
         return {
-            'weights': dict(zip(stock_data.keys(), weights)),
+            'weights': dict(zip(symbols, weights)),
             'expected_return': portfolio_metrics['return'],
             'volatility': portfolio_metrics['volatility'],
             'sharpe_ratio': portfolio_metrics['sharpe_ratio']
@@ -48,47 +95,88 @@ class PortfolioOptimizer:
             returns_dict[symbol] = np.diff(np.log(data['close']))
         return pd.DataFrame(returns_dict)
 
-    def _prepare_constraints(self, constraints: Dict = None) -> List:
-        """Optimizasyon kısıtlarını hazırlar"""
+    def _prepare_constraints(self) -> List:
+        """Optimizasyon kısıtlarını hazırlar; ağırlık sınırları bounds ile verilir"""
+        return [
+            # Ağırlıklar toplamı 1 olmalı
+            {'type': 'eq', 'fun': lambda x: np.sum(x) - 1, 'jac': lambda x: np.ones_like(x)},
+        ]
+
+    def _prepare_bounds(self, n_assets: int, constraints: Dict = None) -> Bounds:
+        """Ağırlıkların pozitiflik ve min/max sınırlarını hazırlar"""
         if constraints is None:
             constraints = {}
 
-        default_constraints = [
-            {'type': 'eq', 'fun': lambda x: np.sum(x) - 1},  # Ağırlıklar toplamı 1 olmalı
-            {'type': 'ineq', 'fun': lambda x: x},  # Ağırlıklar pozitif olmalı
-        ]
+        min_weight = constraints.get('min_weight')
+        max_weight = constraints.get('max_weight')
+        lower = 0.0 if min_weight is None else max(0.0, min_weight)
+        upper = 1.0 if max_weight is None else min(1.0, max_weight)
 
-        if 'min_weight' in constraints:
-            default_constraints.append(
-                {'type': 'ineq', 'fun': lambda x: x - constraints['min_weight']}
-            )
+        if lower > upper or n_assets * lower > 1 + 1e-9 or n_assets * upper < 1 - 1e-9:
+            raise ValueError("Ağırlık sınırları ile toplamı 1 olan bir portföy oluşturulamaz")
 
-        if 'max_weight' in constraints:
-            default_constraints.append(
-                {'type': 'ineq', 'fun': lambda x: constraints['max_weight'] - x}
-            )
-
-        return default_constraints
+        return Bounds(np.full(n_assets, lower), np.full(n_assets, upper))
 
     def _optimize_weights(self, returns: pd.Series, cov_matrix: pd.DataFrame,
-                        risk_weights: Dict) -> np.ndarray:
+                        risk_weights: Dict, bounds: Bounds = None,
+                        x0: np.ndarray = None) -> np.ndarray:
         """Optimal portföy ağırlıklarını hesaplar"""
-        n_assets = len(returns)
-        init_weights = np.array([1/n_assets] * n_assets)
+        return self._solve(returns, cov_matrix, risk_weights, bounds, x0).x
+
+    def _solve(self, returns: pd.Series, cov_matrix: pd.DataFrame, risk_weights: Dict,
+               bounds: Bounds = None, x0: np.ndarray = None) -> OptimizeResult:
+        """SLSQP çözümünü (iterasyon ve değerlendirme sayılarıyla) döndürür"""
+        mu = np.asarray(returns, dtype=float)
+        cov = np.asarray(cov_matrix, dtype=float)
+        n_assets = len(mu)
+        if bounds is None:
+            bounds = self._prepare_bounds(n_assets)
+
+        if x0 is None or len(x0) != n_assets:
+            x0 = np.full(n_assets, 1 / n_assets)
+        x0 = np.clip(x0, bounds.lb, bounds.ub)
+
+        return_weight = risk_weights['return']
+        risk_weight = risk_weights['risk']
 
         def objective(weights):
-            portfolio_return = np.sum(returns * weights)
-            portfolio_volatility = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
-            
+            cov_weights = cov @ weights
+            portfolio_volatility = np.sqrt(max(weights @ cov_weights, 1e-16))
+
             # Risk-getiri trade-off'unu optimize et
-            return -(risk_weights['return'] * portfolio_return - 
-                    risk_weights['risk'] * portfolio_volatility)
+            value = -(return_weight * (mu @ weights) - risk_weight * portfolio_volatility)
+            # d(sqrt(w'Σw))/dw = Σw / sqrt(w'Σw)
+            gradient = -(return_weight * mu - risk_weight * cov_weights / portfolio_volatility)
+            return value, gradient
+
+        if self.use_gradients:
+            return minimize(objective, x0, jac=True, method='SLSQP', bounds=bounds,
+                            constraints=self._prepare_constraints())
 
-        result = minimize(objective, init_weights,
-                        method='SLSQP',
+        return minimize(lambda weights: objective(weights)[0], x0, method='SLSQP', bounds=bounds,
                         constraints=self._prepare_constraints())
 
-        return result.x
+    def _warm_start(self, symbols: List[str], risk_profile: str, constraints: Dict = None):
+        if not self.warm_start:
+            return None
+        with self._solutions_lock:
+            return self._solutions.get(self._solution_key(symbols, risk_profile, constraints))
+
+    def _remember_solution(self, symbols: List[str], risk_profile: str, constraints: Dict,
+                           weights: np.ndarray):
+        if self.warm_start:
+            key = self._solution_key(symbols, risk_profile, constraints)
+            with self._solutions_lock:
+                self._solutions[key] = weights
+                self._solutions.move_to_end(key)
+                while len(self._solutions) > self.max_solutions:
+                    self._solutions.popitem(last=False)
+
+    @staticmethod
+    def _solution_key(symbols: List[str], risk_profile: str, constraints: Dict = None):
+        constraints = constraints or {}
+        return (tuple(symbols), risk_profile,
+                constraints.get('min_weight'), constraints.get('max_weight'))
 
     def _calculate_portfolio_metrics(self, weights: np.ndarray, returns: pd.Series,
                                   cov_matrix: pd.DataFrame) -> Dict:
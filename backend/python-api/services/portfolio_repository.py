@@ -0,0 +1,502 @@
+from __future__ import annotations
+
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from utils.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+    from sqlalchemy import MetaData, Table
+    from sqlalchemy.engine import Connection, Engine
+
+# SQLAlchemy ilk veritabanı erişiminde yüklenir; uygulamanın açılışını yavaşlatmaz
+sqlalchemy = lazy_import('sqlalchemy')
+sqlalchemy_pool = lazy_import('sqlalchemy.pool')
+sqlalchemy_postgresql = lazy_import('sqlalchemy.dialects.postgresql')
+sqlalchemy_sqlite = lazy_import('sqlalchemy.dialects.sqlite')
+
+DATABASE_URL = os.getenv(
+    'DATABASE_URL',
+    'sqlite:///' + os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'financeai.db')
+)
+DATABASE_POOL_SIZE = int(os.getenv('DATABASE_POOL_SIZE', '5'))
+DATABASE_MAX_OVERFLOW = int(os.getenv('DATABASE_MAX_OVERFLOW', '10'))
+DATABASE_POOL_TIMEOUT_SECONDS = float(os.getenv('DATABASE_POOL_TIMEOUT_SECONDS', '10'))
+DATABASE_POOL_RECYCLE_SECONDS = int(os.getenv('DATABASE_POOL_RECYCLE_SECONDS', '1800'))
+
+# IN (...) listesindeki en fazla parametre (eski SQLite sürümlerinde sınır 999)
+MAX_IN_PARAMETERS = 500
+
+# Trade: (sembol, adet, fiyat)
+Trade = Tuple[str, float, float]
+
+class Schema(NamedTuple):
+    metadata: MetaData
+    portfolios: Table
+    portfolio_holdings: Table
+    transactions: Table
+
+
+@lru_cache(maxsize=None)
+def schema() -> Schema:
+    """
+    database/schema.sql ile aynı tablolar; yerelde SQLite üzerinde create_all ile
+    kurulabilir. SQLAlchemy'ye bağlı olduğundan ilk kullanımda bir kez oluşturulur.
+    """
+    sa = sqlalchemy
+    metadata = sa.MetaData()
+
+    portfolios = sa.Table(
+        'portfolios', metadata,
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('user_id', sa.Integer),
+        sa.Column('name', sa.String(100), nullable=False),
+        sa.Column('total_value', sa.Numeric(15, 2, asdecimal=False)),
+        sa.Column('cash_balance', sa.Numeric(15, 2, asdecimal=False)),
+        sa.Column('created_at', sa.DateTime, default=datetime.now),
+        sa.Column('updated_at', sa.DateTime, default=datetime.now),
+        sa.Index('portfolios_user_id', 'user_id'),
+        sa.UniqueConstraint('user_id', 'name', name='portfolios_user_name'),
+    )
+
+    portfolio_holdings = sa.Table(
+        'portfolio_holdings', metadata,
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('portfolio_id', sa.Integer, sa.ForeignKey('portfolios.id'), nullable=False),
+        sa.Column('symbol', sa.String(20), nullable=False),
+        sa.Column('quantity', sa.Numeric(15, 6, asdecimal=False), nullable=False),
+        sa.Column('average_price', sa.Numeric(15, 2, asdecimal=False), nullable=False),
+        sa.Column('last_updated', sa.DateTime, default=datetime.now),
+        sa.UniqueConstraint('portfolio_id', 'symbol', name='portfolio_holdings_portfolio_symbol'),
+    )
+
+    transactions = sa.Table(
+        'transactions', metadata,
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('portfolio_id', sa.Integer, sa.ForeignKey('portfolios.id'), nullable=False),
+        sa.Column('symbol', sa.String(20), nullable=False),
+        sa.Column('transaction_type', sa.String(10), nullable=False),
+        sa.Column('quantity', sa.Numeric(15, 6, asdecimal=False), nullable=False),
+        sa.Column('price', sa.Numeric(15, 2, asdecimal=False), nullable=False),
+        sa.Column('total_amount', sa.Numeric(15, 2, asdecimal=False), nullable=False),
+        sa.Column('transaction_date', sa.DateTime, default=datetime.now),
+    )
+
+    return Schema(metadata, portfolios, portfolio_holdings, transactions)
+
+
+class PortfolioNotFoundError(LookupError):
+    """İstenen portföy ya da portföydeki pozisyon bulunamadı"""
+
+
+class PortfolioWrite(NamedTuple):
+    connection: Connection
+    portfolio_id: int
+    previous_version: Optional[datetime]
+    version: datetime
+
+
+def create_database_engine(url: str = DATABASE_URL) -> Engine:
+    """
+    Bağlantı havuzlu engine oluşturur. PostgreSQL'de havuz boyutu ortam
+    değişkenlerinden alınır ve kopan bağlantılar kullanılmadan önce yoklanır;
+    SQLite'ta bağlantı thread'ler arasında paylaşılabilir, bellek içi veritabanı
+    tek bağlantıda tutulur.
+    """
+    if url.startswith('sqlite'):
+        if url in ('sqlite://', 'sqlite:///:memory:'):
+            return sqlalchemy.create_engine(url, connect_args={'check_same_thread': False},
+                                            poolclass=sqlalchemy_pool.StaticPool)
+        path = url.split(':///', 1)[-1]
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        return sqlalchemy.create_engine(url, connect_args={'check_same_thread': False})
+    return sqlalchemy.create_engine(url,
+                                    pool_size=DATABASE_POOL_SIZE,
+                                    max_overflow=DATABASE_MAX_OVERFLOW,
+                                    pool_timeout=DATABASE_POOL_TIMEOUT_SECONDS,
+                                    pool_recycle=DATABASE_POOL_RECYCLE_SECONDS,
+                                    pool_pre_ping=True)
+
+
+def merge_trades(trades: Iterable[Trade]) -> Dict[str, Tuple[float, float]]:
+    """
+    Aynı sembolün alımlarını tek satırda birleştirir: sembol -> (toplam adet, ağırlıklı ortalama fiyat).
+    Toplu upsert'te aynı satırın bir komutta iki kez güncellenmesini önler.
+    """
+    merged: Dict[str, Tuple[float, float]] = {}
+    for symbol, quantity, price in trades:
+        if quantity <= 0:
+            raise ValueError(f"{symbol} için adet pozitif olmalı")
+        if price <= 0:
+            raise ValueError(f"{symbol} için fiyat pozitif olmalı")
+        symbol = symbol.upper()
+        if symbol in merged:
+            old_quantity, old_price = merged[symbol]
+            total = old_quantity + quantity
+            merged[symbol] = (total, (old_quantity * old_price + quantity * price) / total)
+        else:
+            merged[symbol] = (float(quantity), float(price))
+    return merged
+
+
+class PortfolioRepository:
+    """
+    Portföy ve pozisyonların SQL deposu.
+
+    Okuma, portföy ile pozisyonlarını tek bir LEFT JOIN sorgusuyla (tek gidiş-dönüş)
+    getirir. Alımlar pozisyonlara tek bir toplu ON CONFLICT upsert'i ve tek bir
+    toplu işlem kaydıyla yazılır; ortalama maliyet veritabanında hesaplanır. Her
+    yazma portföy satırını kilitler ve updated_at'i sürüm olarak ilerletir, böylece
+    birden fazla uvicorn işçisi aynı durumu paylaşır. Yazmalar yalnızca değişen
+    pozisyonları, önceki ve yeni sürümle birlikte döndürür.
+    """
+
+    def __init__(self, engine: Optional[Engine] = None):
+        self._engine = engine
+        self._engine_lock = threading.Lock()
+
+    @property
+    def engine(self) -> Engine:
+        """
+        Bağlantı havuzu ilk veritabanı erişiminde oluşturulur
+        """
+        with self._engine_lock:
+            if self._engine is None:
+                self._engine = create_database_engine()
+            return self._engine
+
+    def create_schema(self):
+        """
+        Eksik tabloları oluşturur (PostgreSQL'de şema database/schema.sql ile kurulur)
+        """
+        schema().metadata.create_all(self.engine)
+
+    def get_portfolio(self, user_id: int) -> Optional[Dict]:
+        """
+        Kullanıcının (ilk) portföyünü pozisyonlarıyla döndürür; yoksa None
+        """
+        with self.engine.connect() as connection:
+            return self._load(connection, user_id)
+
+    def create_portfolio(self, user_id: int, name: str, trades: Iterable[Trade] = ()) -> Dict:
+        """
+        Kullanıcı için portföy yoksa oluşturur ve verilen alımları ekler. Aynı anda
+        başlayan işçilerden yalnızca portföy satırını ekleyebilen alımları da ekler;
+        (user_id, name) tekil olduğundan diğerlerinin eklemesi çakışmada atlanır.
+        """
+        with self.engine.begin() as connection:
+            if self._portfolio_id(connection, user_id) is None:
+                inserted = connection.execute(
+                    self._insert_ignoring_conflicts(connection, schema().portfolios)
+                    .values(user_id=user_id, name=name, cash_balance=0)
+                ).rowcount
+                if inserted == 1:
+                    self._buy(connection, self._portfolio_id(connection, user_id),
+                              merge_trades(trades), datetime.now())
+            return self._load(connection, user_id)
+
+    def get_version(self, user_id: int) -> Optional[datetime]:
+        """
+        Portföyün son değişiklik zamanı; önbellekteki bir portföyün güncel olup
+        olmadığını tüm pozisyonları okumadan anlamak için kullanılır
+        """
+        with self.engine.connect() as connection:
+            portfolios = schema().portfolios
+            return connection.execute(
+                sqlalchemy.select(portfolios.c.updated_at)
+                .where(portfolios.c.id == self._first_portfolio(user_id))
+            ).scalar()
+
+    def add_holdings(self, user_id: int, trades: Iterable[Trade]) -> Dict:
+        """
+        Alımları (sembol, adet, fiyat) pozisyonlara ekler; mevcut pozisyonun adedi
+        artar ve ortalama fiyatı ağırlıklı olarak güncellenir. Yalnızca değişen
+        pozisyonları döndürür (bkz. changes).
+        """
+        merged = merge_trades(trades)
+        with self.engine.begin() as connection:
+            portfolio_id, previous, now = self._lock_portfolio(connection, user_id)
+            self._buy(connection, portfolio_id, merged, now)
+            return self.changes(connection, portfolio_id, user_id, list(merged), previous, now)
+
+    def set_quantity(self, user_id: int, symbol: str, quantity: float, price: float) -> Dict:
+        """
+        Pozisyonun adedini değiştirir; fark, verilen fiyattan alım/satım olarak kaydedilir
+        """
+        if quantity <= 0:
+            raise ValueError("Adet pozitif olmalı")
+        symbol = symbol.upper()
+        with self.engine.begin() as connection:
+            portfolio_id, previous, now = self._lock_portfolio(connection, user_id)
+            portfolio_holdings = schema().portfolio_holdings
+            holding = portfolio_holdings.c
+            current = connection.execute(
+                sqlalchemy.select(holding.quantity)
+                .where(holding.portfolio_id == portfolio_id, holding.symbol == symbol)
+            ).scalar()
+            if current is None:
+                raise PortfolioNotFoundError(f"{symbol} portföyde bulunamadı")
+            connection.execute(
+                portfolio_holdings.update()
+                .where(holding.portfolio_id == portfolio_id, holding.symbol == symbol)
+                .values(quantity=quantity, last_updated=now)
+            )
+            if quantity != current:
+                self._record(connection, portfolio_id,
+                             [(symbol, 'BUY' if quantity > current else 'SELL', abs(quantity - current), price)], now)
+            self._touch(connection, portfolio_id, now)
+            return self.changes(connection, portfolio_id, user_id, [symbol], previous, now)
+
+    def remove_holding(self, user_id: int, symbol: str, price: float) -> Dict:
+        """
+        Pozisyonu kapatır; kalan adet verilen fiyattan satış olarak kaydedilir
+        """
+        symbol = symbol.upper()
+        with self.engine.begin() as connection:
+            portfolio_id, previous, now = self._lock_portfolio(connection, user_id)
+            portfolio_holdings = schema().portfolio_holdings
+            holding = portfolio_holdings.c
+            removed = connection.execute(
+                sqlalchemy.select(holding.quantity)
+                .where(holding.portfolio_id == portfolio_id, holding.symbol == symbol)
+            ).scalar()
+            if removed is None:
+                return self.changes(connection, portfolio_id, user_id, [], previous, previous)
+            connection.execute(
+                portfolio_holdings.delete()
+                .where(holding.portfolio_id == portfolio_id, holding.symbol == symbol)
+            )
+            self._record(connection, portfolio_id, [(symbol, 'SELL', removed, price)], now)
+            self._touch(connection, portfolio_id, now)
+            return self.changes(connection, portfolio_id, user_id, [symbol], previous, now)
+
+    def _buy(self, connection: Connection, portfolio_id: int,
+             merged: Dict[str, Tuple[float, float]], now: datetime):
+        if not merged:
+            return
+        rows = [{'portfolio_id': portfolio_id, 'symbol': symbol, 'quantity': quantity,
+                 'average_price': price, 'last_updated': now}
+                for symbol, (quantity, price) in merged.items()]
+        self._upsert(connection, rows)
+        self._record(connection, portfolio_id,
+                     [(symbol, 'BUY', quantity, price) for symbol, (quantity, price) in merged.items()], now)
+        self._touch(connection, portfolio_id, now)
+
+    @contextmanager
+    def write_portfolio(self, user_id: int) -> Iterator[PortfolioWrite]:
+        """
+        Tek transaction içinde, portföy satırı kilitliyken toplu yazma yapmak için
+        (ör. işlem içe aktarma). Blok hatayla çıkarsa tüm yazmalar geri alınır.
+        """
+        with self.engine.begin() as connection:
+            portfolio_id, previous, now = self._lock_portfolio(connection, user_id)
+            yield PortfolioWrite(connection, portfolio_id, previous, now)
+
+    @staticmethod
+    def holdings(connection: Connection, portfolio_id: int) -> Dict[str, Tuple[float, float]]:
+        """
+        Portföyün pozisyonları: sembol -> (adet, ortalama fiyat)
+        """
+        portfolio_holdings = schema().portfolio_holdings
+        holding = portfolio_holdings.c
+        rows = connection.execute(
+            sqlalchemy.select(holding.symbol, holding.quantity, holding.average_price)
+            .where(holding.portfolio_id == portfolio_id)
+        ).all()
+        return {row.symbol: (row.quantity, row.average_price) for row in rows}
+
+    def replace_holdings(self, connection: Connection, portfolio_id: int,
+                         holdings: Dict[str, Tuple[float, float]], now: datetime):
+        """
+        Verilen sembollerin pozisyonlarını (adet, ortalama fiyat) ile değiştirir; adedi
+        sıfır olanları siler. Diğer pozisyonlara dokunmaz.
+        """
+        rows = [{'portfolio_id': portfolio_id, 'symbol': symbol, 'quantity': quantity,
+                 'average_price': price, 'last_updated': now}
+                for symbol, (quantity, price) in holdings.items() if quantity > 0]
+        closed = [symbol for symbol, (quantity, _) in holdings.items() if quantity <= 0]
+        if rows:
+            self._upsert(connection, rows, accumulate=False)
+        portfolio_holdings = schema().portfolio_holdings
+        holding = portfolio_holdings.c
+        for start in range(0, len(closed), MAX_IN_PARAMETERS):
+            connection.execute(
+                portfolio_holdings.delete()
+                .where(holding.portfolio_id == portfolio_id,
+                       holding.symbol.in_(closed[start:start + MAX_IN_PARAMETERS]))
+            )
+        self._touch(connection, portfolio_id, now)
+
+    @staticmethod
+    def record_transactions(connection: Connection, portfolio_id: int,
+                            entries: Iterable[Tuple[str, str, float, float, datetime]]):
+        """
+        İşlemleri (sembol, tür, adet, fiyat, tarih) tek toplu insert ile kaydeder
+        """
+        rows = [{'portfolio_id': portfolio_id, 'symbol': symbol, 'transaction_type': kind,
+                 'quantity': quantity, 'price': price, 'total_amount': quantity * price,
+                 'transaction_date': date}
+                for symbol, kind, quantity, price, date in entries]
+        if rows:
+            connection.execute(schema().transactions.insert(), rows)
+
+    @staticmethod
+    def _upsert(connection: Connection, rows: List[Dict], accumulate: bool = True):
+        """
+        Pozisyonları tek komutla (executemany) ekler; mevcut pozisyon accumulate ise
+        gelen alımla birleştirilir, değilse gelen değerlerle değiştirilir
+        """
+        dialect = connection.dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise ValueError(f"Desteklenmeyen veritabanı: {dialect}")
+
+        portfolio_holdings = schema().portfolio_holdings
+        holding = portfolio_holdings.c
+        statement = insert(portfolio_holdings)
+        incoming = statement.excluded
+        if accumulate:
+            total = holding.quantity + incoming.quantity
+            values = {
+                'quantity': total,
+                'average_price': (holding.quantity * holding.average_price
+                                  + incoming.quantity * incoming.average_price) / total,
+            }
+        else:
+            values = {'quantity': incoming.quantity, 'average_price': incoming.average_price}
+        statement = statement.on_conflict_do_update(
+            index_elements=[holding.portfolio_id, holding.symbol],
+            set_={**values, 'last_updated': incoming.last_updated},
+        )
+        connection.execute(statement, rows)
+
+    @classmethod
+    def _record(cls, connection: Connection, portfolio_id: int,
+                entries: Iterable[Tuple[str, str, float, float]], now: datetime):
+        cls.record_transactions(connection, portfolio_id,
+                                [(symbol, kind, quantity, price, now) for symbol, kind, quantity, price in entries])
+
+    @staticmethod
+    def _touch(connection: Connection, portfolio_id: int, now: datetime):
+        portfolios = schema().portfolios
+        connection.execute(portfolios.update().where(portfolios.c.id == portfolio_id).values(updated_at=now))
+
+    @staticmethod
+    def _insert_ignoring_conflicts(connection: Connection, table: Table):
+        """Tekil kısıtla çakışan satırı eklemeyen INSERT (ON CONFLICT DO NOTHING)"""
+        dialect = connection.dialect.name
+        if dialect == 'postgresql':
+            return sqlalchemy_postgresql.insert(table).on_conflict_do_nothing()
+        if dialect == 'sqlite':
+            return sqlalchemy_sqlite.insert(table).on_conflict_do_nothing()
+        return table.insert()
+
+    @staticmethod
+    def _first_portfolio(user_id: int):
+        portfolios = schema().portfolios
+        return (sqlalchemy.select(sqlalchemy.func.min(portfolios.c.id))
+                .where(portfolios.c.user_id == user_id)
+                .scalar_subquery())
+
+    def _portfolio_id(self, connection: Connection, user_id: int) -> Optional[int]:
+        return connection.execute(sqlalchemy.select(self._first_portfolio(user_id))).scalar()
+
+    def _lock_portfolio(self, connection: Connection, user_id: int) -> Tuple[int, Optional[datetime], datetime]:
+        """
+        Portföy satırını kilitler (aynı portföye eşzamanlı yazmalar sıraya girer) ve
+        (portföy id, önceki sürüm, yeni sürüm) döndürür. Yeni sürüm öncekinden kesin
+        büyüktür, böylece aynı mikrosaniyedeki iki yazma aynı sürümü almaz.
+        """
+        portfolios = schema().portfolios
+        row = connection.execute(
+            sqlalchemy.select(portfolios.c.id, portfolios.c.updated_at)
+            .where(portfolios.c.id == self._first_portfolio(user_id))
+            .with_for_update()
+        ).first()
+        if row is None:
+            raise PortfolioNotFoundError("Portföy bulunamadı")
+        now = datetime.now()
+        if row.updated_at is not None and now <= row.updated_at:
+            now = row.updated_at + timedelta(microseconds=1)
+        return row.id, row.updated_at, now
+
+    @staticmethod
+    def changes(connection: Connection, portfolio_id: int, user_id: int, symbols: List[str],
+                 previous: Optional[datetime], version: Optional[datetime]) -> Dict:
+        """
+        Yazmanın etkilediği pozisyonların güncel hali: holdings, sembol -> {'quantity',
+        'average_price'} (pozisyon kapandıysa None). previous_version, önbellekteki
+        portföyün bu değişikliği artımlı uygulayabilmesi için yazmadan önceki sürümdür.
+        """
+        portfolio_holdings = schema().portfolio_holdings
+        holding = portfolio_holdings.c
+        query = (sqlalchemy.select(holding.symbol, holding.quantity, holding.average_price)
+                 .where(holding.portfolio_id == portfolio_id))
+        if len(symbols) <= MAX_IN_PARAMETERS:
+            # Çok sembol etkilendiyse (toplu içe aktarma) tüm pozisyonlar okunur
+            query = query.where(holding.symbol.in_(symbols))
+        rows = connection.execute(query).all() if symbols else []
+        current = {row.symbol: {'quantity': row.quantity, 'average_price': row.average_price} for row in rows}
+        return {
+            'id': portfolio_id,
+            'user_id': user_id,
+            'previous_version': previous,
+            'version': version,
+            'holdings': {symbol: current.get(symbol) for symbol in symbols},
+        }
+
+    def _load(self, connection: Connection, user_id: int) -> Optional[Dict]:
+        tables = schema()
+        portfolios, portfolio_holdings = tables.portfolios, tables.portfolio_holdings
+        holding = portfolio_holdings.c
+        rows = connection.execute(
+            sqlalchemy.select(portfolios.c.id, portfolios.c.user_id, portfolios.c.name,
+                              portfolios.c.cash_balance, portfolios.c.updated_at,
+                              holding.symbol, holding.quantity, holding.average_price, holding.last_updated)
+            .select_from(portfolios.outerjoin(portfolio_holdings))
+            .where(portfolios.c.id == self._first_portfolio(user_id))
+            .order_by(holding.id)
+        ).all()
+        if not rows:
+            return None
+
+        first = rows[0]
+        return {
+            'id': first.id,
+            'user_id': first.user_id,
+            'name': first.name,
+            'cash_balance': first.cash_balance,
+            'updated_at': first.updated_at,
+            'holdings': [
+                {
+                    'symbol': row.symbol,
+                    'quantity': row.quantity,
+                    'average_price': row.average_price,
+                    'last_updated': row.last_updated,
+                }
+                for row in rows if row.symbol is not None
+            ],
+        }
+
+
+_default_repository: Optional[PortfolioRepository] = None
+_default_repository_lock = threading.Lock()
+
+
+def get_portfolio_repository() -> PortfolioRepository:
+    """
+    Süreç genelinde tek portföy deposunu (ve bağlantı havuzunu) döndürür
+    """
+    global _default_repository
+    with _default_repository_lock:
+        if _default_repository is None:
+            _default_repository = PortfolioRepository()
+        return _default_repository
@@ -0,0 +1,530 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from utils.lazy_import import lazy_import
+
+try:
+    import fcntl
+except ImportError:  # Windows: yalnızca süreç içi kilit
+    fcntl = None
+
+# pandas ve yfinance ilk fiyat isteğinde yüklenir
+pd = lazy_import('pandas')
+yf = lazy_import('yfinance')
+
+# Diskte tutulan günlük bar kolonları
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+DATE_COLUMN = 'Date'
+
+# yfinance period değerlerinin gün karşılıkları
+PERIOD_DAYS = {
+    '1d': 1,
+    '5d': 5,
+    '1mo': 30,
+    '3mo': 91,
+    '6mo': 182,
+    '1y': 365,
+    '2y': 730,
+    '5y': 1826,
+    '10y': 3652,
+}
+
+PRICE_STORE_DIR = os.getenv(
+    'PRICE_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'prices')
+)
+PRICE_STORE_OFFLINE = os.getenv('PRICE_STORE_OFFLINE', 'false').lower() in ('1', 'true', 'yes')
+PRICE_STORE_REFRESH_SECONDS = int(os.getenv('PRICE_STORE_REFRESH_SECONDS', '900'))
+PRICE_STORE_INFO_TTL_SECONDS = int(os.getenv('PRICE_STORE_INFO_TTL_SECONDS', '86400'))
+PRICE_STORE_INFO_WORKERS = int(os.getenv('PRICE_STORE_INFO_WORKERS', '8'))
+
+
+class PriceDataProvider:
+    """
+    Günlük fiyat verisi sağlayıcıları için temel arayüz
+    """
+
+    def fetch_history(self, symbol: str, start: Optional[datetime] = None,
+                      end: Optional[datetime] = None) -> pd.DataFrame:
+        """[start, end) aralığındaki günlük barları döndürür; start None ise tüm geçmiş"""
+        raise NotImplementedError
+
+    def fetch_history_bulk(self, symbols: List[str], start: Optional[datetime] = None,
+                           end: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        """Birden çok sembolün barlarını döndürür; varsayılan olarak tek tek çeker"""
+        return {symbol: self.fetch_history(symbol, start, end) for symbol in symbols}
+
+    def fetch_info(self, symbol: str) -> Dict:
+        """Hisse senedi künye bilgilerini döndürür"""
+        return {}
+
+
+class YahooFinanceProvider(PriceDataProvider):
+    """
+    Yahoo Finance üzerinden veri sağlar
+    """
+
+    def fetch_history(self, symbol: str, start: Optional[datetime] = None,
+                      end: Optional[datetime] = None) -> pd.DataFrame:
+        stock = yf.Ticker(symbol)
+        if start is None:
+            return stock.history(period="max", interval="1d")
+        return stock.history(start=start, end=end, interval="1d")
+
+    def fetch_history_bulk(self, symbols: List[str], start: Optional[datetime] = None,
+                           end: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        if start is None:
+            data = yf.download(symbols, period="max", interval="1d", group_by="ticker",
+                               auto_adjust=True, threads=True, progress=False)
+        else:
+            data = yf.download(symbols, start=start, end=end, interval="1d", group_by="ticker",
+                               auto_adjust=True, threads=True, progress=False)
+
+        frames = {}
+        for symbol in symbols:
+            if symbol in data.columns.get_level_values(0):
+                frames[symbol] = data[symbol].dropna(how='all')
+        return frames
+
+    def fetch_info(self, symbol: str) -> Dict:
+        return dict(yf.Ticker(symbol).info or {})
+
+
+class PriceHistoryStore:
+    """
+    Sembol başına kolon bazlı günlük bar deposu.
+
+    Her sembol için bir dizin ve her kolon için ham little-endian bir dosya tutulur
+    (Date int64 ns, diğerleri float64). Okumalar np.memmap ile yapılır; upstream'e
+    yalnızca depoda olmayan baş/son kısım için gidilir. Sağlayıcı verilmezse depo
+    tamamen çevrimdışı çalışır ve sadece kayıtlı veriyi sunar.
+
+    Kolon dosyaları yerinde değiştirilmez: her yazma yeni bir sürüm dizini oluşturur
+    ve meta.json'daki sürüm tek bir os.replace ile ona çevrilir; böylece okuyucular
+    uzunlukları farklı kolonlar görmez, başka süreçlerin memmap ettiği dosyalar da
+    kısaltılmaz. Aynı dizini paylaşan işçi süreçleri sembol başına dosya kilidiyle
+    sıraya girer.
+    """
+
+    def __init__(self, root_dir: str = PRICE_STORE_DIR,
+                 provider: Optional[PriceDataProvider] = None,
+                 refresh_interval: int = PRICE_STORE_REFRESH_SECONDS,
+                 info_ttl: int = PRICE_STORE_INFO_TTL_SECONDS):
+        self.root_dir = root_dir
+        self.provider = provider
+        self.refresh_interval = refresh_interval
+        self.info_ttl = info_ttl
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._listeners: List[Callable[[str], None]] = []
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def get_history(self, symbol: str, period: Optional[str] = None,
+                    start: Optional[datetime] = None,
+                    end: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        yfinance history() ile aynı şekilde (Open/High/Low/Close/Volume, Date index)
+        istenen dilimi döndürür; eksik kısımlar önce upstream'den tamamlanır
+        """
+        period = self._validate_period(period, start)
+        fetch_start = self._fetch_start(period, start)
+
+        changed = False
+        with self._lock(symbol):
+            if self.provider is not None:
+                for kind, since, until in self._plan_sync(symbol, fetch_start, end):
+                    frame = self.provider.fetch_history(symbol, since, until)
+                    changed |= self._apply_sync(symbol, kind, frame, fetch_start)
+            history = self._read_slice(symbol, period, start, end)
+        if changed:
+            self._notify(symbol)
+        return history
+
+    def get_history_bulk(self, symbols: List[str], period: Optional[str] = None,
+                         start: Optional[datetime] = None,
+                         end: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Birden çok sembolün dilimlerini döndürür; eksik kısımlar her eksik türü
+        (ilk yükleme, baş, son) için tek bir toplu upstream isteğiyle tamamlanır
+        """
+        period = self._validate_period(period, start)
+        fetch_start = self._fetch_start(period, start)
+
+        changed = set()
+        if self.provider is not None:
+            plans = {}
+            for symbol in symbols:
+                with self._lock(symbol):
+                    plans[symbol] = self._plan_sync(symbol, fetch_start, end)
+
+            for kind in ('full', 'head', 'tail'):
+                actions = {
+                    symbol: action
+                    for symbol, plan in plans.items()
+                    for action in plan if action[0] == kind
+                }
+                if not actions:
+                    continue
+                # Aynı türdeki eksikler en geniş aralıkla tek seferde çekilir;
+                # her sembol kendi eksiğine düşen barları _apply_sync içinde ayıklar
+                starts = [since for _, since, _ in actions.values()]
+                untils = [until for _, _, until in actions.values()]
+                since = None if any(s is None for s in starts) else min(starts)
+                until = None if any(u is None for u in untils) else max(untils)
+                frames = self.provider.fetch_history_bulk(list(actions), since, until)
+                for symbol in actions:
+                    with self._lock(symbol):
+                        if self._apply_sync(symbol, kind, frames.get(symbol), fetch_start):
+                            changed.add(symbol)
+
+        result = {}
+        for symbol in symbols:
+            with self._lock(symbol):
+                result[symbol] = self._read_slice(symbol, period, start, end)
+        for symbol in changed:
+            self._notify(symbol)
+        return result
+
+    def get_price_panel(self, symbols: List[str], period: Optional[str] = None,
+                        start: Optional[datetime] = None,
+                        end: Optional[datetime] = None,
+                        field: str = 'Close') -> pd.DataFrame:
+        """
+        Sembollerin tek bir kolonunu tarih x sembol hizalanmış bir tablo olarak döndürür
+        """
+        frames = self.get_history_bulk(symbols, period=period, start=start, end=end)
+        panel = pd.concat({symbol: frames[symbol][field] for symbol in symbols}, axis=1)
+        return panel.reindex(columns=symbols)
+
+    def get_info(self, symbol: str) -> Dict:
+        """
+        Künye bilgilerini diskten, süresi dolmuşsa sağlayıcıdan döndürür
+        """
+        path = os.path.join(self._symbol_dir(symbol), 'info.json')
+        with self._lock(symbol):
+            cached = self._load_json(path)
+            if self.provider is None:
+                return cached.get('info', {})
+            if cached and time.time() - cached.get('fetched_at', 0) < self.info_ttl:
+                return cached['info']
+            try:
+                info = self.provider.fetch_info(symbol)
+            except Exception:
+                # Upstream'e ulaşılamıyorsa eski künyeyle devam et
+                return cached.get('info', {})
+            self._save_json(path, {'fetched_at': time.time(), 'info': info})
+            return info
+
+    def get_info_bulk(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        Künye bilgilerini sınırlı bir iş parçacığı havuzunda eşzamanlı olarak getirir
+        """
+        executor = self._info_executor()
+        return dict(zip(symbols, executor.map(self.get_info, symbols)))
+
+    def add_listener(self, callback: Callable[[str], None]):
+        """
+        Bir sembolün barları değiştiğinde sembol adıyla çağrılacak fonksiyonu kaydeder
+        (ör. yanıt önbelleğini geçersiz kılmak için); çağrı kilit dışında yapılır
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, symbol: str):
+        for callback in list(self._listeners):
+            try:
+                callback(symbol)
+            except Exception:
+                # Dinleyici hatası okuma/yazma sonucunu etkilemez
+                pass
+
+    def write_history(self, symbol: str, frame: pd.DataFrame):
+        """
+        Verilen barlarla sembolün deposunu baştan yazar (kayıtlı veri seti yüklemek için)
+        """
+        with self._lock(symbol):
+            meta = self._load_meta(symbol)
+            meta['covered_from'] = None
+            meta['last_checked'] = time.time()
+            self._publish(symbol, meta, self._rewrite(symbol, frame))
+        self._notify(symbol)
+
+    def _plan_sync(self, symbol: str, fetch_start: Optional[datetime],
+                   end: Optional[datetime]) -> List[Tuple[str, Optional[datetime], Optional[datetime]]]:
+        """Depoda eksik olan kısımlar için (tür, başlangıç, bitiş) upstream isteklerini belirler"""
+        dates, _ = self._read(symbol)
+        if len(dates) == 0:
+            return [('full', fetch_start, None)]
+
+        meta = self._load_meta(symbol)
+        first_date = pd.Timestamp(dates[0])
+        last_date = pd.Timestamp(dates[-1])
+        actions = []
+
+        # Baş kısım: daha önce istenenden daha eski bir başlangıç istendiyse
+        covered_from = meta.get('covered_from', first_date.isoformat())
+        if covered_from is not None and (fetch_start is None or fetch_start < datetime.fromisoformat(covered_from)):
+            actions.append(('head', fetch_start, first_date.to_pydatetime()))
+
+        # Son kısım: geçmişe dönük bir dilim istenmiyorsa ve yenileme süresi dolduysa.
+        # Son bar gün içinde değişmiş olabilir; o günden itibaren yeniden çekilir
+        wants_tail = end is None or self._naive(end) > last_date
+        if wants_tail and time.time() - meta.get('last_checked', 0) >= self.refresh_interval:
+            actions.append(('tail', last_date.to_pydatetime(), None))
+
+        return actions
+
+    def _apply_sync(self, symbol: str, kind: str, frame: Optional[pd.DataFrame],
+                    fetch_start: Optional[datetime]) -> bool:
+        """
+        Upstream'den gelen barları deponun o anki durumuna göre birleştirir;
+        barlar değiştiyse True döndürür
+        """
+        frame = self._normalize(frame)
+        meta = self._load_meta(symbol)
+        dates, columns = self._read(symbol, meta)
+        version = None
+
+        if len(dates) == 0:
+            version = self._rewrite(symbol, frame)
+            kind = 'full'
+        elif kind == 'head':
+            head = frame[frame.index < pd.Timestamp(dates[0])]
+            if not head.empty:
+                version = self._rewrite(symbol, pd.concat([head, self._to_frame(dates, columns)]))
+        else:
+            # Son bar gün içinde değişmiş olabilir; o günden itibaren yeni barlarla değiştirilir
+            tail = frame[frame.index >= pd.Timestamp(dates[-1])]
+            if not tail.empty:
+                keep = int(np.searchsorted(dates, tail.index[0].value, side='left'))
+                version = self._write_version(symbol, np.concatenate([dates[:keep], tail.index.asi8]), {
+                    name: np.concatenate([columns[name][:keep], tail[name].to_numpy(dtype=np.float64)])
+                    for name in PRICE_COLUMNS
+                })
+
+        if kind in ('full', 'head'):
+            meta['covered_from'] = None if fetch_start is None else fetch_start.isoformat()
+        if kind in ('full', 'tail'):
+            meta['last_checked'] = time.time()
+        if version is None:
+            self._save_meta(symbol, meta)
+        else:
+            self._publish(symbol, meta, version)
+        return version is not None and not (kind == 'full' and frame.empty)
+
+    def _read_slice(self, symbol: str, period: Optional[str],
+                    start: Optional[datetime], end: Optional[datetime]) -> pd.DataFrame:
+        """İstenen dilimi kopyalar; kilit altında çağrılmalıdır ki sonraki eklemeler etkilemesin"""
+        dates, columns = self._read(symbol)
+        lo, hi = self._slice_bounds(dates, period, start, end)
+        return self._to_frame(dates[lo:hi], {name: col[lo:hi] for name, col in columns.items()})
+
+    @staticmethod
+    def _validate_period(period: Optional[str], start: Optional[datetime]) -> Optional[str]:
+        if period is None and start is None:
+            period = '1mo'
+        if period is not None and period not in ('ytd', 'max') and period not in PERIOD_DAYS:
+            raise ValueError(f"Geçersiz periyot: {period}")
+        return period
+
+    def _fetch_start(self, period: Optional[str], start: Optional[datetime]) -> Optional[datetime]:
+        """Upstream'den en az hangi tarihten itibaren veri gerektiğini belirler"""
+        if start is not None:
+            return self._naive(start).normalize().to_pydatetime()
+        if period == 'max':
+            return None
+        # Hafta sonu ve tatiller için birkaç günlük pay bırakılır; dilim son bara göre kesilir
+        today = pd.Timestamp.now().normalize()
+        if period == 'ytd':
+            return (today.replace(month=1, day=1) - timedelta(days=7)).to_pydatetime()
+        return (today - timedelta(days=PERIOD_DAYS[period] + 7)).to_pydatetime()
+
+    def _slice_bounds(self, dates: np.ndarray, period: Optional[str],
+                      start: Optional[datetime], end: Optional[datetime]):
+        """Depodaki tarihler üzerinde istenen dilimin indekslerini bulur"""
+        if len(dates) == 0:
+            return 0, 0
+
+        if start is not None:
+            lo = int(np.searchsorted(dates, self._to_ns(start), side='left'))
+        elif period == 'max':
+            lo = 0
+        else:
+            # Periyotlar son bara göre hesaplanır; böylece kayıtlı veri setleri de çalışır
+            last = pd.Timestamp(dates[-1])
+            if period == 'ytd':
+                first = last.replace(month=1, day=1)
+            else:
+                first = last - timedelta(days=PERIOD_DAYS[period] - 1)
+            lo = int(np.searchsorted(dates, first.value, side='left'))
+
+        hi = len(dates) if end is None else int(np.searchsorted(dates, self._to_ns(end), side='left'))
+        return lo, max(lo, hi)
+
+    def _normalize(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Upstream çıktısını saat diliminden arındırılmış günlük barlara çevirir"""
+        if frame is None or frame.empty:
+            return pd.DataFrame(columns=PRICE_COLUMNS, index=pd.DatetimeIndex([], name=DATE_COLUMN))
+        index = pd.DatetimeIndex(frame.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        normalized = pd.DataFrame(
+            {column: frame[column].to_numpy(dtype=np.float64) for column in PRICE_COLUMNS},
+            index=index.normalize().as_unit('ns').rename(DATE_COLUMN)
+        )
+        normalized = normalized[~normalized.index.duplicated(keep='last')]
+        return normalized.sort_index()
+
+    def _to_frame(self, dates: np.ndarray, columns: Dict[str, np.ndarray]) -> pd.DataFrame:
+        index = pd.DatetimeIndex(np.array(dates, dtype='datetime64[ns]'), name=DATE_COLUMN)
+        return pd.DataFrame({name: np.array(columns[name]) for name in PRICE_COLUMNS}, index=index)
+
+    def _read(self, symbol: str, meta: Optional[Dict] = None):
+        """Sembolün meta.json'daki sürümünün kolonlarını bellek eşlemeli olarak okur"""
+        paths = self._column_paths(self._data_dir(symbol, meta))
+        sizes = [os.path.getsize(p) if os.path.exists(p) else 0 for p in paths.values()]
+        n_rows = min(sizes) // 8
+
+        if n_rows == 0:
+            empty = np.empty(0, dtype=np.float64)
+            return np.empty(0, dtype=np.int64), {name: empty for name in PRICE_COLUMNS}
+
+        dates = np.memmap(paths[DATE_COLUMN], dtype='<i8', mode='r', shape=(n_rows,))
+        columns = {
+            name: np.memmap(paths[name], dtype='<f8', mode='r', shape=(n_rows,))
+            for name in PRICE_COLUMNS
+        }
+        return dates, columns
+
+    def _rewrite(self, symbol: str, frame: pd.DataFrame) -> str:
+        """Barları yeni bir sürüm dizinine yazar; sürüm _publish ile görünür olur"""
+        frame = self._normalize(frame)
+        return self._write_version(symbol, frame.index.asi8,
+                                   {name: frame[name].to_numpy(dtype=np.float64) for name in PRICE_COLUMNS})
+
+    def _write_version(self, symbol: str, dates: np.ndarray, columns: Dict[str, np.ndarray]) -> str:
+        """Kolonları yeni bir sürüm dizinine yazar ve sürüm adını döndürür"""
+        version = f"{time.time_ns()}-{os.getpid()}"
+        directory = os.path.join(self._symbol_dir(symbol), version)
+        os.makedirs(directory)
+        paths = self._column_paths(directory)
+        with open(paths[DATE_COLUMN], 'wb') as f:
+            f.write(np.asarray(dates, dtype='<i8').tobytes())
+        for name in PRICE_COLUMNS:
+            with open(paths[name], 'wb') as f:
+                f.write(np.asarray(columns[name], dtype='<f8').tobytes())
+        return version
+
+    def _publish(self, symbol: str, meta: Dict, version: str):
+        """meta.json'u yeni sürüme tek adımda çevirir ve eski sürümleri siler"""
+        meta['version'] = version
+        self._save_meta(symbol, meta)
+        directory = self._symbol_dir(symbol)
+        # Silinen dosyaları memmap etmiş okuyucular etkilenmez; dosyalar kısaltılmaz
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name != version and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+        for path in self._column_paths(directory).values():
+            if os.path.exists(path):
+                os.remove(path)
+
+    @staticmethod
+    def _column_paths(directory: str) -> Dict[str, str]:
+        paths = {DATE_COLUMN: os.path.join(directory, f'{DATE_COLUMN}.i8')}
+        paths.update({name: os.path.join(directory, f'{name}.f8') for name in PRICE_COLUMNS})
+        return paths
+
+    def _data_dir(self, symbol: str, meta: Optional[Dict] = None) -> str:
+        """Güncel sürümün dizini; sürümsüz eski düzende kolonlar sembol dizinindedir"""
+        version = (self._load_meta(symbol) if meta is None else meta).get('version')
+        directory = self._symbol_dir(symbol)
+        return directory if version is None else os.path.join(directory, version)
+
+    def _symbol_dir(self, symbol: str) -> str:
+        return os.path.join(self.root_dir, symbol.upper().replace('/', '_'))
+
+    def _load_meta(self, symbol: str) -> Dict:
+        return self._load_json(os.path.join(self._symbol_dir(symbol), 'meta.json'))
+
+    def _save_meta(self, symbol: str, meta: Dict):
+        self._save_json(os.path.join(self._symbol_dir(symbol), 'meta.json'), meta)
+
+    @staticmethod
+    def _load_json(path: str) -> Dict:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _save_json(path: str, data: Dict):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, default=str)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _naive(value) -> pd.Timestamp:
+        timestamp = pd.Timestamp(value)
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_localize(None)
+        return timestamp
+
+    def _to_ns(self, value) -> int:
+        return self._naive(value).value
+
+    def _info_executor(self) -> ThreadPoolExecutor:
+        with self._locks_guard:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=PRICE_STORE_INFO_WORKERS,
+                                                    thread_name_prefix='price-store-info')
+            return self._executor
+
+    @contextmanager
+    def _lock(self, symbol: str) -> Iterator[None]:
+        """Sembolü bu süreçteki thread'lere ve aynı dizini kullanan diğer süreçlere karşı kilitler"""
+        with self._locks_guard:
+            lock = self._locks.get(symbol)
+            if lock is None:
+                lock = self._locks[symbol] = threading.Lock()
+        with lock:
+            directory = self._symbol_dir(symbol)
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, '.lock'), 'a') as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+
+
+_default_store: Optional[PriceHistoryStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_price_store() -> PriceHistoryStore:
+    """
+    Ortam değişkenlerine göre yapılandırılmış, süreç genelinde tek fiyat deposunu döndürür
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            provider = None if PRICE_STORE_OFFLINE else YahooFinanceProvider()
+            _default_store = PriceHistoryStore(PRICE_STORE_DIR, provider)
+        return _default_store
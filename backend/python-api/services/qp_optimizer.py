@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.covariance_service import CovarianceService, get_covariance_service
+from utils.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# OSQP ve scipy.sparse ilk optimizasyonda yüklenir
+osqp = lazy_import('osqp')
+sp = lazy_import('scipy.sparse')
+
+# Risk profiline göre risk kaçınma katsayısı: max μᵀw - (λ/2) wᵀΣw
+RISK_AVERSION = {
+    'low': 10.0,
+    'medium': 4.0,
+    'high': 1.0,
+}
+
+ACCEPTED_STATUSES = ('solved', 'solved inaccurate')
+
+
+class QPOptimizer:
+    """
+    Ortalama-varyans portföy optimizasyonunu karesel program olarak OSQP ile çözer.
+
+    Kutu (varlık başına alt/üst sınır), grup/sektör ve devir (turnover) kısıtları
+    desteklenir. Varlık sayısı gözlem sayısını aştığında kovaryans yoğun n×n matris
+    yerine getiri faktörleriyle (Σ = FᵀF) yazılır; böylece KKT sistemi seyrek kalır
+    ve 1000 varlıklı problemler bir saniyenin altında çözülür.
+    """
+
+    def __init__(self,
+                 risk_aversion: Optional[Dict[str, float]] = None,
+                 covariance: Optional[CovarianceService] = None,
+                 eps: float = 1e-5,
+                 max_iter: int = 20000,
+                 max_solutions: int = 64):
+        self.risk_aversion = risk_aversion or dict(RISK_AVERSION)
+        self.covariance = covariance or get_covariance_service()
+        self.eps = eps
+        self.max_iter = max_iter
+        self.max_solutions = max_solutions
+        self._solutions: "OrderedDict[Tuple, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def optimize(self,
+                 returns: pd.DataFrame,
+                 risk_profile: str = 'medium',
+                 min_weight: float = 0.0,
+                 max_weight: float = 1.0,
+                 bounds: Optional[Dict[str, Tuple[float, float]]] = None,
+                 groups: Optional[Dict[str, Dict]] = None,
+                 current_weights: Optional[Dict[str, float]] = None,
+                 max_turnover: Optional[float] = None,
+                 shrink: bool = False,
+                 annualize: float = 252) -> Dict:
+        """
+        Günlük getiri tablosundan (satırlar gün, kolonlar sembol) optimal ağırlıkları bulur.
+
+        bounds sembol bazında (alt, üst) sınırları, groups {ad: {"symbols": [...],
+        "min": x, "max": y}} biçiminde grup toplam sınırlarını verir. current_weights
+        ve max_turnover birlikte verilirse Σ|w - w0| ≤ max_turnover uygulanır.
+        """
+        if risk_profile not in self.risk_aversion:
+            raise ValueError(f"Geçersiz risk profili: {risk_profile}")
+
+        symbols = list(returns.columns)
+        n_assets = len(symbols)
+        if n_assets == 0:
+            raise ValueError("Optimizasyon için en az bir hisse gerekli")
+        risk_aversion = self.risk_aversion[risk_profile]
+
+        with self.covariance.synced(returns, namespace='qp_optimizer') as universe:
+            mu = universe.mean(annualize=annualize)
+            n_obs = universe.window
+
+            # Kovaryans: az varlıkta yoğun matris, çok varlıkta faktör gösterimi
+            if n_assets <= n_obs:
+                factors = None
+                diagonal = 0.0
+                cov = universe.covariance(annualize=annualize, shrink=shrink)
+                P_assets = sp.csc_matrix(risk_aversion * cov)
+            else:
+                factors, diagonal = self._factors(returns.to_numpy(dtype=np.float64), universe, shrink, annualize)
+                cov = None
+                P_assets = sp.diags(np.full(n_assets, risk_aversion * diagonal), format='csc')
+        n_factors = 0 if factors is None else factors.shape[0]
+
+        use_turnover = current_weights is not None and max_turnover is not None
+        w0 = np.array([current_weights.get(s, 0.0) for s in symbols]) if use_turnover else None
+        n_turnover = n_assets if use_turnover else 0
+        n_vars = n_assets + n_factors + n_turnover
+
+        # Amaç: (λ/2) wᵀΣw - μᵀw; faktör gösteriminde (λ/2)(||y||² + d||w||²), y = Fw
+        P = sp.block_diag([P_assets,
+                           sp.identity(n_factors, format='csc') * risk_aversion,
+                           sp.csc_matrix((n_turnover, n_turnover))], format='csc')
+        q = np.concatenate([-mu, np.zeros(n_factors + n_turnover)])
+
+        rows: List[sp.spmatrix] = []
+        lower: List[np.ndarray] = []
+        upper: List[np.ndarray] = []
+
+        def add(block_assets, block_factors=None, block_turnover=None, lo=None, hi=None):
+            m = block_assets.shape[0]
+            rows.append(sp.hstack([
+                block_assets,
+                block_factors if block_factors is not None else sp.csc_matrix((m, n_factors)),
+                block_turnover if block_turnover is not None else sp.csc_matrix((m, n_turnover)),
+            ], format='csc'))
+            lower.append(np.asarray(lo, dtype=np.float64))
+            upper.append(np.asarray(hi, dtype=np.float64))
+
+        # Bütçe: Σw = 1
+        add(sp.csc_matrix(np.ones((1, n_assets))), lo=[1.0], hi=[1.0])
+
+        # Kutu kısıtları
+        lb, ub = self._box(symbols, min_weight, max_weight, bounds)
+        add(sp.identity(n_assets, format='csc'), lo=lb, hi=ub)
+
+        # Faktör tanımı: Fw - y = 0
+        if n_factors:
+            add(sp.csc_matrix(factors), -sp.identity(n_factors, format='csc'),
+                lo=np.zeros(n_factors), hi=np.zeros(n_factors))
+
+        # Grup/sektör toplamları
+        if groups:
+            matrix, group_lo, group_hi = self._groups(symbols, groups)
+            add(matrix, lo=group_lo, hi=group_hi)
+
+        # Devir: t ≥ |w - w0|, Σt ≤ max_turnover
+        if use_turnover:
+            identity = sp.identity(n_assets, format='csc')
+            add(identity, block_turnover=-identity, lo=np.full(n_assets, -np.inf), hi=w0)
+            add(identity, block_turnover=identity, lo=w0, hi=np.full(n_assets, np.inf))
+            add(sp.csc_matrix((1, n_assets)), block_turnover=sp.csc_matrix(np.ones((1, n_assets))),
+                lo=[0.0], hi=[max_turnover])
+
+        A = sp.vstack(rows, format='csc')
+        l = np.concatenate(lower)
+        u = np.concatenate(upper)
+
+        solver = osqp.OSQP()
+        solver.setup(sp.triu(P, format='csc'), q, A, l, u,
+                     eps_abs=self.eps, eps_rel=self.eps, max_iter=self.max_iter,
+                     polish=True, verbose=False)
+
+        key = (tuple(symbols), risk_profile, n_vars)
+        previous = self._warm_start(key)
+        if previous is not None:
+            solver.warm_start(x=previous)
+
+        result = solver.solve()
+        status = result.info.status
+        if status not in ACCEPTED_STATUSES:
+            if 'infeasible' in status:
+                raise ValueError("Kısıtlar altında uygun portföy bulunamadı")
+            raise RuntimeError(f"QP çözülemedi: {status}")
+        self._remember(key, result.x)
+
+        weights = np.clip(result.x[:n_assets], lb, ub)
+        weights[np.abs(weights) < 1e-8] = 0.0
+        expected_return = float(mu @ weights)
+        if cov is not None:
+            variance = float(weights @ cov @ weights)
+        else:
+            variance = float(np.sum((factors @ weights) ** 2) + diagonal * weights @ weights)
+        volatility = float(np.sqrt(max(variance, 0.0)))
+
+        return {
+            'weights': dict(zip(symbols, weights.tolist())),
+            'expected_return': expected_return,
+            'volatility': volatility,
+            'sharpe_ratio': expected_return / volatility if volatility > 0 else None,
+            'turnover': float(np.abs(weights - w0).sum()) if use_turnover else None,
+            'status': status,
+            'iterations': int(result.info.iter),
+            'solve_time': float(result.info.solve_time + result.info.setup_time),
+        }
+
+    def _factors(self, values: np.ndarray, universe, shrink: bool, annualize: float) -> Tuple[np.ndarray, float]:
+        """Σ = FᵀF + d·I olacak şekilde F (gözlem × varlık) ve d döndürür"""
+        n_obs, n_assets = values.shape
+        centered = values - values.mean(axis=0)
+        if not shrink:
+            return centered * np.sqrt(annualize / max(n_obs - 1, 1)), 0.0
+
+        # sklearn ledoit_wolf: (1 - δ)·S + δ·τ·I, S yanlı örneklem kovaryansı
+        intensity = universe.shrinkage()
+        target = float(np.sum(centered * centered)) / (n_obs * n_assets)
+        factors = centered * np.sqrt(annualize * (1 - intensity) / n_obs)
+        return factors, annualize * intensity * target
+
+    @staticmethod
+    def _box(symbols: Sequence[str], min_weight: float, max_weight: float,
+             bounds: Optional[Dict[str, Tuple[float, float]]]) -> Tuple[np.ndarray, np.ndarray]:
+        lb = np.full(len(symbols), max(0.0, min_weight))
+        ub = np.full(len(symbols), min(1.0, max_weight))
+        for i, symbol in enumerate(symbols):
+            if bounds and symbol in bounds:
+                lb[i], ub[i] = bounds[symbol]
+        if (lb > ub).any() or lb.sum() > 1 + 1e-9 or ub.sum() < 1 - 1e-9:
+            raise ValueError("Ağırlık sınırları ile toplamı 1 olan bir portföy oluşturulamaz")
+        return lb, ub
+
+    @staticmethod
+    def _groups(symbols: Sequence[str], groups: Dict[str, Dict]):
+        positions = {symbol: i for i, symbol in enumerate(symbols)}
+        data, row_index, col_index = [], [], []
+        group_lo, group_hi = [], []
+        for row, (name, group) in enumerate(groups.items()):
+            members = [positions[s] for s in group.get('symbols', []) if s in positions]
+            data.extend([1.0] * len(members))
+            row_index.extend([row] * len(members))
+            col_index.extend(members)
+            group_lo.append(group.get('min', 0.0) if members else -np.inf)
+            group_hi.append(group.get('max', 1.0) if members else np.inf)
+        matrix = sp.csc_matrix((data, (row_index, col_index)), shape=(len(groups), len(symbols)))
+        return matrix, np.array(group_lo), np.array(group_hi)
+
+    def _warm_start(self, key: Tuple) -> Optional[np.ndarray]:
+        with self._lock:
+            return self._solutions.get(key)
+
+    def _remember(self, key: Tuple, x: np.ndarray):
+        with self._lock:
+            self._solutions[key] = x
+            self._solutions.move_to_end(key)
+            while len(self._solutions) > self.max_solutions:
+                self._solutions.popitem(last=False)
+
+
+def sector_groups(sectors: Dict[str, str], max_weight: float, min_weight: float = 0.0) -> Dict[str, Dict]:
+    """
+    {sembol: sektör} eşlemesinden her sektör için aynı sınırlı grup kısıtlarını üretir
+    """
+    groups: Dict[str, Dict] = {}
+    for symbol, sector in sectors.items():
+        group = groups.setdefault(sector, {'symbols': [], 'min': min_weight, 'max': max_weight})
+        group['symbols'].append(symbol)
+    return groups
+
+
+def returns_from_prices(closes: pd.DataFrame, min_coverage: float = 0.8) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Kapanış tablosundan (tarih × sembol) eksiksiz günlük log getiri tablosu üretir.
+    Tarihlerin min_coverage oranından azında fiyatı olan semboller çıkarılır.
+    """
+    coverage = closes.notna().mean()
+    excluded = [symbol for symbol in closes.columns if coverage[symbol] < min_coverage]
+    prices = closes.drop(columns=excluded).ffill()
+    returns = np.log(prices).diff().dropna(how='any')
+    return returns, excluded
+
+
+_default_optimizer: Optional[QPOptimizer] = None
+_default_optimizer_lock = threading.Lock()
+
+
+def get_qp_optimizer() -> QPOptimizer:
+    """
+    Süreç genelinde tek QP optimizasyon motorunu döndürür
+    """
+    global _default_optimizer
+    with _default_optimizer_lock:
+        if _default_optimizer is None:
+            _default_optimizer = QPOptimizer()
+        return _default_optimizer
+
+
+def optimize_portfolio_qp(returns: pd.DataFrame, **kwargs) -> Dict:
+    """
+    Süreç havuzunda çalıştırmak için; her işçi kendi motorunu ve önbelleğini kullanır
+    """
+    return get_qp_optimizer().optimize(returns, **kwargs)
+
@@ -0,0 +1,271 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+QUOTE_HUB_INTERVAL_MS = int(os.getenv('QUOTE_HUB_INTERVAL_MS', '250'))
+QUOTE_HUB_MAX_SYMBOLS = int(os.getenv('QUOTE_HUB_MAX_SYMBOLS', '200'))
+QUOTE_HUB_SEND_TIMEOUT_SECONDS = float(os.getenv('QUOTE_HUB_SEND_TIMEOUT_SECONDS', '10'))
+# 'simulated' ise yerel rastgele yürüyüş akışı çalışır; 'none' ise fiyatlar yalnızca publish ile gelir
+QUOTE_FEED = os.getenv('QUOTE_FEED', 'none').lower()
+QUOTE_FEED_TICK_MS = int(os.getenv('QUOTE_FEED_TICK_MS', '100'))
+QUOTE_FEED_VOLATILITY = float(os.getenv('QUOTE_FEED_VOLATILITY', '0.002'))
+
+# Her flush'ta değişen fiyatlarla çağrılır: sembol -> fiyat kaydı
+QuoteListener = Callable[[Dict[str, Dict]], None]
+
+
+def _dumps(payload) -> str:
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+
+
+class Subscription:
+    """
+    Tek bir istemcinin (WebSocket bağlantısı) sembol aboneliği ve gönderim kuyruğu.
+
+    Kuyruk çerçeve değil sembol kümesidir: istemci yavaşsa aynı sembolün
+    gönderilmemiş eski fiyatı üst üste birikmez, gönderim anında hub'daki en son
+    çerçeve okunur ve atlanan güncellemeler dropped sayacına eklenir. Böylece
+    yavaş bir istemcinin bellek kullanımı abone olduğu sembol sayısıyla sınırlıdır.
+    """
+
+    def __init__(self, hub: 'QuoteHub', send: Callable[[str], Awaitable]):
+        self.hub = hub
+        self.symbols: Set[str] = set()
+        self.pending: Set[str] = set()
+        self.dropped = 0
+        self._send = send
+        self._send_lock = asyncio.Lock()
+        self._ready = asyncio.Event()
+
+    def offer(self, symbols: Iterable[str]):
+        """
+        Sembollerin güncel çerçevesini gönderim kuyruğuna alır
+        """
+        changed = self.symbols.intersection(symbols)
+        if not changed:
+            return
+        self.dropped += len(self.pending & changed)
+        self.pending |= changed
+        self._ready.set()
+
+    async def send(self, message: str, timeout: float = QUOTE_HUB_SEND_TIMEOUT_SECONDS):
+        """
+        Mesajı gönderir; fiyat mesajlarıyla aynı bağlantı üzerinde sırayla yazılır
+        """
+        async with self._send_lock:
+            await asyncio.wait_for(self._send(message), timeout)
+
+    async def run(self, timeout: float = QUOTE_HUB_SEND_TIMEOUT_SECONDS):
+        """
+        Kuyruktaki sembolleri tek mesajda gönderir; istemci timeout içinde mesajı
+        almazsa asyncio.TimeoutError yükselir ve bağlantı kapatılmalıdır
+        """
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            if not self.pending:
+                continue
+            symbols, self.pending = frozenset(self.pending), set()
+            message = self.hub.message(symbols)
+            if message is not None:
+                await self.send(message, timeout)
+
+
+class QuoteHub:
+    """
+    Tek bir fiyat akışını sembol bazlı abonelere dağıtan (fan-out) merkez.
+
+    publish() her fiyat değişiminde yalnızca sembolün son kaydını saklar; bir
+    aralık (interval) içinde aynı sembole gelen güncellemeler birleşir. flush()
+    her aralıkta değişen sembolleri bir kez JSON'a çevirir, yalnızca bu
+    sembollere abone olan bağlantıları uyandırır ve dinleyicileri çağırır. Aynı
+    sembol kümesini bekleyen bağlantılar aynı mesaj metnini paylaşır.
+
+    publish farklı thread'lerden çağrılabilir; abonelik işlemleri, flush ve
+    gönderimler olay döngüsünde çalışır.
+    """
+
+    def __init__(self, interval: float = QUOTE_HUB_INTERVAL_MS / 1000,
+                 max_symbols: int = QUOTE_HUB_MAX_SYMBOLS):
+        self.interval = interval
+        self.max_symbols = max_symbols
+        self._quotes: Dict[str, Dict] = {}
+        self._dirty: Set[str] = set()
+        self._frames: Dict[str, str] = {}
+        self._messages: Dict[FrozenSet[str], Optional[str]] = {}
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._listeners: List[QuoteListener] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def add_listener(self, callback: QuoteListener):
+        self._listeners.append(callback)
+
+    def publish(self, symbol: str, price: float, change: float, volume: int,
+                timestamp: Optional[float] = None):
+        """
+        Sembolün son fiyatını kaydeder; abonelere bir sonraki flush'ta gider
+        """
+        quote = {
+            "symbol": symbol,
+            "price": price,
+            "change": change,
+            "volume": volume,
+            "timestamp": time.time() if timestamp is None else timestamp,
+        }
+        with self._lock:
+            self._quotes[symbol] = quote
+            self._dirty.add(symbol)
+
+    def quote(self, symbol: str) -> Optional[Dict]:
+        with self._lock:
+            return self._quotes.get(symbol)
+
+    def subscribe(self, subscription: Subscription, symbols: Iterable[str]) -> Set[str]:
+        """
+        Bağlantıyı sembollere abone eder ve bilinen son fiyatlarını hemen kuyruğa alır;
+        yeni eklenen sembolleri döndürür
+        """
+        added = set(symbols) - subscription.symbols
+        if len(subscription.symbols) + len(added) > self.max_symbols:
+            raise ValueError(f"Bir bağlantı en fazla {self.max_symbols} sembole abone olabilir")
+        for symbol in added:
+            self._subscribers.setdefault(symbol, set()).add(subscription)
+        subscription.symbols |= added
+        subscription.offer(added.intersection(self._frames))
+        return added
+
+    def unsubscribe(self, subscription: Subscription, symbols: Optional[Iterable[str]] = None) -> Set[str]:
+        """
+        Aboneliği verilen sembollerden (verilmezse hepsinden) çıkarır
+        """
+        removed = subscription.symbols.copy() if symbols is None else subscription.symbols.intersection(symbols)
+        for symbol in removed:
+            subscribers = self._subscribers.get(symbol)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[symbol]
+        subscription.symbols -= removed
+        subscription.pending -= removed
+        return removed
+
+    def subscriber_count(self, symbol: Optional[str] = None) -> int:
+        if symbol is not None:
+            return len(self._subscribers.get(symbol, ()))
+        return len(set().union(*self._subscribers.values()))
+
+    def message(self, symbols: FrozenSet[str]) -> Optional[str]:
+        """
+        Sembollerin son çerçevelerinden oluşan 'quotes' mesajı; bilinen fiyat yoksa None
+        """
+        message = self._messages.get(symbols, False)
+        if message is False:
+            frames = [self._frames[symbol] for symbol in sorted(symbols) if symbol in self._frames]
+            message = '{"type":"quotes","data":[' + ','.join(frames) + ']}' if frames else None
+            self._messages[symbols] = message
+        return message
+
+    def flush(self) -> int:
+        """
+        Son flush'tan beri değişen sembolleri abonelerine dağıtır; değişen sembol sayısını döndürür
+        """
+        with self._lock:
+            if not self._dirty:
+                return 0
+            dirty, self._dirty = self._dirty, set()
+            updates = {symbol: self._quotes[symbol] for symbol in dirty}
+
+        for symbol, quote in updates.items():
+            self._frames[symbol] = _dumps(quote)
+        self._messages.clear()
+
+        # Her bağlantı, abone olduğu kaç sembol değişmiş olursa olsun bir kez uyandırılır
+        affected = set().union(*(self._subscribers.get(symbol, ()) for symbol in dirty))
+        for subscription in affected:
+            subscription.offer(dirty)
+
+        for listener in self._listeners:
+            try:
+                listener(updates)
+            except Exception as e:
+                logger.warning(f"Fiyat dinleyicisi hata verdi: {str(e)}")
+        return len(updates)
+
+    async def run(self):
+        """
+        Her aralıkta flush eder
+        """
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Fiyatlar dağıtılırken hata: {str(e)}")
+
+
+class SimulatedQuoteFeed:
+    """
+    Testler ve yerel geliştirme için rastgele yürüyüş fiyat akışı.
+
+    Her tick'te sembollerin bir kısmının fiyatı log-normal adımla değişir; günlük
+    değişim yüzdesi başlangıçtaki fiyat ve değişimden çıkarılan önceki kapanışa göre
+    hesaplanır.
+    """
+
+    def __init__(self, hub: QuoteHub, quotes: Mapping[str, Mapping],
+                 tick: float = QUOTE_FEED_TICK_MS / 1000, volatility: float = QUOTE_FEED_VOLATILITY,
+                 symbols_per_tick: int = 3, seed: Optional[int] = None):
+        self.hub = hub
+        self.tick = tick
+        self.volatility = volatility
+        self.symbols_per_tick = symbols_per_tick
+        self._random = random.Random(seed)
+        self._prices = {symbol: float(data['price']) for symbol, data in quotes.items()}
+        self._volumes = {symbol: int(data.get('volume', 0)) for symbol, data in quotes.items()}
+        self._previous_close = {symbol: float(data['price']) / (1 + float(data.get('change', 0.0)) / 100)
+                                for symbol, data in quotes.items()}
+
+    def step(self) -> List[str]:
+        """
+        Bir tick üretip hub'a yayınlar; değişen sembolleri döndürür
+        """
+        symbols = self._random.sample(list(self._prices), min(self.symbols_per_tick, len(self._prices)))
+        now = time.time()
+        for symbol in symbols:
+            price = round(self._prices[symbol] * math.exp(self._random.gauss(0.0, self.volatility)), 2)
+            self._prices[symbol] = price
+            self._volumes[symbol] += self._random.randint(100, 10000)
+            change = round((price / self._previous_close[symbol] - 1) * 100, 2)
+            self.hub.publish(symbol, price, change, self._volumes[symbol], now)
+        return symbols
+
+    async def run(self):
+        while True:
+            self.step()
+            await asyncio.sleep(self.tick)
+
+
+_default_hub: Optional[QuoteHub] = None
+_default_hub_lock = threading.Lock()
+
+
+def get_quote_hub() -> QuoteHub:
+    """
+    Süreç genelinde tek fiyat dağıtım merkezini döndürür
+    """
+    global _default_hub
+    with _default_hub_lock:
+        if _default_hub is None:
+            _default_hub = QuoteHub()
+        return _default_hub
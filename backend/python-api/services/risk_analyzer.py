@@ -1,8 +1,11 @@
+import io
 from typing import Dict, List, Optional
 import numpy as np
-from sklearn.preprocessing import StandardScaler
 from pydantic import BaseModel
 
+from services.drawdown import max_drawdown
+from services.var_engine import VAR_CONFIDENCE_LEVELS, historical_var_cvar, value_at_risk
+
 class RiskProfile(BaseModel):
     risk_level: str
     investment_duration: int
@@ -37,12 +40,59 @@ class RiskAnalyzer:
             'sharpe_ratio': sharpe_ratio,
             'max_drawdown': max_drawdown,
             'market_correlation': market_correlation,
-            'risk_metrics': {
-                'var_95': self._calculate_var(returns, 0.95),
-                'cvar_95': self._calculate_cvar(returns, 0.95)
-            }
+            # 90/95/99 düzeyleri tek kısmi sıralamayla hesaplanır
+            'risk_metrics': value_at_risk(returns, VAR_CONFIDENCE_LEVELS)
         }
 
+    def analyze_portfolios_batch(self, prices: np.ndarray,
+                                 market_returns: Optional[np.ndarray] = None,
+                                 confidence_level: float = 0.95,
+                                 risk_free_rate: float = 0.02,
+                                 chunk_size: int = 4096) -> Dict[str, np.ndarray]:
+        """
+        N portföy × T gün fiyat matrisi için risk metriklerini tek vektörel geçişte hesaplar.
+        Sonuçlar analyze_portfolio_risk ile aynıdır; her metrik N uzunluğunda bir dizidir.
+        Bellek kullanımı chunk_size satırlık parçalarla sınırlanır.
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        if prices.ndim != 2 or prices.shape[1] < 3:
+            raise ValueError("Fiyat matrisi N x T (T >= 3) boyutunda olmalı")
+        if market_returns is not None:
+            market_returns = np.asarray(market_returns, dtype=np.float64).ravel()
+            if len(market_returns) != prices.shape[1] - 1:
+                raise ValueError("Piyasa getirileri T - 1 uzunluğunda olmalı")
+
+        n_portfolios = prices.shape[0]
+        names = ['volatility', 'sharpe_ratio', 'max_drawdown', 'market_correlation', 'var', 'cvar']
+        result = {name: np.full(n_portfolios, np.nan) for name in names}
+
+        for start in range(0, n_portfolios, chunk_size):
+            stop = min(start + chunk_size, n_portfolios)
+            chunk = prices[start:stop]
+            returns = np.diff(np.log(chunk), axis=1)
+
+            mean = returns.mean(axis=1)
+            std = returns.std(axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result['volatility'][start:stop] = std * np.sqrt(252)
+                result['sharpe_ratio'][start:stop] = np.sqrt(252) * (mean - risk_free_rate / 252) / std
+
+                result['max_drawdown'][start:stop] = max_drawdown(chunk)
+
+                if market_returns is not None:
+                    centered = returns - mean[:, None]
+                    market_centered = market_returns - market_returns.mean()
+                    result['market_correlation'][start:stop] = (
+                        centered @ market_centered
+                        / np.sqrt((centered ** 2).sum(axis=1) * (market_centered ** 2).sum())
+                    )
+
+                var, cvar = historical_var_cvar(returns, (confidence_level,))
+                result['var'][start:stop] = var[0]
+                result['cvar'][start:stop] = cvar[0]
+
+        return result
+
     def get_risk_recommendations(self, risk_profile: RiskProfile, portfolio_risk: Dict) -> List[Dict]:
         """
         Risk profiline göre öneriler oluşturur
@@ -91,16 +141,7 @@ class RiskAnalyzer:
 
     def _calculate_max_drawdown(self, prices: List[float]) -> float:
         """Maksimum düşüş oranını hesaplar"""
-        peak = prices[0]
-        max_drawdown = 0
-        
-        for price in prices:
-            if price > peak:
-                peak = price
-            drawdown = (peak - price) / peak
-            max_drawdown = max(max_drawdown, drawdown)
-            
-        return max_drawdown
+        return max_drawdown(prices)
 
     def _calculate_market_correlation(self, returns: np.ndarray, market_returns: np.ndarray) -> float:
         """Piyasa korelasyonunu hesaplar"""
@@ -108,9 +149,48 @@ class RiskAnalyzer:
 
     def _calculate_var(self, returns: np.ndarray, confidence_level: float) -> float:
         """Value at Risk hesaplar"""
-        return np.percentile(returns, (1 - confidence_level) * 100)
+        return float(historical_var_cvar(returns, (confidence_level,))[0][0])
 
     def _calculate_cvar(self, returns: np.ndarray, confidence_level: float) -> float:
         """Conditional Value at Risk hesaplar"""
-        var = self._calculate_var(returns, confidence_level)
-        return np.mean(returns[returns <= var])
+        return float(historical_var_cvar(returns, (confidence_level,))[1][0])
+
+
+def decode_batch_payload(payload: bytes) -> Dict[str, np.ndarray]:
+    """
+    npz yükünü çözer: 'prices' (N x T) zorunlu, 'market_returns' (T - 1) ya da
+    'market_prices' (T) ve 'ids' (N) isteğe bağlıdır
+    """
+    try:
+        with np.load(io.BytesIO(payload), allow_pickle=False) as archive:
+            arrays = {name: archive[name] for name in archive.files}
+    except Exception as e:
+        raise ValueError(f"Geçersiz npz yükü: {str(e)}")
+
+    if 'prices' not in arrays:
+        raise ValueError("npz yükünde 'prices' dizisi yok")
+    if 'market_returns' not in arrays and 'market_prices' in arrays:
+        arrays['market_returns'] = np.diff(np.log(np.asarray(arrays.pop('market_prices'), dtype=np.float64)))
+    return arrays
+
+
+def encode_batch_result(result: Dict[str, np.ndarray]) -> bytes:
+    """
+    Metrik dizilerini sıkıştırılmış npz olarak kodlar
+    """
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **result)
+    return buffer.getvalue()
+
+
+def analyze_batch_payload(payload: bytes, confidence_level: float = 0.95,
+                          risk_free_rate: float = 0.02) -> Dict[str, np.ndarray]:
+    """
+    Süreç havuzunda çalıştırmak için: npz yükünü çözer ve toplu risk analizini yapar
+    """
+    arrays = decode_batch_payload(payload)
+    result = RiskAnalyzer().analyze_portfolios_batch(arrays['prices'], arrays.get('market_returns'),
+                                                     confidence_level, risk_free_rate)
+    if 'ids' in arrays:
+        result['ids'] = arrays['ids']
+    return result
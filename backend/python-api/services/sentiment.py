@@ -0,0 +1,201 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from utils.lazy_import import lazy_import
+
+# aiohttp, BeautifulSoup ve TextBlob ilk kullanıldıklarında yüklenir
+aiohttp = lazy_import('aiohttp')
+bs4 = lazy_import('bs4')
+textblob = lazy_import('textblob')
+
+logger = logging.getLogger(__name__)
+
+# Testlerde yerel bir HTML fixture sunucusuna yönlendirilebilir
+SENTIMENT_BASE_URL = os.getenv('SENTIMENT_BASE_URL', 'https://finans.mynet.com/borsa/hisseler')
+SENTIMENT_TTL_SECONDS = int(os.getenv('SENTIMENT_TTL_SECONDS', '1800'))
+SENTIMENT_REFRESH_SECONDS = int(os.getenv('SENTIMENT_REFRESH_SECONDS', '900'))
+SENTIMENT_CONCURRENCY = int(os.getenv('SENTIMENT_CONCURRENCY', '8'))
+SENTIMENT_TIMEOUT_SECONDS = float(os.getenv('SENTIMENT_TIMEOUT_SECONDS', '10'))
+SENTIMENT_HEADLINE_CACHE_SIZE = int(os.getenv('SENTIMENT_HEADLINE_CACHE_SIZE', '20000'))
+
+
+def normalize_symbol(symbol: str) -> str:
+    """
+    'thyao' ve 'THYAO.IS' aynı önbellek anahtarına düşer
+    """
+    symbol = symbol.strip().upper()
+    return symbol[:-3] if symbol.endswith('.IS') else symbol
+
+
+def headline_key(text: str) -> str:
+    """
+    Başlığın boşlukları sadeleştirilmiş metninin içerik özeti
+    """
+    return hashlib.sha1(' '.join(text.split()).encode('utf-8')).hexdigest()
+
+
+class SentimentService:
+    """
+    Haber başlıklarından sembol bazında duygu skoru üretir.
+
+    Başlıklar aiohttp ile çok sayıda sembol için eşzamanlı çekilir. Her başlığın
+    skoru içerik özetiyle önbelleğe alınır, böylece aynı başlık yeniden puanlanmaz;
+    sembol ortalamaları TTL ile tutulur. score() yalnızca önbelleğe bakar, ağ
+    erişimi refresh() ve arka planda çalışan run_forever() ile yapılır.
+    """
+
+    def __init__(self,
+                 base_url: str = SENTIMENT_BASE_URL,
+                 ttl: int = SENTIMENT_TTL_SECONDS,
+                 concurrency: int = SENTIMENT_CONCURRENCY,
+                 timeout: float = SENTIMENT_TIMEOUT_SECONDS,
+                 headline_cache_size: int = SENTIMENT_HEADLINE_CACHE_SIZE):
+        self.base_url = base_url.rstrip('/')
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.headline_cache_size = headline_cache_size
+        self._headline_scores: "OrderedDict[str, float]" = OrderedDict()
+        self._aggregates: Dict[str, Dict] = {}
+        self._watched: Dict[str, None] = {}
+        self._lock = threading.Lock()
+
+    def score(self, symbol: str, default: float = 0.0) -> float:
+        """
+        Sembolün önbellekteki güncel skorunu döndürür; yoksa ya da süresi dolmuşsa
+        default döner ve sembol bir sonraki yenilemeye eklenir
+        """
+        aggregate = self.get(symbol)
+        return aggregate['score'] if aggregate is not None else default
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        """
+        Sembolün önbellekteki güncel özetini (skor, başlık sayısı, zaman) döndürür
+        """
+        key = normalize_symbol(symbol)
+        with self._lock:
+            self._watched[key] = None
+            aggregate = self._aggregates.get(key)
+        if aggregate is None or time.time() - aggregate['updated_at'] > self.ttl:
+            return None
+        return dict(aggregate)
+
+    def watch(self, symbols: Iterable[str]):
+        """
+        Sembolleri arka plan yenilemesinin takip listesine ekler
+        """
+        with self._lock:
+            for symbol in symbols:
+                self._watched[normalize_symbol(symbol)] = None
+
+    def stale_symbols(self, symbols: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Skoru hiç hesaplanmamış ya da süresi dolmuş sembolleri döndürür
+        """
+        now = time.time()
+        with self._lock:
+            keys = [normalize_symbol(s) for s in symbols] if symbols is not None else list(self._watched)
+            return [key for key in keys
+                    if key not in self._aggregates
+                    or now - self._aggregates[key]['updated_at'] > self.ttl]
+
+    async def refresh(self, symbols: Iterable[str]) -> Dict[str, float]:
+        """
+        Sembollerin başlıklarını eşzamanlı çeker ve skorlarını günceller.
+        Çekilemeyen sembollerin önceki skorları korunur.
+        """
+        keys = list(dict.fromkeys(normalize_symbol(s) for s in symbols))
+        if not keys:
+            return {}
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            pages = await asyncio.gather(*[self._fetch(session, semaphore, key) for key in keys])
+
+        scores = {}
+        for key, html in zip(keys, pages):
+            if html is None:
+                continue
+            # Ayrıştırma ve puanlama olay döngüsünü bloklamasın
+            headlines = await asyncio.get_running_loop().run_in_executor(None, self._score_page, html)
+            aggregate = {
+                'score': sum(headlines) / len(headlines) if headlines else 0.0,
+                'headline_count': len(headlines),
+                'updated_at': time.time(),
+            }
+            with self._lock:
+                self._aggregates[key] = aggregate
+            scores[key] = aggregate['score']
+        return scores
+
+    async def run_forever(self, symbols: Iterable[str] = (), interval: int = SENTIMENT_REFRESH_SECONDS):
+        """
+        Takip edilen sembollerden süresi dolanları belirli aralıklarla yeniler
+        """
+        self.watch(symbols)
+        while True:
+            try:
+                stale = self.stale_symbols()
+                if stale:
+                    await self.refresh(stale)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Duygu analizi yenilenirken hata: {str(e)}")
+            await asyncio.sleep(min(interval, self.ttl))
+
+    async def _fetch(self, session, semaphore: asyncio.Semaphore, symbol: str) -> Optional[str]:
+        url = f"{self.base_url}/{symbol.lower()}-detay/"
+        async with semaphore:
+            try:
+                async with session.get(url) as response:
+                    response.raise_for_status()
+                    return await response.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Haber başlıkları alınamadı: {symbol} - {str(e)}")
+                return None
+
+    def _score_page(self, html: str) -> List[float]:
+        soup = bs4.BeautifulSoup(html, 'html.parser')
+        return [self._score_headline(title.get_text())
+                for title in soup.find_all('h3', class_='news-title')]
+
+    def _score_headline(self, text: str) -> float:
+        key = headline_key(text)
+        with self._lock:
+            cached = self._headline_scores.get(key)
+            if cached is not None:
+                self._headline_scores.move_to_end(key)
+                return cached
+
+        polarity = float(textblob.TextBlob(text).sentiment.polarity)
+
+        with self._lock:
+            self._headline_scores[key] = polarity
+            while len(self._headline_scores) > self.headline_cache_size:
+                self._headline_scores.popitem(last=False)
+        return polarity
+
+
+_default_service: Optional[SentimentService] = None
+_default_service_lock = threading.Lock()
+
+
+def get_sentiment_service() -> SentimentService:
+    """
+    Süreç genelinde tek duygu analizi servisini döndürür
+    """
+    global _default_service
+    with _default_service_lock:
+        if _default_service is None:
+            _default_service = SentimentService()
+        return _default_service
@@ -1,125 +1,108 @@
+from __future__ import annotations
+
+import math
+import threading
 import numpy as np
-import pandas as pd
-from sklearn.preprocessing import MinMaxScaler
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
-from typing import Dict, List, Tuple
-import yfinance as yf
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
-import ta
-import joblib
-from textblob import TextBlob
-import requests
-from bs4 import BeautifulSoup
+
+from models.model_registry import ModelRegistry
+from services.indicator_engine import IndicatorEngine, get_indicator_engine
+from services.price_store import get_price_store
+from services.sentiment import SentimentService, get_sentiment_service
+from utils.lazy_import import lazy_import
+from utils.windowing import sliding_windows
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from tensorflow.keras.models import Sequential
+
+# TensorFlow ilk kullanıldığında yüklenir
+keras_models = lazy_import('tensorflow.keras.models')
+keras_layers = lazy_import('tensorflow.keras.layers')
+
+SEQUENCE_LENGTH = 60
+# Analizde kullanılan fiyat geçmişinin uzunluğu (gün)
+ANALYSIS_LOOKBACK_DAYS = 365
 
 class StockAnalyzer:
-    def __init__(self):
-        self.scaler = MinMaxScaler()
-        self.model = self._build_model()
+    def __init__(self, registry: Optional[ModelRegistry] = None,
+                 sentiment: Optional[SentimentService] = None,
+                 indicators: Optional[IndicatorEngine] = None):
+        # Her sembolün kendi modeli ve ölçekleyicisi vardır; eşzamanlı istekler birbirini ezmez
+        self.registry = registry or ModelRegistry(
+            build_fn=self._build_model,
+            prepare_fn=self._prepare_data,
+            sequence_length=SEQUENCE_LENGTH
+        )
+        # Haber skorları arka planda yenilenir; analiz sırasında yalnızca önbelleğe bakılır
+        self.sentiment = sentiment or get_sentiment_service()
+        # Göstergeler sembol başına tutulan durumdan yalnızca yeni barlarla güncellenir
+        self.indicators = indicators or get_indicator_engine()
         
     def _build_model(self) -> Sequential:
-        model = Sequential([
-            LSTM(units=50, return_sequences=True, input_shape=(60, 1)),
-            Dropout(0.2),
-            LSTM(units=50, return_sequences=True),
-            Dropout(0.2),
-            LSTM(units=50),
-            Dropout(0.2),
-            Dense(units=1)
+        model = keras_models.Sequential([
+            keras_layers.LSTM(units=50, return_sequences=True, input_shape=(60, 1)),
+            keras_layers.Dropout(0.2),
+            keras_layers.LSTM(units=50, return_sequences=True),
+            keras_layers.Dropout(0.2),
+            keras_layers.LSTM(units=50),
+            keras_layers.Dropout(0.2),
+            keras_layers.Dense(units=1)
         ])
         model.compile(optimizer='adam', loss='mean_squared_error')
         return model
 
-    def _prepare_data(self, data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
-        scaled_data = self.scaler.fit_transform(data['Close'].values.reshape(-1, 1))
-        X, y = [], []
-        
-        for i in range(60, len(scaled_data)):
-            X.append(scaled_data[i-60:i, 0])
-            y.append(scaled_data[i, 0])
-            
-        return np.array(X), np.array(y)
+    def _prepare_data(self, scaled_data: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Pencereler float32 tampon üzerinde kopyasız görünümlerdir
+        return sliding_windows(scaled_data, SEQUENCE_LENGTH)
 
-    def _calculate_technical_indicators(self, data: pd.DataFrame) -> pd.DataFrame:
-        # Trend İndikatörleri
-        data['SMA_20'] = ta.trend.sma_indicator(data['Close'], window=20)
-        data['EMA_20'] = ta.trend.ema_indicator(data['Close'], window=20)
-        data['MACD'] = ta.trend.macd_diff(data['Close'])
-        
-        # Momentum İndikatörleri
-        data['RSI'] = ta.momentum.rsi(data['Close'])
-        data['Stoch'] = ta.momentum.stoch(data['High'], data['Low'], data['Close'])
-        
-        # Volatilite İndikatörleri
-        data['BB_upper'], data['BB_middle'], data['BB_lower'] = ta.volatility.bollinger_bands(data['Close'])
-        data['ATR'] = ta.volatility.average_true_range(data['High'], data['Low'], data['Close'])
-        
-        # Hacim İndikatörleri
-        data['OBV'] = ta.volume.on_balance_volume(data['Close'], data['Volume'])
-        
-        return data
-
-    def _get_sentiment_analysis(self, symbol: str) -> float:
-        try:
-            # Haber başlıklarını topla
-            url = f"https://finans.mynet.com/borsa/hisseler/{symbol.lower()}-detay/"
-            response = requests.get(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            news_titles = soup.find_all('h3', class_='news-title')
-            
-            # Duygu analizi yap
-            sentiments = []
-            for title in news_titles:
-                analysis = TextBlob(title.text)
-                sentiments.append(analysis.sentiment.polarity)
-            
-            return np.mean(sentiments) if sentiments else 0
-            
-        except Exception:
-            return 0
-
-    def analyze_stock(self, symbol: str) -> Dict:
+    def analyze_stock(self, symbol: str, sentiment_score: Optional[float] = None) -> Dict:
         # Veri çek
         end_date = datetime.now()
-        start_date = end_date - timedelta(days=365)
-        stock = yf.Ticker(symbol + '.IS')
-        data = stock.history(start=start_date, end=end_date)
-        
+        start_date = end_date - timedelta(days=ANALYSIS_LOOKBACK_DAYS)
+        data = get_price_store().get_history(symbol + '.IS', start=start_date, end=end_date)
+        return self.analyze_history(symbol, data, sentiment_score)
+
+    def analyze_history(self, symbol: str, data: pd.DataFrame, sentiment_score: Optional[float] = None,
+                        indicators: Optional[Dict[str, float]] = None) -> Dict:
+        """
+        Önceden çekilmiş günlük bar tablosu üzerinde analiz yapar (toplu analizde veri bir kez çekilir).
+        indicators verilirse (ör. durumu kaydeden ana süreçte hesaplanmışsa) gösterge motoru çağrılmaz.
+        """
         if data.empty:
             raise ValueError(f"No data found for symbol {symbol}")
 
-        # Teknik analiz
-        data = self._calculate_technical_indicators(data)
+        # Teknik analiz; yalnızca son hesaplamadan sonra gelen barlar işlenir
+        if indicators is None:
+            indicators = self.indicators.update(symbol, data)
         
-        # LSTM ile fiyat tahmini
-        X, y = self._prepare_data(data)
-        if len(X) > 0:
-            self.model.fit(X, y, epochs=50, batch_size=32, verbose=0)
-            last_60_days = self.scaler.transform(data['Close'].values[-60:].reshape(-1, 1))
-            next_day_price = self.model.predict(last_60_days.reshape(1, 60, 1))
-            next_day_price = self.scaler.inverse_transform(next_day_price)[0][0]
+        # LSTM ile fiyat tahmini; model yalnızca yeni barlar geldiğinde güncellenir
+        if len(data) > SEQUENCE_LENGTH:
+            next_day_price = self.registry.forecast_next(symbol, data['Close'])
         else:
             next_day_price = data['Close'].iloc[-1]
 
-        # Duygu analizi
-        sentiment_score = self._get_sentiment_analysis(symbol)
+        # Duygu analizi; skor verilmemişse önbellekten okunur
+        if sentiment_score is None:
+            sentiment_score = self.sentiment.score(symbol)
         
         # Teknik göstergelerin son değerleri
         current_price = data['Close'].iloc[-1]
-        rsi = data['RSI'].iloc[-1]
-        macd = data['MACD'].iloc[-1]
+        rsi = indicators['RSI']
+        macd = indicators['MACD']
         
         # Trend analizi
-        short_term_trend = "YÜKSELIŞ" if data['EMA_20'].iloc[-1] > data['SMA_20'].iloc[-1] else "DÜŞÜŞ"
-        long_term_trend = "YÜKSELIŞ" if data['Close'].iloc[-1] > data['SMA_20'].iloc[-1] else "DÜŞÜŞ"
+        short_term_trend = "YÜKSELIŞ" if indicators['EMA_20'] > indicators['SMA_20'] else "DÜŞÜŞ"
+        long_term_trend = "YÜKSELIŞ" if current_price > indicators['SMA_20'] else "DÜŞÜŞ"
         
         # Risk analizi
         volatility = data['Close'].pct_change().std() * np.sqrt(252)  # Yıllık volatilite
         risk_level = "YÜKSEK" if volatility > 0.3 else "ORTA" if volatility > 0.15 else "DÜŞÜK"
         
         # Destek ve direnç seviyeleri
-        support = data['BB_lower'].iloc[-1]
-        resistance = data['BB_upper'].iloc[-1]
+        support = indicators['BB_lower']
+        resistance = indicators['BB_upper']
         
         # Kısa vadeli analiz (1-7 gün)
         short_term_analysis = {
@@ -157,9 +140,9 @@ class StockAnalyzer:
             recommendations.append("Hem kısa hem uzun vadeli trend aşağı yönlü, temkinli olunmalı.")
             
         # Bollinger Bandı bazlı öneri
-        if data['Close'].iloc[-1] < data['BB_lower'].iloc[-1]:
+        if current_price < support:
             recommendations.append("Fiyat alt banda yakın, teknik olarak alım bölgesinde.")
-        elif data['Close'].iloc[-1] > data['BB_upper'].iloc[-1]:
+        elif current_price > resistance:
             recommendations.append("Fiyat üst banda yakın, teknik olarak satım bölgesinde.")
             
         return {
@@ -170,3 +153,45 @@ class StockAnalyzer:
             "recommendations": recommendations,
             "last_updated": datetime.now().isoformat()
         }
+
+
+def to_json_safe(value: Any) -> Any:
+    """
+    numpy sayılarını Python sayılarına, NaN/inf değerlerini None'a çevirir
+    """
+    if isinstance(value, dict):
+        return {key: to_json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json_safe(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+_default_analyzer: Optional[StockAnalyzer] = None
+_default_analyzer_lock = threading.Lock()
+
+
+def get_stock_analyzer() -> StockAnalyzer:
+    """
+    Süreç genelinde tek analizciyi döndürür; süreç havuzundaki her işçinin kendi
+    gösterge durumları ve model önbelleği olur, eğitilmiş modeller diskten paylaşılır
+    """
+    global _default_analyzer
+    with _default_analyzer_lock:
+        if _default_analyzer is None:
+            _default_analyzer = StockAnalyzer()
+        return _default_analyzer
+
+
+def analyze_history(symbol: str, data: pd.DataFrame, sentiment_score: float,
+                    indicators: Dict[str, float]) -> Dict:
+    """
+    Süreç havuzunda çalıştırmak için: sembolün trendini ve tahminini hesaplar ve
+    JSON'a yazılabilir sonucu döndürür. Göstergeler, durumları diske kaydedilen tek
+    motorun bulunduğu ana süreçte hesaplanıp verilir; işçilerin kendi motorları
+    kaydedilmediğinden orada güncellenen durum kaybolurdu.
+    """
+    return to_json_safe(get_stock_analyzer().analyze_history(symbol, data, sentiment_score, indicators))
@@ -0,0 +1,210 @@
+import heapq
+import os
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+SYMBOL_SEARCH_LIMIT = int(os.getenv('SYMBOL_SEARCH_LIMIT', '20'))
+SYMBOL_SEARCH_PREFIX_LENGTH = int(os.getenv('SYMBOL_SEARCH_PREFIX_LENGTH', '8'))
+
+# str.lower() 'I' -> 'i' ve 'İ' -> 'i̇' (i + birleşik nokta) üretir; Türkçede I -> ı, İ -> i
+_TURKISH_LOWER = str.maketrans({'I': 'ı', 'İ': 'i'})
+# Türkçe klavyesi olmayan kullanıcılar için harfler ASCII karşılıklarına indirgenir
+_ASCII_FOLD = str.maketrans({'ı': 'i', 'ş': 's', 'ğ': 'g', 'ü': 'u', 'ö': 'o', 'ç': 'c',
+                             'â': 'a', 'î': 'i', 'û': 'u', '̇': None})
+_SEPARATORS = str.maketrans({c: ' ' for c in '.,;:-_/&()\'"'})
+
+# Eşleşme türüne göre puanlar; çok kelimeli sorguda kelime puanları toplanır
+SCORE_SYMBOL_EXACT = 100
+SCORE_SYMBOL_PREFIX = 80
+SCORE_NAME_FIRST_PREFIX = 65
+SCORE_NAME_PREFIX = 60
+SCORE_SECTOR_PREFIX = 40
+SCORE_SUBSTRING = 20
+SCORE_SECTOR_SUBSTRING = 10
+
+
+def fold(text: Optional[str]) -> str:
+    """
+    Türkçe kurallarıyla küçük harfe çevirip aksanları kaldırır:
+    'İŞ BANKASI', 'iş bankası' ve 'is bankasi' aynı biçime iner
+    """
+    if not text:
+        return ''
+    return text.translate(_TURKISH_LOWER).lower().translate(_ASCII_FOLD)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Sorguyu fold edip ayraçları boşluğa çevirir ve kelimeleri tek boşlukla birleştirir
+    """
+    return ' '.join(fold(query).translate(_SEPARATORS).split())
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SymbolEntry(NamedTuple):
+    key: str
+    symbol: str
+    name: str
+    sector: str
+
+
+class SymbolIndex:
+    """
+    Sembol, isim ve sektör üzerinde Türkçe duyarlı, yazarken-arama (type-ahead) indeksi.
+
+    İndeks bir kez kurulur: her alan kelimesinin ilk SYMBOL_SEARCH_PREFIX_LENGTH
+    önekinden kayıt -> en iyi puan eşlemesine, ve sembol/isim/sektör metinlerinin
+    üçlülerinden (trigram) kayıt kümelerine. Sorguda her kelime önek tablosundan tek
+    sözlük okumasıyla, kelime içi eşleşmeler ise üçlü kümelerinin kesişimiyle bulunur;
+    taramaya gerek kalmaz. Tüm kelimelerle eşleşen kayıtlar puana, sonra sembole
+    göre sıralanır.
+    """
+
+    def __init__(self, entries: Iterable[SymbolEntry], prefix_length: int = SYMBOL_SEARCH_PREFIX_LENGTH):
+        self.prefix_length = prefix_length
+        self.entries: List[SymbolEntry] = list(entries)
+        self._prefixes: Dict[str, Dict[int, int]] = {}
+        self._trigrams: Dict[str, Set[int]] = {}
+        self._symbols: Dict[str, List[int]] = {}
+        # Kayıt başına fold edilmiş (sembol, isim, sektör) metinleri
+        self._texts: List[Tuple[str, str, str]] = []
+
+        for position, entry in enumerate(self.entries):
+            symbol = normalize_query(entry.symbol)
+            name = normalize_query(entry.name)
+            sector = normalize_query(entry.sector)
+            self._texts.append((symbol, name, sector))
+            self._symbols.setdefault(symbol, []).append(position)
+
+            self._add_prefixes(position, symbol.replace(' ', ''), SCORE_SYMBOL_PREFIX)
+            for index, word in enumerate(name.split()):
+                self._add_prefixes(position, word, SCORE_NAME_FIRST_PREFIX if index == 0 else SCORE_NAME_PREFIX)
+            for word in sector.split():
+                self._add_prefixes(position, word, SCORE_SECTOR_PREFIX)
+            for text in (symbol, name, sector):
+                for trigram in _trigrams(text):
+                    self._trigrams.setdefault(trigram, set()).add(position)
+
+        # Tek kelimelik sorgular (type-ahead'in çoğu) için her önekin kayıtları
+        # önceden sıralanır; sorguda yalnızca ilk limit kadarı okunur
+        self._prefix_order: Dict[str, List[int]] = {
+            prefix: sorted(bucket, key=lambda position: (-bucket[position], self.entries[position].symbol))
+            for prefix, bucket in self._prefixes.items()
+        }
+
+    @classmethod
+    def from_stocks(cls, stocks: Mapping[str, Mapping], **kwargs) -> 'SymbolIndex':
+        """
+        TURKISH_STOCKS biçimindeki (sembol.IS -> {'name', 'sector', ...}) sözlükten kurar
+        """
+        entries = [SymbolEntry(key, key.split('.')[0], data.get('name') or '', data.get('sector') or '')
+                   for key, data in stocks.items()]
+        return cls(entries, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def search(self, query: str, limit: Optional[int] = SYMBOL_SEARCH_LIMIT) -> List[SymbolEntry]:
+        """
+        Sorguyla eşleşen kayıtları alaka sırasıyla döndürür (limit None ise hepsi)
+        """
+        return [self.entries[position] for position, _ in self.ranked(query, limit)]
+
+    def ranked(self, query: str, limit: Optional[int] = SYMBOL_SEARCH_LIMIT) -> List[Tuple[int, int]]:
+        """
+        (kayıt konumu, puan) çiftlerini azalan puan, artan sembol sırasıyla döndürür
+        """
+        words = normalize_query(query).split()
+        if not words:
+            return []
+
+        if len(words) == 1:
+            return self._rank_word(words[0], limit)
+
+        scores: Optional[Dict[int, int]] = None
+        for word in words:
+            matches = self._match_word(word)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {position: score + matches[position]
+                          for position, score in scores.items() if position in matches}
+            if not scores:
+                return []
+
+        order = self._order
+        if limit is None or limit >= len(scores):
+            return sorted(scores.items(), key=order)
+        return heapq.nsmallest(limit, scores.items(), key=order)
+
+    def _rank_word(self, word: str, limit: Optional[int]) -> List[Tuple[int, int]]:
+        """
+        Tek kelime için sıralama: tam sembol eşleşmesi, önceden sıralı önek
+        eşleşmeleri, sonra kelime içi eşleşmeler. Kelime içi puanlar önek
+        puanlarından düşük olduğundan bu sıralar birleştirmeye gerek kalmadan art
+        arda eklenir; önek eşleşmeleri limiti dolduruyorsa üçlü aramasına inilmez.
+        """
+        ranked = [(position, SCORE_SYMBOL_EXACT) for position in self._symbols.get(word, ())]
+        seen = {position for position, _ in ranked}
+        prefix = word[:self.prefix_length]
+        scores = self._prefixes.get(prefix, {})
+        verify = len(word) > self.prefix_length
+
+        for position in self._prefix_order.get(prefix, ()):
+            if limit is not None and len(ranked) >= limit:
+                return ranked
+            if position in seen or (verify and not self._starts_word(position, word)):
+                continue
+            ranked.append((position, scores[position]))
+            seen.add(position)
+
+        if len(word) >= 3 and (limit is None or len(ranked) < limit):
+            substring = [(position, score) for position, score in self._substring_matches(word).items()
+                         if position not in seen]
+            ranked.extend(sorted(substring, key=self._order))
+        return ranked if limit is None else ranked[:limit]
+
+    def _order(self, item: Tuple[int, int]):
+        return -item[1], self.entries[item[0]].symbol
+
+    def _match_word(self, word: str) -> Dict[int, int]:
+        """
+        Tek kelimenin önek ve kelime içi eşleşmelerini kayıt -> puan olarak döndürür
+        """
+        prefixed = self._prefixes.get(word[:self.prefix_length], {})
+        if len(word) > self.prefix_length:
+            # Kayıtlı önekten uzun kelimede eşleşme alan metinlerinde doğrulanır
+            prefixed = {position: score for position, score in prefixed.items()
+                        if self._starts_word(position, word)}
+        matches = self._substring_matches(word) if len(word) >= 3 else {}
+        matches.update(prefixed)
+        return matches
+
+    def _substring_matches(self, word: str) -> Dict[int, int]:
+        """
+        Üçlü kümelerinin kesişimiyle bulunan adayları metinde doğrular
+        """
+        trigrams = sorted((self._trigrams.get(t, set()) for t in _trigrams(word)), key=len)
+        candidates = set.intersection(*trigrams) if trigrams and trigrams[0] else set()
+        matches = {}
+        for position in candidates:
+            symbol, name, sector = self._texts[position]
+            if word in symbol or word in name:
+                matches[position] = SCORE_SUBSTRING
+            elif word in sector:
+                matches[position] = SCORE_SECTOR_SUBSTRING
+        return matches
+
+    def _starts_word(self, position: int, word: str) -> bool:
+        symbol, name, sector = self._texts[position]
+        return (symbol.replace(' ', '').startswith(word)
+                or any(part.startswith(word) for part in name.split())
+                or any(part.startswith(word) for part in sector.split()))
+
+    def _add_prefixes(self, position: int, word: str, score: int):
+        for length in range(1, min(len(word), self.prefix_length) + 1):
+            bucket = self._prefixes.setdefault(word[:length], {})
+            if bucket.get(position, 0) < score:
+                bucket[position] = score
@@ -0,0 +1,377 @@
+import csv
+import io
+import json
+import os
+import re
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from typing import IO, Deque, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple
+
+from services.portfolio_repository import PortfolioRepository
+from services.symbol_search import fold
+
+TRADE_IMPORT_CHUNK_ROWS = int(os.getenv('TRADE_IMPORT_CHUNK_ROWS', '5000'))
+TRADE_IMPORT_MAX_ERRORS = int(os.getenv('TRADE_IMPORT_MAX_ERRORS', '100'))
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+# Aracı kurum dökümlerindeki sütun adları (fold edilmiş) -> alan
+COLUMN_ALIASES = {
+    'symbol': 'symbol', 'sembol': 'symbol', 'ticker': 'symbol', 'hisse': 'symbol', 'kod': 'symbol',
+    'side': 'side', 'type': 'side', 'transaction_type': 'side', 'islem': 'side', 'islem_turu': 'side',
+    'yon': 'side', 'action': 'side',
+    'quantity': 'quantity', 'qty': 'quantity', 'adet': 'quantity', 'miktar': 'quantity', 'lot': 'quantity',
+    'price': 'price', 'fiyat': 'price', 'birim_fiyat': 'price',
+    'date': 'date', 'transaction_date': 'date', 'tarih': 'date', 'islem_tarihi': 'date', 'time': 'date',
+}
+# Bu sütun adlarından biri varsa döküm Türkçedir; sayılarda '.' binlik, ',' ondalık ayracıdır
+TURKISH_COLUMNS = {'sembol', 'hisse', 'kod', 'islem', 'islem_turu', 'yon', 'adet', 'miktar', 'lot',
+                   'fiyat', 'birim_fiyat', 'tarih', 'islem_tarihi'}
+BUY_SIDES = {'buy', 'b', 'al', 'alis', 'alim'}
+SELL_SIDES = {'sell', 's', 'sat', 'satis', 'satim'}
+DATE_FORMATS = ('%d.%m.%Y %H:%M:%S', '%d.%m.%Y %H:%M', '%d.%m.%Y', '%d/%m/%Y')
+SYMBOL_PATTERN = re.compile(r'^[A-Z0-9]{1,20}$')
+# Türkçe biçimde noktalar yalnızca üçlü basamak gruplarını ayırabilir: '1.500', '1.234,56'
+TURKISH_NUMBER_PATTERN = re.compile(r'^[+-]?(\d{1,3}(\.\d{3})+|\d+)(,\d+)?$')
+# İngilizce biçimde virgül yalnızca binlik ayracıdır: '1,500', '1,234.50'
+ENGLISH_NUMBER_PATTERN = re.compile(r'^[+-]?\d{1,3}(,\d{3})+(\.\d+)?$')
+# Satışta kalan adet için yuvarlama toleransı
+QUANTITY_TOLERANCE = 1e-9
+
+
+class TradeImportError(ValueError):
+    """İçe aktarılan dosyada geçersiz satırlar var; errors satır numaralı hata listesidir"""
+
+    def __init__(self, errors: List[Dict]):
+        self.errors = errors
+        super().__init__(f"{len(errors)} geçersiz satır: " + '; '.join(
+            f"satır {error['line']}: {error['error']}" for error in errors[:5]))
+
+
+class ParsedTrade(NamedTuple):
+    line: int
+    symbol: str
+    side: str
+    quantity: float
+    price: float
+    date: Optional[datetime]
+
+
+def parse_number(value, decimal_comma: bool = False) -> float:
+    """
+    Sayıyı okur. decimal_comma ise (Türkçe döküm) '.' binlik, ',' ondalık ayracıdır:
+    '1.500' 1500, '1.234,56' 1234.56 olarak okunur; '82.5' gibi belirsiz değerler
+    reddedilir. Aksi halde ',' yalnızca binlik ayracı olabilir: '1,500' 1500,
+    '1,234.50' 1234.5 olarak okunur; '145,30' gibi değerler tahmin edilmez, reddedilir.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    text = str(value).strip().replace(' ', '')
+    if decimal_comma:
+        if not TURKISH_NUMBER_PATTERN.match(text):
+            raise ValueError(f"Türkçe sayı biçiminde değil: {text}")
+        return float(text.replace('.', '').replace(',', '.'))
+    if ',' in text:
+        if not ENGLISH_NUMBER_PATTERN.match(text):
+            raise ValueError(f"Sayı biçiminde değil: {text}")
+        text = text.replace(',', '')
+    return float(text)
+
+
+# Sembol, işlem türü ve tarih değerleri dökümde çok tekrar eder; çözümlemeleri önbelleğe alınır
+@lru_cache(maxsize=65536)
+def parse_symbol(value: str) -> str:
+    symbol = value.strip().upper()
+    if symbol.endswith('.IS'):
+        symbol = symbol[:-3]
+    if not SYMBOL_PATTERN.match(symbol):
+        raise ValueError(f"Geçersiz sembol: {symbol or '(boş)'}")
+    return symbol
+
+
+@lru_cache(maxsize=256)
+def parse_side(value: str) -> str:
+    side = fold(value.strip())
+    if side in BUY_SIDES:
+        return 'BUY'
+    if side in SELL_SIDES:
+        return 'SELL'
+    raise ValueError(f"Geçersiz işlem türü: {value}")
+
+
+@lru_cache(maxsize=65536)
+def parse_date(value: str) -> Optional[datetime]:
+    text = value.strip()
+    if not text:
+        return None
+    try:
+        date = datetime.fromisoformat(text.replace('Z', '+00:00'))
+    except ValueError:
+        pass
+    else:
+        # Saat dilimli değerler, depodaki diğer zamanlar gibi sunucunun yerel saatine çevrilir
+        return date.astimezone().replace(tzinfo=None) if date.tzinfo is not None else date
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format)
+        except ValueError:
+            continue
+    raise ValueError(f"Tarih okunamadı: {text}")
+
+
+def parse_trade(line: int, row: Mapping, decimal_comma: bool = False) -> ParsedTrade:
+    """
+    Sütun adları normalize edilmiş bir satırı doğrular; decimal_comma Türkçe sayı biçimidir
+    """
+    symbol = parse_symbol(str(row.get('symbol') or ''))
+    side = parse_side(str(row.get('side') or ''))
+    try:
+        quantity = parse_number(row.get('quantity'), decimal_comma)
+        price = parse_number(row.get('price'), decimal_comma)
+    except (TypeError, ValueError):
+        raise ValueError("Adet ve fiyat Türkçe sayı biçiminde olmalı (ör. 1.500 ya da 82,50)"
+                         if decimal_comma else "Adet ve fiyat sayı olmalı (ör. 1,500 ya da 82.50)")
+    if not 0 < quantity < float('inf'):
+        raise ValueError("Adet pozitif olmalı")
+    if not 0 < price < float('inf'):
+        raise ValueError("Fiyat pozitif olmalı")
+
+    date = row.get('date')
+    return ParsedTrade(line, symbol, side, quantity, price, None if date is None else parse_date(str(date)))
+
+
+def _normalize_columns(row: Mapping) -> Dict:
+    return {COLUMN_ALIASES.get(fold(str(key)).strip().replace(' ', '_'), key): value
+            for key, value in row.items() if key is not None}
+
+
+def iter_rows(stream: IO[bytes], file_format: str) -> Iterator[Tuple[int, Dict]]:
+    """
+    İkili akıştan (satır numarası, normalize sütunlu satır) üretir; dosya belleğe alınmaz.
+    CSV ayracı (',' ya da ';') başlık satırından anlaşılır. ';' ayraçlı ya da Türkçe
+    başlıklı CSV'lerde sayı biçimi dosya için bir kez Türkçe seçilir ve satırlara
+    '__decimal_comma__' işaretiyle taşınır.
+    """
+    if file_format not in IMPORT_FORMATS:
+        raise ValueError(f"Geçersiz dosya biçimi: {file_format}")
+    # BOM'lu UTF-8 (Excel çıktıları) de desteklenir
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if file_format == 'ndjson':
+        for line, raw in enumerate(text, start=1):
+            if not raw.strip():
+                continue
+            try:
+                record = json.loads(raw)
+            except json.JSONDecodeError:
+                yield line, {'__error__': "Geçersiz JSON"}
+                continue
+            if not isinstance(record, dict):
+                yield line, {'__error__': "Satır bir JSON nesnesi olmalı"}
+                continue
+            yield line, _normalize_columns(record)
+        return
+
+    header = text.readline()
+    if not header.strip():
+        return
+    delimiter = ';' if header.count(';') > header.count(',') else ','
+    columns = next(csv.reader([header], delimiter=delimiter))
+    names = [fold(column).strip().replace(' ', '_') for column in columns]
+    fields = [COLUMN_ALIASES.get(name, column) for name, column in zip(names, columns)]
+    decimal_comma = delimiter == ';' or not TURKISH_COLUMNS.isdisjoint(names)
+    reader = csv.reader(text, delimiter=delimiter)
+    for values in reader:
+        if not values or not any(value.strip() for value in values):
+            continue
+        row = dict(zip(fields, values))
+        if decimal_comma:
+            row['__decimal_comma__'] = True
+        # Başlık 1. satırdır; csv.reader tırnak içi satır sonlarını da sayar
+        yield reader.line_num + 1, row
+
+
+def iter_trade_chunks(rows: Iterable[Tuple[int, Dict]], chunk_rows: int = TRADE_IMPORT_CHUNK_ROWS,
+                      errors: Optional[List[Dict]] = None,
+                      max_errors: int = TRADE_IMPORT_MAX_ERRORS) -> Iterator[List[ParsedTrade]]:
+    """
+    Satırları chunk_rows'luk gruplar halinde doğrular. Geçersiz satırlar errors
+    listesine eklenir; ilk hatadan sonra grup üretilmez (yazılacak bir şey kalmaz)
+    ama max_errors hataya kadar okumaya devam edilir.
+    """
+    errors = [] if errors is None else errors
+    chunk: List[ParsedTrade] = []
+    for line, row in rows:
+        try:
+            if '__error__' in row:
+                raise ValueError(row['__error__'])
+            trade = parse_trade(line, row, row.get('__decimal_comma__', False))
+        except ValueError as e:
+            errors.append({'line': line, 'error': str(e)})
+            if len(errors) >= max_errors:
+                return
+            continue
+        if errors:
+            continue
+        chunk.append(trade)
+        if len(chunk) >= chunk_rows:
+            yield chunk
+            chunk = []
+    if chunk and not errors:
+        yield chunk
+
+
+class TaxLot:
+    __slots__ = ('quantity', 'price', 'date')
+
+    def __init__(self, quantity: float, price: float, date: Optional[datetime]):
+        self.quantity = quantity
+        self.price = price
+        self.date = date
+
+    def to_dict(self) -> Dict:
+        return {'quantity': self.quantity, 'price': self.price,
+                'date': self.date.isoformat() if self.date else None}
+
+
+class PositionBook:
+    """
+    İşlemleri tek geçişte FIFO vergi lotlarına işler.
+
+    Her sembol için açık lotlar bir kuyrukta tutulur; alım kuyruğun sonuna lot
+    ekler, satış en eski lotlardan düşer ve gerçekleşen kârı lot maliyetine göre
+    hesaplar. Adet ve kalan maliyet sembol başına ayrıca tutulur, böylece ortalama
+    fiyat (kalan lotların ağırlıklı ortalaması) lotları dolaşmadan okunur.
+    Mevcut pozisyonlar tek bir açılış lotu olarak başlar.
+    """
+
+    def __init__(self, opening: Mapping[str, Tuple[float, float]] = None):
+        self.lots: Dict[str, Deque[TaxLot]] = {}
+        self.quantity: Dict[str, float] = {}
+        self.cost: Dict[str, float] = {}
+        self.realized: Dict[str, float] = {}
+        self.touched: Dict[str, None] = {}
+        self.buys = 0
+        self.sells = 0
+        for symbol, (quantity, price) in (opening or {}).items():
+            if quantity > 0:
+                self.lots[symbol] = deque([TaxLot(quantity, price, None)])
+                self.quantity[symbol] = quantity
+                self.cost[symbol] = quantity * price
+
+    def apply(self, trade: ParsedTrade) -> float:
+        """
+        İşlemi uygular ve gerçekleşen kârı döndürür (alımda 0)
+        """
+        symbol = trade.symbol
+        self.touched[symbol] = None
+        if trade.side == 'BUY':
+            self.buys += 1
+            self.lots.setdefault(symbol, deque()).append(TaxLot(trade.quantity, trade.price, trade.date))
+            self.quantity[symbol] = self.quantity.get(symbol, 0.0) + trade.quantity
+            self.cost[symbol] = self.cost.get(symbol, 0.0) + trade.quantity * trade.price
+            return 0.0
+
+        held = self.quantity.get(symbol, 0.0)
+        if trade.quantity > held + QUANTITY_TOLERANCE:
+            raise ValueError(f"{symbol} için satış adedi ({trade.quantity:g}) eldeki adetten ({held:g}) fazla")
+        self.sells += 1
+        lots = self.lots[symbol]
+        remaining = trade.quantity
+        realized = 0.0
+        released_cost = 0.0
+        while remaining > QUANTITY_TOLERANCE and lots:
+            lot = lots[0]
+            take = min(lot.quantity, remaining)
+            realized += take * (trade.price - lot.price)
+            released_cost += take * lot.price
+            lot.quantity -= take
+            remaining -= take
+            if lot.quantity <= QUANTITY_TOLERANCE:
+                lots.popleft()
+
+        quantity = held - trade.quantity
+        if quantity <= QUANTITY_TOLERANCE or not lots:
+            quantity = 0.0
+            lots.clear()
+        self.quantity[symbol] = quantity
+        self.cost[symbol] = self.cost[symbol] - released_cost if quantity else 0.0
+        self.realized[symbol] = self.realized.get(symbol, 0.0) + realized
+        return realized
+
+    def holding(self, symbol: str) -> Tuple[float, float]:
+        """
+        (adet, kalan lotların ortalama fiyatı)
+        """
+        quantity = self.quantity.get(symbol, 0.0)
+        return quantity, (self.cost[symbol] / quantity if quantity else 0.0)
+
+    def touched_holdings(self) -> Dict[str, Tuple[float, float]]:
+        return {symbol: self.holding(symbol) for symbol in self.touched}
+
+    def summary(self, include_lots: bool = True) -> Dict:
+        positions = {}
+        for symbol in self.touched:
+            quantity, average_price = self.holding(symbol)
+            position = {
+                'quantity': quantity,
+                'average_price': average_price,
+                'realized_profit': self.realized.get(symbol, 0.0),
+                'open_lots': len(self.lots.get(symbol, ())),
+            }
+            if include_lots:
+                position['lots'] = [lot.to_dict() for lot in self.lots.get(symbol, ())]
+            positions[symbol] = position
+        return {
+            'trades': self.buys + self.sells,
+            'buys': self.buys,
+            'sells': self.sells,
+            'realized_profit': sum(self.realized.values()),
+            'positions': positions,
+        }
+
+
+def import_trades(repository: PortfolioRepository, user_id: int, stream: IO[bytes], file_format: str,
+                  chunk_rows: int = TRADE_IMPORT_CHUNK_ROWS, include_lots: bool = True) -> Tuple[Dict, Dict]:
+    """
+    CSV/NDJSON işlem dökümünü portföye içe aktarır; (depo değişikliği, özet) döndürür.
+
+    Dosya akış halinde okunur ve chunk_rows'luk gruplar halinde doğrulanır. Her grup
+    pozisyon defterine işlenir ve işlemleri tek bir toplu insert ile yazılır; sonunda
+    etkilenen pozisyonlar tek bir toplu upsert ile güncellenir. Tümü tek transaction
+    içindedir: geçersiz satır ya da eldekinden fazla satış varsa hiçbir şey yazılmaz
+    ve TradeImportError fırlatılır. Satırlar tarih sırasında olmalıdır (FIFO).
+    """
+    errors: List[Dict] = []
+    with repository.write_portfolio(user_id) as write:
+        book = PositionBook(repository.holdings(write.connection, write.portfolio_id))
+        last_date: Optional[datetime] = None
+
+        for chunk in iter_trade_chunks(iter_rows(stream, file_format), chunk_rows, errors):
+            entries = []
+            for trade in chunk:
+                try:
+                    if trade.date is not None:
+                        if last_date is not None and trade.date < last_date:
+                            raise ValueError("Satırlar tarih sırasında olmalı")
+                        last_date = trade.date
+                    book.apply(trade)
+                except ValueError as e:
+                    errors.append({'line': trade.line, 'error': str(e)})
+                    break
+                entries.append((trade.symbol, trade.side, trade.quantity, trade.price,
+                                trade.date or write.version))
+            if errors:
+                break
+            repository.record_transactions(write.connection, write.portfolio_id, entries)
+
+        if errors:
+            raise TradeImportError(errors)
+        if not book.touched:
+            raise ValueError("Dosyada işlem bulunamadı")
+
+        repository.replace_holdings(write.connection, write.portfolio_id, book.touched_holdings(), write.version)
+        change = repository.changes(write.connection, write.portfolio_id, user_id, list(book.touched),
+                                    write.previous_version, write.version)
+    return change, book.summary(include_lots)
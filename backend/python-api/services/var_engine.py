@@ -0,0 +1,365 @@
+import math
+import os
+from statistics import NormalDist
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+VAR_CONFIDENCE_LEVELS = tuple(
+    float(level) for level in os.getenv('VAR_CONFIDENCE_LEVELS', '0.90,0.95,0.99').split(',')
+)
+VAR_EWMA_LAMBDA = float(os.getenv('VAR_EWMA_LAMBDA', '0.94'))
+VAR_SKETCH_ACCURACY = float(os.getenv('VAR_SKETCH_ACCURACY', '0.01'))
+VAR_SKETCH_MAX_BINS = int(os.getenv('VAR_SKETCH_MAX_BINS', '2048'))
+
+VAR_METHODS = ('historical', 'normal', 'cornish_fisher', 'filtered_historical')
+
+_STANDARD_NORMAL = NormalDist()
+
+
+def parse_confidence_levels(levels) -> Tuple[float, ...]:
+    """
+    '0.9,0.95,99' ya da sayı listesi kabul eder; yüzde olarak verilenler orana çevrilir.
+    Güven düzeyleri [0.5, 1) aralığında olmalıdır.
+    """
+    if isinstance(levels, str):
+        levels = [part for part in levels.split(',') if part.strip()]
+    parsed = []
+    for level in levels:
+        level = float(level)
+        if level >= 1:
+            level /= 100
+        if not 0.5 <= level < 1:
+            raise ValueError(f"Geçersiz güven düzeyi: {level}")
+        parsed.append(level)
+    if not parsed:
+        raise ValueError("En az bir güven düzeyi gerekli")
+    return tuple(parsed)
+
+
+def level_key(level: float) -> str:
+    """
+    0.95 -> '95', 0.975 -> '97.5' (var_95 gibi alan adları için)
+    """
+    return f"{round(level * 100, 6):g}"
+
+
+def historical_var_cvar(returns: np.ndarray,
+                        levels: Sequence[float] = VAR_CONFIDENCE_LEVELS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Tarihsel VaR ve CVaR; tüm güven düzeyleri için tek bir kısmi sıralama yapılır.
+
+    returns 1-D (gün) ya da 2-D (seri × gün) olabilir. VaR, np.percentile ile aynı
+    doğrusal aradeğerlemeyle bulunur; CVaR, VaR'a eşit ya da altındaki getirilerin
+    ortalamasıdır. Dönen diziler (düzey,) + seri boyutundadır.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    n = returns.shape[-1]
+    if n == 0:
+        raise ValueError("Getiri serisi boş")
+
+    positions = [(n - 1) * (1 - level) for level in levels]
+    lows = [int(math.floor(p)) for p in positions]
+    highs = [min(low + 1, n - 1) for low in lows]
+    partitioned = np.partition(returns, sorted(set(lows + highs)), axis=-1)
+
+    batch_shape = returns.shape[:-1]
+    var = np.empty((len(levels),) + batch_shape)
+    cvar = np.empty((len(levels),) + batch_shape)
+    for i, (position, low, high) in enumerate(zip(positions, lows, highs)):
+        below = partitioned[..., low]
+        above = partitioned[..., high]
+        var[i] = below + (position - low) * (above - below)
+
+        # Kısmi sıralamada ilk high + 1 eleman en küçüklerdir; kuyruk yalnızca onları tarar
+        head = partitioned[..., :high + 1]
+        tail = head <= var[i][..., None]
+        total = np.where(tail, head, 0.0).sum(axis=-1)
+        count = tail.sum(axis=-1)
+
+        # VaR tam bir sıra istatistiğine denk geliyorsa eşit değerler dışarıda kalmış olabilir
+        ties = var[i] == above
+        if np.any(ties) and high + 1 < n:
+            rest = partitioned[..., high + 1:] <= var[i][..., None]
+            extra = rest.sum(axis=-1)
+            total = total + extra * var[i]
+            count = count + extra
+
+        cvar[i] = total / count
+    return var, cvar
+
+
+def parametric_var_cvar(returns: np.ndarray,
+                        levels: Sequence[float] = VAR_CONFIDENCE_LEVELS,
+                        cornish_fisher: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Normal dağılım varsayımıyla VaR ve CVaR; cornish_fisher ise çarpıklık ve basıklık
+    düzeltmeli kantil kullanılır. CVaR, düzeltilmiş kantilin normal kuyruk üzerindeki
+    beklenen değeridir (kapalı form).
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    mean = returns.mean(axis=-1)
+    centered = returns - mean[..., None]
+    m2 = (centered ** 2).mean(axis=-1)
+    std = returns.std(axis=-1, ddof=1)
+
+    if cornish_fisher:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            skew = np.nan_to_num((centered ** 3).mean(axis=-1) / m2 ** 1.5)
+            kurt = np.nan_to_num((centered ** 4).mean(axis=-1) / m2 ** 2 - 3)
+    else:
+        skew = kurt = np.zeros_like(mean)
+
+    var = np.empty((len(levels),) + mean.shape)
+    cvar = np.empty((len(levels),) + mean.shape)
+    for i, level in enumerate(levels):
+        alpha = 1 - level
+        z = _STANDARD_NORMAL.inv_cdf(alpha)
+        density = _STANDARD_NORMAL.pdf(z)
+
+        z_cf = (z + (z ** 2 - 1) * skew / 6 + (z ** 3 - 3 * z) * kurt / 24
+                - (2 * z ** 3 - 5 * z) * skew ** 2 / 36)
+
+        # Z < z koşulunda standart normalin ilk üç momenti
+        m1_tail = -density / alpha
+        m2_tail = 1 - z * density / alpha
+        m3_tail = -(z ** 2 + 2) * density / alpha
+        tail_cf = (m1_tail + (m2_tail - 1) * skew / 6 + (m3_tail - 3 * m1_tail) * kurt / 24
+                   - (2 * m3_tail - 5 * m1_tail) * skew ** 2 / 36)
+
+        var[i] = mean + z_cf * std
+        cvar[i] = mean + tail_cf * std
+    return var, cvar
+
+
+def ewma_volatility(returns: np.ndarray, decay: float = VAR_EWMA_LAMBDA) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    RiskMetrics EWMA oynaklığı: her gün için o güne kadarki bilgiyle koşullu oynaklık
+    ve ertesi gün için tahmin. Başlangıç varyansı örneklem ortalama karesidir.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    squared = np.moveaxis(returns, -1, 0) ** 2
+    variance = np.empty_like(squared)
+    current = squared.mean(axis=0)
+    for t in range(len(squared)):
+        variance[t] = current
+        current = decay * current + (1 - decay) * squared[t]
+    return np.sqrt(np.moveaxis(variance, 0, -1)), np.sqrt(current)
+
+
+def filtered_historical_var_cvar(returns: np.ndarray,
+                                 levels: Sequence[float] = VAR_CONFIDENCE_LEVELS,
+                                 decay: float = VAR_EWMA_LAMBDA) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Filtrelenmiş tarihsel simülasyon: getiriler EWMA oynaklığıyla standartlaştırılır,
+    tarihsel kantiller bugünün oynaklık tahminiyle yeniden ölçeklenir
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    volatility, forecast = ewma_volatility(returns, decay)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        standardized = np.where(volatility > 0, returns / volatility, 0.0)
+    var, cvar = historical_var_cvar(standardized, levels)
+    return var * forecast, cvar * forecast
+
+
+def compute_var_cvar(returns: np.ndarray,
+                     levels: Sequence[float] = VAR_CONFIDENCE_LEVELS,
+                     method: str = 'historical',
+                     decay: float = VAR_EWMA_LAMBDA) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Yönteme göre (düzey,) + seri boyutunda VaR ve CVaR dizileri döndürür
+    """
+    if method == 'historical':
+        return historical_var_cvar(returns, levels)
+    if method == 'normal':
+        return parametric_var_cvar(returns, levels)
+    if method == 'cornish_fisher':
+        return parametric_var_cvar(returns, levels, cornish_fisher=True)
+    if method == 'filtered_historical':
+        return filtered_historical_var_cvar(returns, levels, decay)
+    raise ValueError(f"Geçersiz VaR yöntemi: {method}")
+
+
+def value_at_risk(returns: Iterable[float],
+                  levels: Sequence[float] = VAR_CONFIDENCE_LEVELS,
+                  method: str = 'historical',
+                  decay: float = VAR_EWMA_LAMBDA) -> Dict[str, float]:
+    """
+    Tek bir getiri serisi için {'var_95': ..., 'cvar_95': ...} biçiminde sonuç döndürür
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    if returns.ndim != 1 or len(returns) < 2:
+        raise ValueError("VaR için en az iki günlük getiri gerekli")
+    return as_metrics(levels, *compute_var_cvar(returns, levels, method, decay))
+
+
+def as_metrics(levels: Sequence[float], var: np.ndarray, cvar: np.ndarray) -> Dict[str, float]:
+    result = {}
+    for level, v, c in zip(levels, var, cvar):
+        key = level_key(level)
+        result[f"var_{key}"] = float(v)
+        result[f"cvar_{key}"] = float(c)
+    return result
+
+
+class QuantileSketch:
+    """
+    Uzun (ör. gün içi) getiri geçmişleri için sınırlı bellekli kantil özeti (DDSketch).
+
+    Değerler göreli hata payı relative_accuracy olan logaritmik kovalara sayılır;
+    kova sayısı max_bins'i aşarsa sıfıra en yakın kovalar birleştirilir, böylece
+    VaR için gereken kuyruklar doğruluğunu korur. Özetler birleştirilebilir.
+    """
+
+    def __init__(self, relative_accuracy: float = VAR_SKETCH_ACCURACY,
+                 max_bins: int = VAR_SKETCH_MAX_BINS, min_value: float = 1e-9):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("Göreli hata payı 0 ile 1 arasında olmalı")
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        self.add_many([value])
+
+    def add_many(self, values: Iterable[float]):
+        """
+        Değerleri toplu olarak ekler; NaN ve sonsuz değerler atlanır
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        positive = values[values > self.min_value]
+        negative = -values[values < -self.min_value]
+        self.zero_count += len(values) - len(positive) - len(negative)
+
+        for store, magnitudes in ((self.positive, positive), (self.negative, negative)):
+            if not len(magnitudes):
+                continue
+            keys, counts = np.unique(np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64),
+                                     return_counts=True)
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                store[key] = store.get(key, 0) + count
+        self._collapse()
+
+    def merge(self, other: 'QuantileSketch'):
+        """
+        Aynı hata payıyla oluşturulmuş başka bir özeti bu özete katar
+        """
+        if other.gamma != self.gamma:
+            raise ValueError("Özetlerin göreli hata payları aynı olmalı")
+        for store, incoming in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in incoming.items():
+                store[key] = store.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._collapse()
+
+    def quantile(self, q: float) -> float:
+        """
+        q kantilinin yaklaşık değeri (göreli hata en fazla relative_accuracy)
+        """
+        if not self.count:
+            raise ValueError("Özet boş")
+        rank = q * (self.count - 1)
+        seen = 0
+        for value, count in self._buckets():
+            seen += count
+            if seen > rank:
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def var_cvar(self, levels: Sequence[float] = VAR_CONFIDENCE_LEVELS) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Özetten tüm düzeyler için VaR ve CVaR; kovalar tek geçişte taranır
+        """
+        if not self.count:
+            raise ValueError("Özet boş")
+        order = sorted(range(len(levels)), key=lambda i: 1 - levels[i])
+        ranks = [(1 - levels[i]) * (self.count - 1) for i in order]
+        var = np.empty(len(levels))
+        cvar = np.empty(len(levels))
+
+        seen = 0
+        total = 0.0
+        k = 0
+        for value, count in self._buckets():
+            value = min(max(value, self.min), self.max)
+            while k < len(order) and seen + count > ranks[k]:
+                # Kuyruk, kantilin bulunduğu kovaya kadar olan gözlemlerdir
+                needed = math.floor(ranks[k]) + 1 - seen
+                var[order[k]] = value
+                cvar[order[k]] = (total + needed * value) / (seen + needed)
+                k += 1
+            if k == len(order):
+                break
+            seen += count
+            total += count * value
+        return var, cvar
+
+    def value_at_risk(self, levels: Sequence[float] = VAR_CONFIDENCE_LEVELS) -> Dict[str, float]:
+        return as_metrics(levels, *self.var_cvar(levels))
+
+    def to_dict(self) -> Dict:
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'max_bins': self.max_bins,
+            'min_value': self.min_value,
+            'positive': [[key, count] for key, count in self.positive.items()],
+            'negative': [[key, count] for key, count in self.negative.items()],
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'QuantileSketch':
+        sketch = cls(state['relative_accuracy'], state['max_bins'], state['min_value'])
+        sketch.positive = {int(key): int(count) for key, count in state['positive']}
+        sketch.negative = {int(key): int(count) for key, count in state['negative']}
+        sketch.zero_count = state['zero_count']
+        sketch.count = state['count']
+        if sketch.count:
+            sketch.min = state['min']
+            sketch.max = state['max']
+        return sketch
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def _buckets(self) -> List[Tuple[float, int]]:
+        """
+        Kovaları küçükten büyüğe (temsil değeri, sayı) olarak sıralar
+        """
+        buckets = [(-self._value(key), self.negative[key]) for key in sorted(self.negative, reverse=True)]
+        if self.zero_count:
+            buckets.append((0.0, self.zero_count))
+        buckets.extend((self._value(key), self.positive[key]) for key in sorted(self.positive))
+        return buckets
+
+    def _collapse(self):
+        # Her işaret için kova sayısı max_bins / 2 ile sınırlıdır; sıfıra en yakın
+        # kovalar bir sonrakine katılır
+        limit = max(self.max_bins // 2, 1)
+        for store in (self.positive, self.negative):
+            excess = len(store) - limit
+            if excess <= 0:
+                continue
+            keys = sorted(store)
+            store[keys[excess]] += sum(store.pop(key) for key in keys[:excess])
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Testler backend/python-api kökünden modül olarak içe aktarır (services.*, models.*, utils.*)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,55 @@
+import threading
+
+import numpy as np
+import pytest
+
+from services.covariance_service import CovarianceService
+
+pd = pytest.importorskip('pandas')
+
+
+def returns_table(n_days: int, symbols, seed: int = 0):
+    values = np.random.default_rng(seed).normal(0.0, 0.01, size=(n_days, len(symbols)))
+    return pd.DataFrame(values, columns=list(symbols))
+
+
+def test_moments_match_numpy_as_window_slides():
+    service = CovarianceService()
+    table = returns_table(300, ['GARAN', 'THYAO', 'ASELS'])
+    for end in (250, 251, 255, 300):
+        window = table.iloc[end - 250:end]
+        mean, cov = service.moments(window)
+        assert np.allclose(mean, window.mean().to_numpy())
+        assert np.allclose(cov, window.cov().to_numpy())
+
+
+def test_unlabelled_arrays_do_not_share_state():
+    service = CovarianceService()
+    first = returns_table(60, 'ab', seed=1).to_numpy()
+    second = returns_table(80, 'ab', seed=2).to_numpy()
+
+    assert service.universe(first) is not service.universe(second)
+    _, cov = service.moments(first)
+    assert np.allclose(cov, np.cov(first, rowvar=False))
+    assert len(service._universes) == 0
+
+
+def test_concurrent_windows_keep_mean_and_covariance_together():
+    service = CovarianceService()
+    table = returns_table(400, ['GARAN', 'THYAO'])
+    windows = [table.iloc[0:200], table.iloc[200:400]]
+    expected = [(w.mean().to_numpy(), w.cov().to_numpy()) for w in windows]
+    failures = []
+
+    def run(index: int):
+        for _ in range(200):
+            mean, cov = service.moments(windows[index])
+            if not (np.allclose(mean, expected[index][0]) and np.allclose(cov, expected[index][1])):
+                failures.append(index)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in (0, 1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not failures
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+pd = pytest.importorskip('pandas')
+ta = pytest.importorskip('ta')
+
+from services.indicator_engine import IndicatorEngine
+
+INDICATORS = ('SMA_20', 'EMA_20', 'MACD', 'RSI', 'Stoch', 'BB_upper', 'BB_middle', 'BB_lower', 'ATR', 'OBV')
+
+
+def make_bars(n: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    spread = np.abs(rng.normal(0, 0.01, n)) * close
+    return pd.DataFrame({
+        'Open': close,
+        'High': close + spread,
+        'Low': close - spread,
+        'Close': close,
+        'Volume': rng.integers(1_000, 100_000, n).astype(float),
+    }, index=pd.date_range('2023-01-02', periods=n, freq='B', name='Date'))
+
+
+def reference(bars: pd.DataFrame) -> dict:
+    """
+    Göstergelerin tüm tarihçe üzerinden ta ile toplu hesabı; son satır
+    """
+    close, high, low = bars['Close'], bars['High'], bars['Low']
+    frame = pd.DataFrame({
+        'SMA_20': ta.trend.sma_indicator(close, window=20),
+        'EMA_20': ta.trend.ema_indicator(close, window=20),
+        'MACD': ta.trend.macd_diff(close),
+        'RSI': ta.momentum.rsi(close),
+        'Stoch': ta.momentum.stoch(high, low, close),
+        'BB_upper': ta.volatility.bollinger_hband(close),
+        'BB_middle': ta.volatility.bollinger_mavg(close),
+        'BB_lower': ta.volatility.bollinger_lband(close),
+        'ATR': ta.volatility.average_true_range(high, low, close),
+        'OBV': ta.volume.on_balance_volume(close, bars['Volume']),
+    })
+    return frame.iloc[-1].to_dict()
+
+
+def assert_matches(values: dict, bars: pd.DataFrame):
+    expected = reference(bars)
+    for name in INDICATORS:
+        assert values[name] == pytest.approx(expected[name], rel=1e-9, abs=1e-9, nan_ok=True), name
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return IndicatorEngine(path=str(tmp_path / 'indicators.json'))
+
+
+def test_full_history_matches_ta(engine):
+    bars = make_bars(300)
+    assert_matches(engine.update('THYAO', bars), bars)
+
+
+def test_appended_bars_match_ta(engine):
+    bars = make_bars(300)
+    engine.update('THYAO', bars.iloc[:250])
+    for end in (251, 260, 300):
+        assert_matches(engine.update('THYAO', bars.iloc[:end]), bars.iloc[:end])
+
+
+def test_revised_last_bar_matches_ta(engine):
+    bars = make_bars(300)
+    engine.update('THYAO', bars)
+    revised = bars.copy()
+    revised.iloc[-1, revised.columns.get_loc('Close')] *= 1.03
+    revised.iloc[-1, revised.columns.get_loc('High')] = revised['Close'].iloc[-1] * 1.01
+    revised.iloc[-1, revised.columns.get_loc('Volume')] += 5_000
+    assert_matches(engine.update('THYAO', revised), revised)
+    # Aynı barın ikinci revizyonu da ilk revizyondan değil, önceki bardan hesaplanır
+    revised.iloc[-1, revised.columns.get_loc('Close')] = bars['Close'].iloc[-1] * 0.98
+    assert_matches(engine.update('THYAO', revised), revised)
+
+
+def test_changed_history_rebuilds_state(engine):
+    bars = make_bars(300)
+    engine.update('THYAO', bars.iloc[:200])
+    other = make_bars(300, seed=11)
+    assert_matches(engine.update('THYAO', other), other)
+
+
+def test_save_and_load_continue_incrementally(engine, tmp_path):
+    bars = make_bars(300)
+    engine.update('THYAO', bars.iloc[:250])
+    engine.save()
+
+    restored = IndicatorEngine(path=engine.path)
+    assert restored.load()
+    assert restored.latest('THYAO') == pytest.approx(engine.latest('THYAO'), nan_ok=True)
+    assert_matches(restored.update('THYAO', bars), bars)
+
+    # Son bar kayıttan sonra revize edilirse de doğru hesaplanır
+    revised = bars.iloc[:250].copy()
+    revised.iloc[-1, revised.columns.get_loc('Close')] *= 0.97
+    reloaded = IndicatorEngine(path=engine.path)
+    assert reloaded.load()
+    assert_matches(reloaded.update('THYAO', revised), revised)
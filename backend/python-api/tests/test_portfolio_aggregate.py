@@ -0,0 +1,44 @@
+import pytest
+
+from services.portfolio_aggregate import PortfolioAggregateStore
+from services.portfolio_repository import PortfolioRepository, create_database_engine
+
+
+@pytest.fixture
+def store():
+    repository = PortfolioRepository(create_database_engine('sqlite://'))
+    repository.create_schema()
+    repository.create_portfolio(1, "Ana Portföy", [('GARAN', 100, 80.0)])
+    repository.create_portfolio(2, "Ana Portföy", [('THYAO', 10, 250.0)])
+    return PortfolioAggregateStore(repository, lambda symbol: (symbol, None), max_size=2)
+
+
+def test_price_updates_reach_only_holders(store):
+    first, second = store.get(1), store.get(2)
+
+    assert store.update_price('GARAN', 90.0) == 1
+    assert first.total_value == pytest.approx(9000.0)
+    assert second.total_value == pytest.approx(2500.0)
+    assert store.update_price('ASELS', 50.0) == 0
+
+
+def test_index_follows_opened_and_closed_positions(store):
+    store.get(1)
+    store.update(store.repository.add_holdings, 1, [('ASELS', 5, 40.0)])
+    assert store.update_price('ASELS', 44.0) == 1
+
+    store.update(store.repository.remove_holding, 1, 'GARAN', 85.0)
+    assert store.update_price('GARAN', 90.0) == 0
+
+
+def test_evicted_portfolios_leave_the_index(store):
+    store.get(1)
+    store.get(2)
+    store.repository.create_portfolio(3, "Ana Portföy", [('ASELS', 1, 40.0)])
+    store.get(3)
+
+    assert store.update_price('GARAN', 90.0) == 0
+    assert store.update_price('ASELS', 44.0) == 1
+
+    store.reload(2)
+    assert store.update_price('THYAO', 260.0) == 1
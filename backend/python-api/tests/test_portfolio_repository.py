@@ -0,0 +1,28 @@
+import threading
+
+from services.portfolio_repository import PortfolioRepository, create_database_engine, schema
+
+import sqlalchemy
+
+
+def test_concurrent_seeding_creates_one_portfolio(tmp_path):
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'portfolio.db'}")
+    repository = PortfolioRepository(engine)
+    repository.create_schema()
+    barrier = threading.Barrier(8)
+
+    def seed():
+        barrier.wait()
+        PortfolioRepository(engine).create_portfolio(1, "Ana Portföy", [('GARAN', 100, 80.0)])
+
+    threads = [threading.Thread(target=seed) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with engine.connect() as connection:
+        assert connection.execute(sqlalchemy.select(sqlalchemy.func.count())
+                                  .select_from(schema().portfolios)).scalar() == 1
+    holdings = repository.get_portfolio(1)['holdings']
+    assert [(h['symbol'], h['quantity']) for h in holdings] == [('GARAN', 100)]
@@ -0,0 +1,87 @@
+import json
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+from services.price_store import PRICE_COLUMNS, PriceDataProvider, PriceHistoryStore
+
+pd = pytest.importorskip('pandas')
+
+
+def bars(start: str, n_days: int, close: float = 100.0):
+    index = pd.date_range(start, periods=n_days, freq='D', name='Date')
+    values = np.arange(n_days, dtype=np.float64) + close
+    return pd.DataFrame({column: values for column in PRICE_COLUMNS}, index=index)
+
+
+class FrameProvider(PriceDataProvider):
+    def __init__(self, frame):
+        self.frame = frame
+
+    def fetch_history(self, symbol, start=None, end=None):
+        frame = self.frame
+        if start is not None:
+            frame = frame[frame.index >= pd.Timestamp(start)]
+        return frame if end is None else frame[frame.index < pd.Timestamp(end)]
+
+
+def versions(root: str, symbol: str):
+    directory = os.path.join(root, symbol)
+    return sorted(name for name in os.listdir(directory) if os.path.isdir(os.path.join(directory, name)))
+
+
+def test_tail_sync_publishes_new_version_and_replaces_revised_bar(tmp_path):
+    provider = FrameProvider(bars('2024-01-01', 10))
+    store = PriceHistoryStore(str(tmp_path), provider, refresh_interval=0)
+    assert len(store.get_history('GARAN.IS', period='max')) == 10
+    first = versions(str(tmp_path), 'GARAN.IS')
+
+    revised = bars('2024-01-01', 12)
+    revised.loc[revised.index[9], 'Close'] = 500.0
+    provider.frame = revised
+    history = store.get_history('GARAN.IS', period='max')
+
+    assert len(history) == 12
+    assert history['Close'].iloc[9] == 500.0
+    assert history.index.is_unique
+    current = versions(str(tmp_path), 'GARAN.IS')
+    assert len(current) == 1 and current != first
+    with open(tmp_path / 'GARAN.IS' / 'meta.json', encoding='utf-8') as f:
+        assert json.load(f)['version'] == current[0]
+
+
+def test_reads_legacy_unversioned_layout_and_migrates_on_write(tmp_path):
+    directory = tmp_path / 'THYAO.IS'
+    directory.mkdir()
+    frame = bars('2024-01-01', 5)
+    (directory / 'Date.i8').write_bytes(frame.index.asi8.astype('<i8').tobytes())
+    for column in PRICE_COLUMNS:
+        (directory / f'{column}.f8').write_bytes(frame[column].to_numpy(dtype='<f8').tobytes())
+
+    store = PriceHistoryStore(str(tmp_path))
+    assert len(store.get_history('THYAO.IS', period='max')) == 5
+
+    store.write_history('THYAO.IS', bars('2024-01-01', 7))
+    assert len(store.get_history('THYAO.IS', period='max')) == 7
+    assert not (directory / 'Date.i8').exists()
+
+
+def _write_many(root: str, offset: int):
+    store = PriceHistoryStore(root)
+    for i in range(20):
+        store.write_history('ASELS.IS', bars('2024-01-01', 5 + (offset + i) % 7))
+        history = store.get_history('ASELS.IS', period='max')
+        assert len(history) >= 5 and history.index.is_monotonic_increasing
+
+
+def test_concurrent_processes_never_see_partial_versions(tmp_path):
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=_write_many, args=(str(tmp_path), offset)) for offset in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+    assert [worker.exitcode for worker in workers] == [0, 0, 0]
+    assert len(versions(str(tmp_path), 'ASELS.IS')) == 1
@@ -0,0 +1,138 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+web = pytest.importorskip('aiohttp.web')
+pytest.importorskip('bs4')
+textblob = pytest.importorskip('textblob')
+
+import services.sentiment as sentiment
+from services.sentiment import SentimentService
+
+PAGES = {
+    'thyao': ['Strong profit growth', 'Record   passenger numbers'],
+    'garan': ['Strong profit growth', 'Weak outlook'],
+}
+
+
+def page(headlines) -> str:
+    items = ''.join(f'<h3 class="news-title">{headline}</h3>' for headline in headlines)
+    return f'<html><body>{items}<h3>Not a headline</h3></body></html>'
+
+
+class FixtureServer:
+    """
+    Haber sayfalarını /<sembol>-detay/ altında sunan yerel aiohttp sunucusu
+    """
+
+    def __init__(self):
+        self.pages = {symbol: list(headlines) for symbol, headlines in PAGES.items()}
+        self.failing = set()
+        self.hits = []
+
+    async def handle(self, request):
+        symbol = request.match_info['symbol']
+        self.hits.append(symbol)
+        if symbol in self.failing or symbol not in self.pages:
+            raise web.HTTPInternalServerError()
+        return web.Response(text=page(self.pages[symbol]), content_type='text/html')
+
+    async def run(self, scenario):
+        app = web.Application()
+        app.router.add_get('/{symbol}-detay/', self.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', 0).start()
+        port = runner.addresses[0][1]
+        try:
+            return await scenario(f'http://127.0.0.1:{port}')
+        finally:
+            await runner.cleanup()
+
+
+@pytest.fixture
+def server():
+    return FixtureServer()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1_000_000.0)
+    monkeypatch.setattr(sentiment, 'time', SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+@pytest.fixture
+def scored(monkeypatch):
+    calls = []
+
+    def counting_blob(text):
+        calls.append(text)
+        return textblob.TextBlob(text)
+
+    monkeypatch.setattr(sentiment, 'textblob', SimpleNamespace(TextBlob=counting_blob))
+    return calls
+
+
+def polarity(text: str) -> float:
+    return textblob.TextBlob(text).sentiment.polarity
+
+
+def test_refresh_scores_headlines_and_caches_them_by_hash(server, clock, scored):
+    async def scenario(base_url):
+        service = SentimentService(base_url=base_url)
+        return service, await service.refresh(['THYAO', 'GARAN'])
+
+    service, scores = asyncio.run(server.run(scenario))
+
+    assert sorted(server.hits) == ['garan', 'thyao']
+    assert scores['THYAO'] == pytest.approx((polarity('Strong profit growth')
+                                             + polarity('Record passenger numbers')) / 2)
+    assert service.get('THYAO')['headline_count'] == 2
+    # Ortak başlık bir kez puanlanır; boşluk farkı aynı özete düşer
+    assert sorted(scored) == ['Record   passenger numbers', 'Strong profit growth', 'Weak outlook']
+
+
+def test_is_suffix_and_case_share_one_cache_entry(server, clock, scored):
+    async def scenario(base_url):
+        service = SentimentService(base_url=base_url)
+        await service.refresh(['thyao.is', 'THYAO', 'Thyao.IS'])
+        return service
+
+    service = asyncio.run(server.run(scenario))
+
+    assert server.hits == ['thyao']
+    assert service.score('THYAO.IS') == service.score('thyao')
+    assert service.stale_symbols(['THYAO', 'thyao.IS']) == []
+
+
+def test_scores_expire_after_ttl(server, clock, scored):
+    async def scenario(base_url):
+        service = SentimentService(base_url=base_url, ttl=60)
+        await service.refresh(['THYAO'])
+        return service
+
+    service = asyncio.run(server.run(scenario))
+    assert service.score('THYAO', default=-9.0) != -9.0
+
+    clock.value += 61
+    assert service.get('THYAO') is None
+    assert service.score('THYAO', default=-9.0) == -9.0
+    assert service.stale_symbols(['THYAO']) == ['THYAO']
+
+
+def test_failed_fetch_keeps_previous_score(server, clock, scored):
+    async def scenario(base_url):
+        service = SentimentService(base_url=base_url)
+        first = await service.refresh(['THYAO'])
+        server.failing.add('thyao')
+        server.pages['thyao'] = ['Weak outlook']
+        second = await service.refresh(['THYAO', 'ASELS'])
+        return service, first, second
+
+    service, first, second = asyncio.run(server.run(scenario))
+
+    assert second == {}
+    assert service.score('THYAO') == first['THYAO']
+    assert service.get('ASELS') is None
@@ -0,0 +1,111 @@
+import io
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services.portfolio_repository import PortfolioRepository, create_database_engine
+from services.trade_import import TradeImportError, import_trades, parse_date, parse_number
+
+
+@pytest.fixture
+def repository():
+    repository = PortfolioRepository(create_database_engine('sqlite://'))
+    repository.create_schema()
+    repository.create_portfolio(1, "Ana Portföy")
+    return repository
+
+
+def import_text(repository, text: str, file_format: str = 'csv'):
+    return import_trades(repository, 1, io.BytesIO(text.encode('utf-8-sig')), file_format)
+
+
+def holding(repository, symbol: str):
+    record = repository.get_portfolio(1)
+    return next((h for h in record['holdings'] if h['symbol'] == symbol), None)
+
+
+def test_turkish_broker_csv_reads_dot_as_thousands_separator(repository):
+    text = ("Sembol;İşlem Türü;Adet;Fiyat;İşlem Tarihi\n"
+            "GARAN;AL;1.500;82,5;02.01.2024 10:15:00\n"
+            "THYAO;Alış;250;1.145,30;03.01.2024\n"
+            "GARAN;SAT;500;85,10;04.01.2024\n")
+    _, summary = import_text(repository, text)
+
+    assert summary['trades'] == 3
+    assert holding(repository, 'GARAN')['quantity'] == 1000
+    assert holding(repository, 'GARAN')['average_price'] == pytest.approx(82.5)
+    assert holding(repository, 'THYAO')['quantity'] == 250
+    assert holding(repository, 'THYAO')['average_price'] == pytest.approx(1145.30)
+    assert summary['positions']['GARAN']['realized_profit'] == pytest.approx(500 * (85.10 - 82.5))
+
+
+def test_turkish_header_with_comma_delimiter_uses_turkish_numbers(repository):
+    import_text(repository, 'sembol,adet,fiyat,islem\nGARAN,1.500,"82,5",al\n')
+    assert holding(repository, 'GARAN')['quantity'] == 1500
+
+
+def test_ambiguous_dot_value_in_turkish_file_is_rejected(repository):
+    with pytest.raises(TradeImportError) as info:
+        import_text(repository, "Sembol;İşlem;Adet;Fiyat\nGARAN;AL;100;82.5\n")
+    assert info.value.errors[0]['line'] == 2
+    assert holding(repository, 'GARAN') is None
+
+
+def test_english_csv_keeps_dot_as_decimal_separator(repository):
+    import_text(repository, "symbol,side,quantity,price\nGARAN,buy,1.5,82.5\n")
+    assert holding(repository, 'GARAN')['quantity'] == pytest.approx(1.5)
+
+
+def test_english_csv_reads_comma_as_thousands_separator(repository):
+    import_text(repository, 'symbol,side,quantity,price\nGARAN,buy,"1,500","1,234.50"\n')
+    assert holding(repository, 'GARAN')['quantity'] == 1500
+    assert holding(repository, 'GARAN')['average_price'] == pytest.approx(1234.5)
+
+
+def test_ambiguous_comma_value_in_english_file_is_rejected(repository):
+    with pytest.raises(TradeImportError) as info:
+        import_text(repository, 'symbol,side,quantity,price\nGARAN,buy,100,"82,5"\n')
+    assert info.value.errors[0]['line'] == 2
+    assert holding(repository, 'GARAN') is None
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('1,500', 1500.0), ('1,234.50', 1234.5), ('1,234,567', 1234567.0), ('82.5', 82.5), ('250', 250.0),
+])
+def test_parse_number_english(value, expected):
+    assert parse_number(value) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('value', ['82,5', '1,50', '1.234,56', '12,34.5', 'abc'])
+def test_parse_number_english_rejects_ambiguous(value):
+    with pytest.raises(ValueError):
+        parse_number(value)
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('1.500', 1500.0), ('1.234.567,89', 1234567.89), ('82,50', 82.5), ('250', 250.0),
+])
+def test_parse_number_turkish(value, expected):
+    assert parse_number(value, decimal_comma=True) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('value', ['82.5', '1.50', '1,234.56', 'abc'])
+def test_parse_number_turkish_rejects_ambiguous(value):
+    with pytest.raises(ValueError):
+        parse_number(value, decimal_comma=True)
+
+
+def test_parse_date_converts_offsets_to_one_zone():
+    utc = parse_date('2024-01-02T07:30:00Z')
+    istanbul = parse_date('2024-01-02T10:00:00+03:00')
+    assert utc - istanbul == timedelta(minutes=30)
+    expected = datetime(2024, 1, 2, 7, 30, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    assert utc == expected
+
+
+def test_mixed_offsets_are_ordered_by_instant(repository):
+    # 10:00+03:00 (07:00Z) 08:00Z'den önce gelir; saat dilimi atılsaydı sıra bozuk sayılırdı
+    text = ('{"symbol": "GARAN", "side": "buy", "quantity": 10, "price": 80, "date": "2024-01-02T10:00:00+03:00"}\n'
+            '{"symbol": "GARAN", "side": "sell", "quantity": 5, "price": 85, "date": "2024-01-02T08:00:00Z"}\n')
+    _, summary = import_text(repository, text, 'ndjson')
+    assert summary['positions']['GARAN']['quantity'] == 5
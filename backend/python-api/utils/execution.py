@@ -0,0 +1,200 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+EXECUTOR_IO_WORKERS = int(os.getenv('EXECUTOR_IO_WORKERS', '32'))
+EXECUTOR_CPU_WORKERS = int(os.getenv('EXECUTOR_CPU_WORKERS', str(max(1, (os.cpu_count() or 2) - 1))))
+EXECUTOR_START_METHOD = os.getenv('EXECUTOR_START_METHOD', 'spawn')
+
+# Endpoint sınıfı başına varsayılan eşzamanlılık limiti ve zaman aşımı (saniye).
+# EXECUTOR_LIMIT_<SINIF> ve EXECUTOR_TIMEOUT_<SINIF> ortam değişkenleriyle değiştirilebilir.
+DEFAULT_ENDPOINT_CLASSES = {
+    'market': {'limit': 64, 'timeout': 10.0},
+    'analysis': {'limit': 16, 'timeout': 30.0},
+    'batch_analysis': {'limit': 32, 'timeout': 120.0},
+    'prediction': {'limit': 8, 'timeout': 60.0},
+    'optimization': {'limit': 8, 'timeout': 60.0},
+    'risk': {'limit': 8, 'timeout': 120.0},
+    'portfolio': {'limit': 16, 'timeout': 10.0},
+    'import': {'limit': 2, 'timeout': 300.0},
+    # Monte Carlo VaR parçaları; limit parça başınadır, zaman aşımı kuyruk beklemesini de kapsar
+    'monte_carlo': {'limit': 8, 'timeout': 120.0},
+}
+
+
+class ExecutionTimeoutError(Exception):
+    """İş, endpoint sınıfının zaman aşımı içinde tamamlanamadı"""
+
+
+class ExecutionRejectedError(Exception):
+    """Endpoint sınıfının eşzamanlılık limiti zaman aşımı boyunca dolu kaldı"""
+
+
+def _noop():
+    return None
+
+
+def _load_endpoint_classes() -> Dict[str, Dict[str, float]]:
+    classes = {}
+    for name, defaults in DEFAULT_ENDPOINT_CLASSES.items():
+        classes[name] = {
+            'limit': int(os.getenv(f'EXECUTOR_LIMIT_{name.upper()}', defaults['limit'])),
+            'timeout': float(os.getenv(f'EXECUTOR_TIMEOUT_{name.upper()}', defaults['timeout'])),
+        }
+    return classes
+
+
+class ExecutionLayer:
+    """
+    Async handler'lardan bloklayan işleri olay döngüsünün dışına taşır.
+
+    Ağ ve disk ağırlıklı işler sınırlı bir thread havuzunda, CPU ağırlıklı analizler
+    (Monte Carlo, optimizasyon, LSTM) ayrı bir süreç havuzunda çalışır. Her endpoint
+    sınıfının kendi eşzamanlılık limiti ve zaman aşımı vardır; limit, zaman aşımına
+    uğrayan işler gerçekten bitene kadar serbest bırakılmaz.
+    """
+
+    def __init__(self,
+                 io_workers: int = EXECUTOR_IO_WORKERS,
+                 cpu_workers: int = EXECUTOR_CPU_WORKERS,
+                 start_method: str = EXECUTOR_START_METHOD,
+                 endpoint_classes: Optional[Dict[str, Dict[str, float]]] = None):
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers
+        self.start_method = start_method
+        self.endpoint_classes = endpoint_classes or _load_endpoint_classes()
+        self._io_pool: Optional[ThreadPoolExecutor] = None
+        self._cpu_pool: Optional[ProcessPoolExecutor] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def io_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._io_pool is None:
+                self._io_pool = ThreadPoolExecutor(max_workers=self.io_workers,
+                                                   thread_name_prefix='io-worker')
+            return self._io_pool
+
+    @property
+    def cpu_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._cpu_pool is None:
+                # fork, thread'leri olan (ör. io havuzu, TensorFlow) bir süreçte güvenli değildir
+                context = multiprocessing.get_context(self.start_method)
+                self._cpu_pool = ProcessPoolExecutor(max_workers=self.cpu_workers,
+                                                     mp_context=context)
+            return self._cpu_pool
+
+    async def run_io(self, endpoint_class: str, func: Callable, *args, **kwargs) -> Any:
+        """
+        Ağ veya disk bekleyen bir fonksiyonu thread havuzunda çalıştırır
+        """
+        return await self._run(self.io_pool, endpoint_class, partial(func, *args, **kwargs))
+
+    async def run_cpu(self, endpoint_class: str, func: Callable, *args, **kwargs) -> Any:
+        """
+        CPU ağırlıklı bir fonksiyonu süreç havuzunda çalıştırır; fonksiyon ve
+        argümanları pickle edilebilir olmalıdır
+        """
+        return await self._run(self.cpu_pool, endpoint_class, partial(func, *args, **kwargs))
+
+    async def _run(self, pool: Executor, endpoint_class: str, call: Callable) -> Any:
+        config = self.endpoint_classes[endpoint_class]
+        timeout = config['timeout']
+        semaphore = self._semaphore(endpoint_class)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=timeout)
+        except asyncio.TimeoutError:
+            raise ExecutionRejectedError(f"'{endpoint_class}' eşzamanlılık limiti dolu")
+
+        try:
+            future = loop.run_in_executor(pool, call)
+        except BaseException:
+            semaphore.release()
+            raise
+        # Slot, iş zaman aşımından sonra da sürse ancak gerçekten bittiğinde boşalır
+        future.add_done_callback(lambda _: semaphore.release())
+
+        remaining = max(0.0, timeout - (loop.time() - started))
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=remaining)
+        except asyncio.TimeoutError:
+            raise ExecutionTimeoutError(f"'{endpoint_class}' işi {timeout:.0f} saniyede tamamlanamadı")
+
+    def cpu_executor(self, endpoint_class: str) -> Executor:
+        """
+        Olay döngüsü dışındaki bir thread'in (ör. run_io işi) süreç havuzuna iş
+        göndermesi için Executor döndürür; her submit run_cpu ile aynı limit, zaman
+        aşımı ve havuz kabulünden geçer. Olay döngüsü içinde çağrılmalıdır.
+        """
+        return _EndpointClassExecutor(self, endpoint_class, asyncio.get_running_loop())
+
+    async def warm_up(self, func: Optional[Callable] = None, *args):
+        """
+        Süreç havuzundaki işçileri başlatır; func verilirse her işçide bir kez çalıştırılır
+        (ör. ağır modülleri önceden yüklemek için)
+        """
+        loop = asyncio.get_running_loop()
+        call = partial(func, *args) if func is not None else _noop
+        await asyncio.gather(*[
+            loop.run_in_executor(self.cpu_pool, call) for _ in range(self.cpu_workers)
+        ])
+
+    def _semaphore(self, endpoint_class: str) -> asyncio.Semaphore:
+        # Semaphore olay döngüsü içinde oluşturulmalıdır (Python 3.9)
+        semaphore = self._semaphores.get(endpoint_class)
+        if semaphore is None:
+            limit = int(self.endpoint_classes[endpoint_class]['limit'])
+            semaphore = self._semaphores[endpoint_class] = asyncio.Semaphore(limit)
+        return semaphore
+
+    def shutdown(self):
+        """
+        Havuzları kapatır; bekleyen işler iptal edilir
+        """
+        with self._lock:
+            if self._io_pool is not None:
+                self._io_pool.shutdown(wait=False, cancel_futures=True)
+                self._io_pool = None
+            if self._cpu_pool is not None:
+                self._cpu_pool.shutdown(wait=False, cancel_futures=True)
+                self._cpu_pool = None
+            self._semaphores = {}
+
+
+class _EndpointClassExecutor(Executor):
+    """
+    submit çağrılarını olay döngüsündeki run_cpu'ya yönlendirir
+    """
+
+    def __init__(self, layer: ExecutionLayer, endpoint_class: str, loop: asyncio.AbstractEventLoop):
+        self._layer = layer
+        self._endpoint_class = endpoint_class
+        self._loop = loop
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        return asyncio.run_coroutine_threadsafe(
+            self._layer.run_cpu(self._endpoint_class, fn, *args, **kwargs), self._loop)
+
+
+_default_layer: Optional[ExecutionLayer] = None
+_default_layer_lock = threading.Lock()
+
+
+def get_execution_layer() -> ExecutionLayer:
+    """
+    Süreç genelinde tek yürütme katmanını döndürür
+    """
+    global _default_layer
+    with _default_layer_lock:
+        if _default_layer is None:
+            _default_layer = ExecutionLayer()
+        return _default_layer
@@ -0,0 +1,92 @@
+import importlib
+import sys
+import threading
+import time
+import types
+from typing import Dict, Iterable
+
+# Ağır bağımlılıklar; ilk kullanımda ya da isteğe bağlı ısınma aşamasında yüklenir
+HEAVY_MODULES = [
+    'pandas',
+    'yfinance',
+    'sklearn.preprocessing',
+    'scipy.sparse',
+    'osqp',
+    'sqlalchemy',
+    'joblib',
+    'tensorflow',
+    'ta',
+    'textblob',
+    'bs4',
+    'requests',
+]
+
+# Modül adı -> yükleme süresi (saniye); yalnızca bu süreçte ilk kez yüklenenler
+IMPORT_TIMINGS: Dict[str, float] = {}
+_timings_lock = threading.Lock()
+
+
+def timed_import(name: str) -> types.ModuleType:
+    """
+    Modülü yükler ve bu süreçte ilk kez yükleniyorsa süresini kaydeder
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    elapsed = time.perf_counter() - started
+    with _timings_lock:
+        IMPORT_TIMINGS.setdefault(name, elapsed)
+    return module
+
+
+class LazyModule(types.ModuleType):
+    """
+    İlk öznitelik erişimine kadar gerçek modülü yüklemeyen vekil modül
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            module = timed_import(self.__name__)
+            self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    `import name` yerine kullanılır; modül ilk kullanıldığında yüklenir
+    """
+    return LazyModule(name)
+
+
+def warm_up(modules: Iterable[str] = HEAVY_MODULES) -> Dict[str, float]:
+    """
+    Verilen modülleri önceden yükler; kurulu olmayanlar atlanır
+    """
+    for name in modules:
+        try:
+            timed_import(name)
+        except ImportError:
+            continue
+    return get_import_timings()
+
+
+def get_import_timings() -> Dict[str, float]:
+    """
+    Kaydedilen yükleme sürelerini döndürür
+    """
+    with _timings_lock:
+        return dict(IMPORT_TIMINGS)
@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, NamedTuple, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv('RESPONSE_CACHE_TTL_SECONDS', '5'))
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '1024'))
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    expires_at: float
+    tags: frozenset
+    generation: int
+
+
+def serialize(payload: Any) -> bytes:
+    """
+    FastAPI'nin JSONResponse'u ile aynı biçimde JSON baytlarına çevirir
+    """
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(',', ':')).encode('utf-8')
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match başlığı (virgülle ayrılmış, zayıf W/ önekli ya da '*') ETag ile eşleşiyor mu
+    """
+    if not header:
+        return False
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    Sık okunan endpoint'ler için önceden serileştirilmiş JSON yanıt önbelleği.
+
+    Her anahtar (endpoint + normalize edilmiş sorgu) için gövde baytları ve ETag bir
+    kez üretilir; süre (TTL) dolana ya da etiketine bağlı bir invalidate çağrısı
+    gelene kadar aynen döndürülür. Aynı anahtar için eşzamanlı ıskalamalar tek bir
+    üretimi bekler. If-None-Match eşleşirse gövdesiz 304 döner.
+    """
+
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL_SECONDS, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, CachedResponse]' = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, payload: Any, ttl: Optional[float] = None,
+            tags: Iterable[str] = (), generation: Optional[int] = None) -> CachedResponse:
+        """
+        Yükü serileştirip saklar; generation, üretime başlanırken alınan etiket sürümüdür
+        ve üretim sırasında gelen bir invalidate'ten sonra bayat yanıtın saklanmasını önler
+        """
+        body = payload if isinstance(payload, bytes) else serialize(payload)
+        tags = frozenset(tags)
+        with self._lock:
+            current = self._generation(tags)
+            entry = CachedResponse(
+                body=body,
+                etag=f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"',
+                expires_at=time.monotonic() + (self.ttl if ttl is None else ttl),
+                tags=tags,
+                generation=current if generation is None else generation,
+            )
+            if entry.generation == current:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return entry
+
+    async def get_or_build(self, key: Hashable, builder: Callable[[], Any],
+                           ttl: Optional[float] = None, tags: Iterable[str] = ()) -> CachedResponse:
+        """
+        Önbellekteki yanıtı ya da builder() sonucunu döndürür; builder senkron bir
+        fonksiyon ya da coroutine döndüren bir fonksiyon olabilir
+        """
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            with self._lock:
+                generation = self._generation(frozenset(tags))
+            payload = builder()
+            if asyncio.iscoroutine(payload):
+                payload = await payload
+            entry = self.put(key, payload, ttl, tags, generation)
+            future.set_result(entry)
+            return entry
+        except BaseException as e:
+            future.set_exception(e)
+            # Bekleyen yoksa "exception was never retrieved" uyarısı çıkmasın
+            future.exception()
+            raise
+        finally:
+            del self._pending[key]
+
+    def invalidate(self, *tags: str):
+        """
+        Etiketlerden birini taşıyan yanıtları geçersiz kılar; etiket verilmezse hepsini
+        """
+        with self._lock:
+            if not tags:
+                self._entries.clear()
+                self._epoch += 1
+                return
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+            stale = [key for key, entry in self._entries.items() if entry.tags.intersection(tags)]
+            for key in stale:
+                del self._entries[key]
+
+    def respond(self, request: Request, entry: CachedResponse) -> Response:
+        """
+        Koşullu isteğe 304, diğerlerine önceden serileştirilmiş gövdeyi döndürür
+        """
+        headers = {'ETag': entry.etag, 'Cache-Control': 'no-cache'}
+        if etag_matches(request.headers.get('if-none-match'), entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type='application/json', headers=headers)
+
+    def clear(self):
+        self.invalidate()
+
+    def _generation(self, tags: frozenset) -> int:
+        # Genel sürüm ile etiket sürümlerinin toplamı; herhangi biri artarsa değişir
+        return self._epoch + sum(self._generations.get(tag, 0) for tag in tags)
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Süreç genelinde tek yanıt önbelleğini döndürür
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
@@ -0,0 +1,29 @@
+from typing import Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def sliding_windows(series: Sequence[float], sequence_length: int = 60,
+                    horizon: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bir seriden LSTM girdi pencerelerini kopyasız, adımlı (strided) görünümler olarak üretir.
+
+    X[i] = series[i : i + sequence_length] (n, sequence_length, 1) ve hedef olarak
+    y[i] = sonraki horizon değer (horizon 1 ise (n,), değilse (n, horizon)) döner.
+    Seri zaten float32 ise hiç kopya yapılmaz; görünümler salt okunurdur.
+    """
+    buffer = np.ascontiguousarray(series, dtype=np.float32).ravel()
+    span = sequence_length + horizon
+    n_windows = len(buffer) - span + 1
+
+    if n_windows <= 0:
+        X = np.empty((0, sequence_length, 1), dtype=np.float32)
+        y = np.empty((0,) if horizon == 1 else (0, horizon), dtype=np.float32)
+        return X, y
+
+    windows = sliding_window_view(buffer, span)
+    X = windows[:, :sequence_length, np.newaxis]
+    y = windows[:, sequence_length] if horizon == 1 else windows[:, sequence_length:]
+    return X, y
+
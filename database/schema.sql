@@ -29,7 +29,8 @@ CREATE TABLE portfolios (
     total_value DECIMAL(15,2),
     cash_balance DECIMAL(15,2),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT portfolios_user_name UNIQUE (user_id, name)
 );
 
 -- Yatırım İşlemleri
@@ -51,9 +52,12 @@ CREATE TABLE portfolio_holdings (
     symbol VARCHAR(20) NOT NULL,
     quantity DECIMAL(15,6) NOT NULL,
     average_price DECIMAL(15,2) NOT NULL,
-    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT portfolio_holdings_portfolio_symbol UNIQUE (portfolio_id, symbol)
 );
 
+CREATE INDEX portfolios_user_id ON portfolios (user_id);
+
 -- AI Önerileri
 CREATE TABLE investment_recommendations (
     id SERIAL PRIMARY KEY,